@@ -0,0 +1,177 @@
+"""Benchmark suite for `outcome.utils.cache`.
+
+Runs offline, and compares the results to `benchmarks/baselines/cache.json`.
+
+Usage:
+
+```sh
+PYTHONPATH=src python -m benchmarks.cache                   # Run and compare to the baseline
+PYTHONPATH=src python -m benchmarks.cache --output out.json # Also write the results to a file
+PYTHONPATH=src python -m benchmarks.cache --save-baseline   # Replace the baseline
+PYTHONPATH=src python -m benchmarks.cache --filter backend  # Only run some of the benchmarks
+```
+
+The baseline is machine-specific, regenerate it before comparing results from another machine.
+"""
+
+import asyncio
+import pickle  # noqa: S403
+import tempfile
+import time
+from contextlib import closing
+from functools import partial
+from itertools import product
+from pathlib import Path
+
+from dogpile.cache.api import CachedValue
+from outcome.utils import cache
+
+from benchmarks import runner
+from benchmarks.cache_memory import bytes_per_entry
+
+_sizes = (100, 10000, 100000)
+_persisted_sizes = (100, 1000)
+_startup_sizes = (1000, 100000)
+_concurrency = (1, 100, 1000)
+_ttl = 3600
+_memory_entries = 100000
+# Whether the backends use the compact representation
+_representations = (False, True)
+
+
+def _value(i: int) -> CachedValue:
+    return CachedValue(i, {'ct': time.time(), 'v': 2})
+
+
+def _backend(size: int, compact: bool, **arguments) -> cache.TTLBackend:
+    return cache.TTLBackend({'maxsize': size, 'ttl': _ttl, 'compact': compact, **arguments})
+
+
+def _filled_backend(size: int, compact: bool) -> cache.TTLBackend:
+    backend = _backend(size, compact)
+    for i in range(size):
+        backend.set(f'key-{i}', _value(i))
+    return backend
+
+
+def _key_fn(a, b, c):
+    ...
+
+
+class _Owner:
+    def method(self, a):
+        ...
+
+
+def bench_key_generator(fn, *args):
+    generate = cache.cache_key_generator(None, fn)
+    return runner.time_per_op(lambda: generate(*args))
+
+
+def bench_backend_get(size: int, compact: bool):
+    backend = _filled_backend(size, compact)
+    key = f'key-{size // 2}'
+    return runner.time_per_op(lambda: backend.get(key))
+
+
+def bench_backend_get_miss(size: int, compact: bool):
+    backend = _filled_backend(size, compact)
+    return runner.time_per_op(lambda: backend.get('missing'))
+
+
+def bench_backend_set(size: int, compact: bool):
+    backend = _filled_backend(size, compact)
+    value = _value(0)
+    counter = iter(range(10 ** 12))  # noqa: WPS432
+    # New keys, so that each set evicts an entry once the cache is full
+    return runner.time_per_op(lambda: backend.set(f'new-{next(counter)}', value))
+
+
+def bench_persisted_set(size: int):
+    with tempfile.TemporaryDirectory() as directory:
+        backend = _filled_backend(size, compact=False)
+        backend.persisted_cache_path = str(Path(directory, 'cache.pkl'))
+        value = _value(0)
+        return runner.time_per_op(lambda: backend.set('key-0', value), repeat=3)
+
+
+def bench_startup(size: int, compact: bool):
+    with tempfile.TemporaryDirectory() as directory:
+        cache_path = str(Path(directory, 'cache.pkl'))
+        backend = _filled_backend(size, compact)
+        with open(cache_path, 'wb') as f:
+            pickle.dump(backend.cache, f)
+
+        return runner.time_per_op(lambda: _backend(size, compact, cache_path=cache_path), repeat=3)
+
+
+def bench_async_await(concurrency: int):
+    region = cache.get_cache_region()
+    cache.configure_cache_region(region, settings={}, prefix='benchmark')
+
+    @region.cache_on_arguments()
+    @cache.cache_async
+    async def cached(value):
+        await asyncio.sleep(0)
+        return value
+
+    async def gather():
+        # All the callers share the same `CoroutineCache`, only the first one runs the coroutine
+        region.invalidate()
+        await asyncio.gather(*(cached(1) for _ in range(concurrency)))
+
+    with closing(asyncio.new_event_loop()) as loop:
+        return runner.time_per_op(lambda: loop.run_until_complete(gather()))
+
+
+def bench_memory(compact: bool):
+    return runner.Measure(bytes_per_entry(_memory_entries, compact), 'bytes/entry')
+
+
+def _representation(compact: bool) -> str:
+    return 'compact' if compact else 'ttlcache'
+
+
+def _name(*parts) -> str:
+    return '.'.join(str(part) for part in parts)
+
+
+def _backend_benchmarks(size: int, compact: bool) -> runner.Suite:
+    representation = _representation(compact)
+    return {
+        _name('backend.get', representation, size): partial(bench_backend_get, size, compact),
+        _name('backend.get_miss', representation, size): partial(bench_backend_get_miss, size, compact),
+        _name('backend.set', representation, size): partial(bench_backend_set, size, compact),
+    }
+
+
+def _suite() -> runner.Suite:
+    benchmarks: runner.Suite = {
+        'key_generator.no_args': partial(bench_key_generator, _key_fn),
+        'key_generator.ints': partial(bench_key_generator, _key_fn, 1, 2, 3),
+        'key_generator.long_strings': partial(bench_key_generator, _key_fn, 'a' * 1000, 'b' * 1000, 'c' * 1000),
+        'key_generator.method': partial(bench_key_generator, _Owner().method, 1),
+    }
+
+    benchmarks.update({
+        name: benchmark
+        for size, compact in product(_sizes, _representations)
+        for name, benchmark in _backend_benchmarks(size, compact).items()
+    })
+    benchmarks.update({_name('persisted.set', size): partial(bench_persisted_set, size) for size in _persisted_sizes})
+    benchmarks.update({
+        _name('startup', _representation(compact), size): partial(bench_startup, size, compact)
+        for size, compact in product(_startup_sizes, _representations)
+    })
+    benchmarks.update({
+        _name('async.await', concurrency): partial(bench_async_await, concurrency) for concurrency in _concurrency
+    })
+    benchmarks.update({_name('memory', _representation(compact)): partial(bench_memory, compact) for compact in _representations})
+    return benchmarks
+
+
+suite = _suite()
+
+
+if __name__ == '__main__':
+    runner.main(suite, Path(__file__).parent / 'baselines' / 'cache.json', __doc__.splitlines()[0])
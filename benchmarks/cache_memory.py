@@ -0,0 +1,71 @@
+"""Memory benchmark for the `memory` cache backend.
+
+Reports the number of bytes used per cache entry by `TTLBackend`, with and
+without the `compact` option.
+
+Usage:
+
+```sh
+PYTHONPATH=src python benchmarks/cache_memory.py --entries 100000
+```
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import Dict
+
+from dogpile.cache.api import CachedValue
+from outcome.utils.cache import TTLBackend
+
+_value_version = 2
+_default_entries = 100000
+
+
+def bytes_per_entry(entries: int, compact: bool) -> float:
+    # Keys are built before tracing starts, since they're the same for both representations.
+    # The values are built while tracing, as dogpile would, so what the backend retains of them is counted.
+    keys = [f'module:function|{i:056x}' for i in range(entries)]
+
+    gc.collect()
+    tracemalloc.start()
+
+    values = [CachedValue(None, {'ct': time.time(), 'v': _value_version}) for _ in range(entries)]
+
+    backend = TTLBackend({'maxsize': entries, 'ttl': 3600, 'compact': compact})
+    for k, v in zip(keys, values):
+        backend.set(k, v)
+
+    # Drop the caller's references so that only what the backend retains is counted
+    del values  # noqa: WPS420 - del usage
+    gc.collect()
+
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return current / entries
+
+
+def run(entries: int) -> Dict[str, float]:
+    return {
+        'ttlcache': bytes_per_entry(entries, compact=False),
+        'compact': bytes_per_entry(entries, compact=True),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=_default_entries)
+    args = parser.parse_args()
+
+    results = run(args.entries)
+    for name, per_entry in results.items():
+        print(f'{name:>10}: {per_entry:8.1f} bytes/entry')  # noqa: T001, WPS421 - print usage
+
+    saved = 1 - results['compact'] / results['ttlcache']
+    print(f'{"saved":>10}: {saved:8.1%}')  # noqa: T001, WPS421 - print usage
+
+
+if __name__ == '__main__':
+    main()
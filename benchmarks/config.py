@@ -0,0 +1,73 @@
+"""Benchmark suite for `outcome.utils.config`.
+
+Runs offline, and compares the results to `benchmarks/baselines/config.json`.
+
+Usage:
+
+```sh
+PYTHONPATH=src python -m benchmarks.config
+PYTHONPATH=src python -m benchmarks.config --save-baseline
+```
+
+The baseline is machine-specific, regenerate it before comparing results from another machine.
+"""
+
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from outcome.utils.config import TomlBackend
+
+from benchmarks import runner
+
+_leaves = 50000
+
+
+def synthetic_document(leaves: int, fanout: int = 10, depth: int = 4) -> Dict[str, Any]:
+    """Build a document of nested tables, with `leaves` values spread over tables `depth` levels deep.
+
+    Arguments:
+        leaves (int): The number of values.
+        fanout (int): The number of sub-tables per table.
+        depth (int): The number of levels of tables.
+
+    Returns:
+        Dict[str, Any]: The document.
+    """
+    document: Dict[str, Any] = {}
+    tables = fanout ** depth
+    for i in range(leaves):
+        table_index = i % tables
+        table = document
+        for level in range(depth):
+            name = f'table{(table_index // fanout ** level) % fanout}'
+            table = table.setdefault(name, {})
+        table[f'value{i}'] = i
+    return document
+
+
+def recursive_flatten(value: Any, key: Optional[str] = None) -> Dict[str, Any]:
+    # The previous, recursive, implementation of `TomlBackend.flatten_keys`, kept as a reference
+    if not isinstance(value, dict):
+        return {key.upper(): value}
+
+    flattened = {}
+    for k, v in value.items():
+        prefix = (f'{key}_' if key else '').upper()
+        flattened.update({f'{prefix}{skey}': sval for skey, sval in recursive_flatten(v, k).items()})
+    return flattened
+
+
+def bench_flatten(flatten, leaves: int):
+    document = synthetic_document(leaves)
+    return runner.time_per_op(lambda: flatten(document), repeat=3)
+
+
+suite: runner.Suite = {
+    f'flatten_keys.recursive.{_leaves}': partial(bench_flatten, recursive_flatten, _leaves),
+    f'flatten_keys.iterative.{_leaves}': partial(bench_flatten, TomlBackend.flatten_keys, _leaves),
+}
+
+
+if __name__ == '__main__':
+    runner.main(suite, Path(__file__).parent / 'baselines' / 'config.json', __doc__.splitlines()[0])
@@ -0,0 +1,165 @@
+"""Benchmark suite for `outcome.utils.feature_set`.
+
+Runs offline, and compares the results to `benchmarks/baselines/feature_set.json`.
+
+Usage:
+
+```sh
+PYTHONPATH=src python -m benchmarks.feature_set
+PYTHONPATH=src python -m benchmarks.feature_set --save-baseline
+```
+
+The baseline is machine-specific, regenerate it before comparing results from another machine.
+"""
+
+import tempfile
+from functools import partial
+from pathlib import Path
+from string import ascii_lowercase
+from unittest.mock import patch
+
+from outcome.utils import feature_rules, feature_set
+from outcome.utils.feature_rules import AllowList, AttributeMatch, DenyList, Rollout
+
+from benchmarks import runner
+
+_features = 100
+_bulk_features = 20
+_bulk_contexts = 20000
+
+
+def _letters(number):
+    # Feature names can only contain letters
+    high, low = divmod(number, len(ascii_lowercase))
+    return f'{ascii_lowercase[low]}{ascii_lowercase[high]}'
+
+
+def setup():
+    feature_set.reset()
+    for i in range(_features):
+        feature_set.register_feature(f'feature.number{_letters(i)}', default=bool(i % 2))
+    return 'feature.numberaa'
+
+
+def bench_is_active_warm():
+    feature = setup()
+    feature_set.is_active(feature)
+    return runner.time_per_op(lambda: feature_set.is_active(feature))
+
+
+def bench_is_active_scoped():
+    feature = setup()
+    with feature_set.feature_scope():
+        feature_set.is_active(feature)
+        return runner.time_per_op(lambda: feature_set.is_active(feature))
+
+
+def bench_is_active_telemetry():
+    feature = setup()
+    feature_set.is_active(feature)
+    feature_set.start_telemetry()
+    return runner.time_per_op(lambda: feature_set.is_active(feature))
+
+
+def bench_is_active_cold():
+    # Evaluates all the features on each call, as after a refresh
+    feature = setup()
+
+    def check():  # noqa: WPS430 - nested function
+        feature_set.refresh()
+        feature_set.is_active(feature)
+
+    return runner.time_per_op(check)
+
+
+def _feature_names():
+    return [f'feature.number{_letters(number)}' for number in range(_features)]
+
+
+def bench_register_loop():
+    names = _feature_names()
+
+    def register():  # noqa: WPS430 - nested function
+        feature_set.reset()
+        for name in names:
+            feature_set.register_feature(name, default=True)
+
+    return runner.time_per_op(register, repeat=3)
+
+
+def bench_register_bulk():
+    table = {name: True for name in _feature_names()}
+
+    def register():  # noqa: WPS430 - nested function
+        feature_set.reset()
+        feature_set.register_features(table)
+
+    return runner.time_per_op(register, repeat=3)
+
+
+def bench_register_toml():
+    # The definitions are parsed once, then loaded from the cache
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory, 'pyproject.toml')
+        lines = ''.join(f'"{name}" = true\n' for name in _feature_names())
+        path.write_text(f'[tool.features]\n{lines}')
+
+        def register():  # noqa: WPS430 - nested function
+            feature_set.reset()
+            feature_set.load_features(path, cache=True)
+
+        return runner.time_per_op(register, repeat=3)
+
+
+def setup_bulk():
+    feature_set.reset()
+    features = []
+    for number in range(_bulk_features):
+        feature = f'bulk.feature{_letters(number)}'
+        rules = [DenyList({'user-1'}), AllowList({f'user-{number}'}), AttributeMatch('country', 'FR'), Rollout(5 * number)]
+        feature_set.register_feature(feature, rules=rules)
+        features.append(feature)
+
+    columns = {
+        'id': [f'user-{i}' for i in range(_bulk_contexts)],
+        'country': [('FR', 'US', 'BE', None)[i % 4] for i in range(_bulk_contexts)],
+    }
+    return features, columns
+
+
+def bench_bulk_loop():
+    features, columns = setup_bulk()
+    contexts = [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+    def evaluate():  # noqa: WPS430 - nested function
+        return [[feature_set.is_active(feature, context) for context in contexts] for feature in features]
+
+    return runner.time_per_op(evaluate, repeat=3)
+
+
+def bench_bulk_evaluate_many(numpy):
+    features, columns = setup_bulk()
+    with patch.object(feature_rules, 'numpy', feature_rules.numpy if numpy else None):
+        return runner.time_per_op(lambda: feature_set.evaluate_many(features, columns), repeat=3)
+
+
+_bulk = f'{_bulk_features}x{_bulk_contexts}'
+
+suite: runner.Suite = {
+    'is_active.warm': bench_is_active_warm,
+    'is_active.scoped': bench_is_active_scoped,
+    'is_active.telemetry': bench_is_active_telemetry,
+    f'is_active.cold.{_features}': bench_is_active_cold,
+    f'register.loop.{_features}': bench_register_loop,
+    f'register.bulk.{_features}': bench_register_bulk,
+    f'register.toml.{_features}': bench_register_toml,
+    f'bulk.loop.{_bulk}': bench_bulk_loop,
+    f'bulk.evaluate_many.python.{_bulk}': partial(bench_bulk_evaluate_many, numpy=False),
+}
+
+if feature_rules.numpy is not None:
+    suite[f'bulk.evaluate_many.numpy.{_bulk}'] = partial(bench_bulk_evaluate_many, numpy=True)
+
+
+if __name__ == '__main__':
+    runner.main(suite, Path(__file__).parent / 'baselines' / 'feature_set.json', __doc__.splitlines()[0])
@@ -0,0 +1,102 @@
+"""Shared helpers to run benchmark suites and compare them to a stored baseline.
+
+A suite is a dict of benchmark names to functions returning a `Measure`. For all the
+measures, lower is better. Results are written as JSON, and a benchmark is flagged as a
+regression when its value exceeds the baseline value by more than the threshold ratio.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+_seconds = 's/op'
+_default_threshold = 1.25
+
+
+class Measure(NamedTuple):
+    value: float
+    unit: str
+
+
+Suite = Dict[str, Callable[[], Measure]]
+
+
+def time_per_op(fn: Callable[[], object], repeat: int = 5) -> Measure:
+    # `autorange` picks a number of loops that takes at least 0.2s, we keep the best of `repeat` runs
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return Measure(best / number, _seconds)
+
+
+def run(suite: Suite, pattern: Optional[str] = None) -> Dict[str, Dict[str, object]]:
+    results = {}
+    for name, benchmark in suite.items():
+        if pattern and pattern not in name:
+            continue
+        measure = benchmark()
+        results[name] = measure._asdict()
+        print(f'{name:<60} {measure.value:14.9g} {measure.unit}', file=sys.stderr)  # noqa: T001, WPS421 - print usage
+    return results
+
+
+def compare(results: Dict[str, Dict[str, object]], baseline: Dict[str, Dict[str, object]], threshold: float) -> List[str]:
+    regressions = []
+    measures = [(name, Measure(**result), Measure(**baseline[name])) for name, result in results.items() if name in baseline]
+    for name, measure, reference in measures:
+        if reference.unit != measure.unit or not reference.value:
+            continue
+        ratio = measure.value / reference.value
+        if ratio > threshold:
+            values = f'{measure.value:.9g} vs {reference.value:.9g} {measure.unit}'
+            regressions.append(f'{name}: {ratio:.2f}x the baseline ({values})')
+    return regressions
+
+
+def _parse_args(default_baseline: Path, description: str) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--output', type=Path, help='Write the results as JSON to this file')
+    parser.add_argument('--baseline', type=Path, default=default_baseline, help='The baseline to compare to')
+    parser.add_argument('--save-baseline', action='store_true', help='Replace the baseline with these results')
+    parser.add_argument(
+        '--threshold', type=float, default=_default_threshold, help='The ratio above which a result is a regression',
+    )
+    parser.add_argument('--filter', help='Only run the benchmarks whose name contains this string')
+    return parser.parse_args()
+
+
+def main(suite: Suite, default_baseline: Path, description: str):
+    args = _parse_args(default_baseline, description)
+    results = run(suite, args.filter)
+    document = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+    output = json.dumps(document, indent=2, sort_keys=True)
+    if args.output:
+        args.output.write_text(output)
+    else:
+        print(output)  # noqa: T001, WPS421 - print usage
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(output)
+        return
+
+    if not args.baseline.exists():
+        print(f'No baseline at {args.baseline}, nothing to compare to', file=sys.stderr)  # noqa: T001, WPS421 - print usage
+        return
+
+    baseline = json.loads(args.baseline.read_text())['results']
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f'REGRESSION {regression}', file=sys.stderr)  # noqa: T001, WPS421 - print usage
+
+    if regressions:
+        sys.exit(1)
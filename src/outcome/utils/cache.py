@@ -3,21 +3,28 @@
 import asyncio
 import hashlib
 import pickle  # noqa: S403
+import time
 import warnings
+from collections import deque
+from collections.abc import MutableMapping
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Deque, Dict, Hashable, Iterator, List, Optional
 
 from cachetools import TTLCache
 from dogpile.cache import CacheRegion, make_region, register_backend
-from dogpile.cache.api import NO_VALUE, CacheBackend
+from dogpile.cache.api import NO_VALUE, CacheBackend, CachedValue
 from dogpile.cache.util import compat
 from makefun import wraps
+from outcome.utils.cache_adaptive import AdaptiveTTLPolicy
+from outcome.utils.cache_invalidation import InvalidationBus, delete_op, prefix_op
 
 
 class CoroutineCache:
     # `CoroutineCache` allows to cache `async`functions.
     # As a coroutine can't be called twice, we need this to check when it's done or not.
 
+    __slots__ = ('co', 'done', 'result', 'lock', 'await_hooks')
+
     def __init__(self, co=None, result=None):
         self.co = co
         self.done = False
@@ -126,22 +133,200 @@ def configure_cache_region(cache_region: CacheRegion, settings: Dict[str, Any],
 
     resolved_args = {**_default_backend_args[backend], **backend_args}
 
+    # With adaptive TTLs, entries expire in the backend, so dogpile mustn't expire them earlier
+    if _as_bool(resolved_args.get(TTLBackend.adaptive_ttl_arg, False)):
+        expiration = None
+
     # Configure the cache region
     cache_region.configure(
         _backend_map[backend], expiration_time=expiration, arguments=resolved_args, replace_existing_backend=True,
     )
 
 
-class TTLBackend(CacheBackend):
+def _as_bool(value: Any) -> bool:
+    # Settings usually come from config files or env variables, so flags may be strings
+    return str(value).lower() in {'yes', 'y', 'true', 't', '1'}
+
+
+# The keys of the metadata of dogpile's `CachedValue`
+_creation_time = 'ct'
+_value_version = 'v'
+
+
+class _CompactEntry:
+    # A single slot in a `CompactTTLCache`. When `created` is None, `payload`
+    # holds the raw value, otherwise it holds the payload of a dogpile `CachedValue`
+    # whose metadata is rebuilt on read.
+
+    __slots__ = ('payload', 'created', 'expires')
+
+    def __init__(self, payload: Any, created: Optional[float], expires: float):
+        self.payload = payload
+        self.created = created
+        self.expires = expires
+
+
+class CompactTTLCache(MutableMapping):  # noqa: WPS214
+    """A memory-lean alternative to `cachetools.TTLCache`.
+
+    Each key maps to a single slotted entry: dogpile's per-value metadata dict is
+    replaced by the creation time, and the value version is shared by the whole cache.
+    Expiry is tracked in a timing wheel, a fixed list of buckets indexed by expiry tick,
+    instead of a per-key linked list. Expired entries are never returned, and the wheel
+    reclaims them in bulk as time advances.
+
+    When the cache is full, the entry closest to expiring is evicted.
+    """
+
+    def __init__(
+        self, maxsize: int, ttl: float, timer: Callable[[], float] = time.time, resolution: float = 1,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self.resolution = resolution
+
+        self._entries: Dict[Hashable, _CompactEntry] = {}
+        self._version = None
+        self._wheel: List[Deque[Hashable]] = [deque() for _ in range(self._wheel_size(ttl))]
+        self._cursor = self._tick(timer())
+        # No entry expires before this tick, which saves scanning empty buckets on eviction
+        self._earliest = self._cursor
+
+    def __getitem__(self, key: Hashable) -> Any:
+        entry = self._entries[key]
+        if entry.expires <= self.timer():
+            del self._entries[key]  # noqa: WPS420 - del usage
+            raise KeyError(key)
+        if entry.created is None:
+            return entry.payload
+        return CachedValue(entry.payload, {_creation_time: entry.created, _value_version: self._version})
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        self.set(key, value)
+
+    def __delitem__(self, key: Hashable) -> None:  # noqa: WPS603
+        del self._entries[key]  # noqa: WPS420 - del usage
+
+    def __iter__(self) -> Iterator[Hashable]:
+        self.expire()
+        return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        self.expire()
+        return len(self._entries)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:  # noqa: WPS125, A003
+        now = self.timer()
+        self.expire(now)
+
+        self._entries.pop(key, None)
+        while len(self._entries) >= self.maxsize:
+            self._evict()
+
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        expires = now + ttl
+        self._entries[key] = self._pack(value, expires)
+        tick = self._tick(expires)
+        self._wheel[tick % len(self._wheel)].append(key)
+        self._earliest = min(self._earliest, tick)
+
+    def expire(self, now: Optional[float] = None) -> None:
+        """Remove the entries in all the buckets that have fully expired.
+
+        Arguments:
+            now (float, optional): The current time, defaults to the cache's timer.
+        """
+        if now is None:
+            now = self.timer()
+
+        current = self._tick(now)
+        size = len(self._wheel)
+
+        for tick in range(max(self._cursor, current - size), current):
+            bucket = self._wheel[tick % size]
+            for key in bucket:
+                entry = self._entries.get(key)
+                # The key may have been re-set since, in which case its entry is in another bucket
+                if entry is not None and entry.expires <= now:
+                    del self._entries[key]  # noqa: WPS420 - del usage
+            bucket.clear()
+
+        self._cursor = max(self._cursor, current)
+
+    def _wheel_size(self, ttl: float) -> int:
+        # An entry is never scheduled more than `ttl` ahead of the cursor,
+        # so buckets are never reused before they have been swept
+        return int(ttl // self.resolution) + 2
+
+    def _tick(self, when: float) -> int:
+        return int(when // self.resolution)
+
+    def _pack(self, value: Any, expires: float) -> _CompactEntry:
+        if isinstance(value, CachedValue) and value.metadata.keys() == {_creation_time, _value_version}:
+            if self._version is None:
+                self._version = value.metadata[_value_version]
+            if value.metadata[_value_version] == self._version:
+                return _CompactEntry(value.payload, value.metadata[_creation_time], expires)
+        return _CompactEntry(value, None, expires)
+
+    def _evict(self) -> None:
+        # The buckets before the cursor have been swept, so the first live entry
+        # found from the cursor onwards is the one closest to expiring
+        size = len(self._wheel)
+        start = max(self._cursor, self._earliest)
+        for tick in range(start, self._cursor + size):
+            bucket = self._wheel[tick % size]
+            while bucket:
+                key = bucket.popleft()
+                entry = self._entries.get(key)
+                # Skip keys that have been deleted, or re-set into another bucket
+                if entry is not None and self._tick(entry.expires) % size == tick % size:
+                    del self._entries[key]  # noqa: WPS420 - del usage
+                    self._earliest = tick
+                    return
+
+        # Every entry is scheduled in the wheel, this is only a safety net
+        self._entries.pop(next(iter(self._entries)))
+
+
+class TTLBackend(CacheBackend):  # noqa: WPS214 - too many methods
     _cache_path = 'cache_path'
+    _compact = 'compact'
+    _invalidation_path = 'invalidation_path'
+    adaptive_ttl_arg = 'adaptive_ttl'
+    _min_ttl = 'min_ttl'
+    _max_ttl = 'max_ttl'
+    _default_min_ttl = 60
+    _default_max_ttl = 3600
 
     def __init__(self, arguments):
 
         self.persisted_cache_path = arguments.pop(self._cache_path, None)
+        cache_class = CompactTTLCache if _as_bool(arguments.pop(self._compact, False)) else TTLCache
+
+        # Adaptive TTLs are set per entry, which only the compact cache supports.
+        # Its `ttl` becomes the upper bound, and the configured `ttl` is the TTL of new keys.
+        self.adaptive_ttl = None
+        min_ttl = float(arguments.pop(self._min_ttl, self._default_min_ttl))
+        max_ttl = float(arguments.pop(self._max_ttl, self._default_max_ttl))
+        if _as_bool(arguments.pop(self.adaptive_ttl_arg, False)):
+            cache_class = CompactTTLCache
+            self.adaptive_ttl = AdaptiveTTLPolicy(min_ttl, max_ttl, initial_ttl=arguments['ttl'])
+            arguments['ttl'] = max_ttl
+
+        # Invalidations received from sibling processes are queued by the bus thread,
+        # and applied by the next caller, so the caches are only ever touched from the caller's thread
+        self.pending_invalidations = deque()
+        self.invalidation_bus = None
+        invalidation_path = arguments.pop(self._invalidation_path, None)
+        if invalidation_path:
+            self.invalidation_bus = InvalidationBus(invalidation_path, self.pending_invalidations.append)
+
         # This `coroutine_cache` will keep in memory all coroutines that have not already been awaited
-        self.coroutine_cache = TTLCache(**arguments)
+        self.coroutine_cache = cache_class(**arguments)
         # A potentially persisted cache for all items to keep in cache
-        self.cache = TTLCache(**arguments)
+        self.cache = cache_class(**arguments)
 
         if self.persisted_cache_path:
             Path(self.persisted_cache_path).parent.mkdir(parents=True, exist_ok=True)
@@ -150,18 +335,27 @@ class TTLBackend(CacheBackend):
                 # If we find a cache file and no argument was modified, then we retrieve the cache in file
                 with open(self.persisted_cache_path, 'rb') as f:
                     pickled_cache = pickle.load(f)  # noqa: S301 - pickle usage
-                    if all(getattr(self.cache, arg_key) == getattr(pickled_cache, arg_key) for arg_key in arguments.keys()):
+                    same_args = all(
+                        getattr(self.cache, arg_key) == getattr(pickled_cache, arg_key) for arg_key in arguments.keys()
+                    )
+                    if same_args and isinstance(pickled_cache, cache_class):
                         self.cache = pickled_cache  # noqa: WPS220 - deep nesting
 
             except (FileNotFoundError, EOFError):
                 pass
 
     def get(self, key):
+        if self.pending_invalidations:
+            self.apply_invalidations()
+
         coroutine = self.coroutine_cache.get(key, None)
         if coroutine:
             return coroutine
 
-        return self.cache.get(key, NO_VALUE)
+        value = self.cache.get(key, NO_VALUE)
+        if value is NO_VALUE and self.adaptive_ttl:
+            self.adaptive_ttl.miss(key)
+        return value
 
     def coroutine_awaited(self, key, co):
         # This function will be called with when the coroutine is awaited.
@@ -169,26 +363,92 @@ class TTLBackend(CacheBackend):
         self.set(key, self.coroutine_cache.pop(key, co))
 
     def set(self, key, value):  # noqa: WPS125, A003
+        if self.pending_invalidations:
+            self.apply_invalidations()
+
         # In the case when the coroutine have not been awaited, we add it to the in memory coroutine cache
         if isinstance(value[0], CoroutineCache) and not value[0].done:
             value[0].await_hooks.append(lambda co: self.coroutine_awaited(key, co))
             self.coroutine_cache[key] = value
             return
 
-        self.cache[key] = value
+        if self.adaptive_ttl:
+            self.cache.set(key, value, ttl=self.adaptive_ttl.ttl(key, value))
+        else:
+            self.cache[key] = value
+
         if self.persisted_cache_path:
             self.persist_cache()
 
     def delete(self, key):
+        self.delete_local(key)
+        if self.invalidation_bus:
+            self.invalidation_bus.publish(delete_op, key)
+
+    def delete_local(self, key):
         self.coroutine_cache.pop(key, None)
 
         sentinel = object()
         if self.cache.pop(key, sentinel) is not sentinel and self.persisted_cache_path:
             self.persist_cache()
 
+    def invalidate_prefix(self, prefix: str):
+        """Delete all the keys starting with `prefix`, in this process and its siblings.
+
+        Arguments:
+            prefix (str): The key prefix, an empty prefix invalidates everything.
+        """
+        self.invalidate_prefix_local(prefix)
+        if self.invalidation_bus:
+            self.invalidation_bus.publish(prefix_op, prefix)
+
+    def invalidate_prefix_local(self, prefix: str):
+        for cache in (self.coroutine_cache, self.cache):
+            stale_keys = [k for k in cache.keys() if k.startswith(prefix)]
+            for key in stale_keys:
+                cache.pop(key, None)
+
+        if self.persisted_cache_path:
+            self.persist_cache()
+
+    def apply_invalidations(self):
+        while self.pending_invalidations:
+            op, key = self.pending_invalidations.popleft()
+            if op == delete_op:
+                self.delete_local(key)
+            elif op == prefix_op:
+                self.invalidate_prefix_local(key)
+
     def persist_cache(self):
         with open(self.persisted_cache_path, 'wb') as f:
             pickle.dump(self.cache, f)
 
 
+def function_namespace(fn: Callable[..., Any], namespace: Optional[str] = None) -> str:
+    """Return the key prefix shared by all the cached values of `fn`.
+
+    Arguments:
+        fn (Callable): The cached function.
+        namespace (str, optional): The namespace passed to `cache_on_arguments`.
+
+    Returns:
+        str: The prefix, as produced by `cache_key_generator`.
+    """
+    parts = [f'{fn.__module__}:{fn.__name__}']  # noqa: WPS609 - direct magic attribute usage
+    if namespace is not None:
+        parts.append(namespace)
+    return ''.join(f'{part}|' for part in parts)
+
+
+def invalidate_function(cache_region: CacheRegion, fn: Callable[..., Any], namespace: Optional[str] = None):
+    """Delete all the cached values of `fn`, in this process and, if configured, in sibling processes.
+
+    Arguments:
+        cache_region (CacheRegion): The region the function is cached in.
+        fn (Callable): The cached function.
+        namespace (str, optional): The namespace passed to `cache_on_arguments`.
+    """
+    cache_region.backend.invalidate_prefix(function_namespace(fn, namespace))
+
+
 register_backend(_default_cache_backend, __name__, TTLBackend.__name__)
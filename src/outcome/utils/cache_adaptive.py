@@ -0,0 +1,137 @@
+"""Adaptive per-entry TTL for the memory cache backend.
+
+The policy observes, for each key, how long the value took to compute (the time between
+the cache miss and the following `set`), and whether the recomputed value differs from
+the previous one.
+
+Each time a key is recomputed, its TTL is multiplied by a factor between 1.5 and 2 if the
+value didn't change, the more expensive the value the larger the factor, and divided by a
+factor between 1.5 and 2 if it did change, the cheaper the value the larger the divisor.
+TTLs always stay within the configured bounds.
+"""
+
+import math
+import pickle  # noqa: S403
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from dogpile.cache.api import CachedValue
+
+# The bounds of the factor the TTLs are multiplied or divided by
+_min_factor = 1.5
+_max_factor = 2
+
+
+class _KeyStats:
+    __slots__ = ('ttl', 'digest', 'miss_at')
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.digest: Optional[int] = None
+        self.miss_at: Optional[float] = None
+
+
+def _digest(value: Any) -> Optional[int]:
+    payload = value.payload if isinstance(value, CachedValue) else value
+    try:
+        return zlib.crc32(pickle.dumps(payload))
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+
+
+class AdaptiveTTLPolicy:
+
+    def __init__(  # noqa: WPS211 - too many arguments
+        self,
+        min_ttl: float,
+        max_ttl: float,
+        initial_ttl: Optional[float] = None,
+        expensive_cost: float = 1,
+        max_keys: int = 10000,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        """Create an adaptive TTL policy.
+
+        Arguments:
+            min_ttl (float): The shortest TTL, in seconds.
+            max_ttl (float): The longest TTL, in seconds.
+            initial_ttl (float, optional): The TTL of a key seen for the first time, defaults to `min_ttl`.
+            expensive_cost (float): The compute duration, in seconds, from which a value is considered expensive.
+            max_keys (int): The number of keys to keep statistics for, the oldest keys are forgotten first.
+            timer (Callable[[], float]): The clock used to measure compute durations.
+        """
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.initial_ttl = self._clamp(min_ttl if initial_ttl is None else initial_ttl)
+        self.expensive_cost = expensive_cost
+        self.max_keys = max_keys
+        self.timer = timer
+        self._stats: Dict[Hashable, _KeyStats] = OrderedDict()
+
+    def miss(self, key: Hashable) -> None:
+        self._key_stats(key).miss_at = self.timer()
+
+    def ttl(self, key: Hashable, value: Any) -> float:
+        """Record a new value for `key`, and return the TTL to store it with.
+
+        Arguments:
+            key (Hashable): The cache key.
+            value (Any): The value being stored.
+
+        Returns:
+            float: The TTL, in seconds.
+        """
+        stats = self._key_stats(key)
+        digest = _digest(value)
+
+        # Values set without a preceding miss, or that can't be compared, keep their current TTL
+        if stats.miss_at is not None and digest is not None and stats.digest is not None:
+            cost = self.timer() - stats.miss_at
+            weight = min(1, cost / self.expensive_cost)
+
+            spread = weight * (_max_factor - _min_factor)
+            if digest == stats.digest:
+                stats.ttl = self._clamp(stats.ttl * (_min_factor + spread))
+            else:
+                stats.ttl = self._clamp(stats.ttl / (_max_factor - spread))
+
+        stats.digest = digest
+        stats.miss_at = None
+        return stats.ttl
+
+    def report(self) -> Dict[str, Any]:
+        """Describe the distribution of the TTLs currently chosen by the policy.
+
+        The histogram buckets are powers of two, keyed by their upper bound.
+
+        Returns:
+            Dict[str, Any]: The number of keys, the min, mean and max TTL, and the histogram.
+        """
+        ttls = [stats.ttl for stats in self._stats.values()]
+        histogram: Dict[float, int] = {}
+
+        for ttl in ttls:
+            bucket = 2 ** math.ceil(math.log2(ttl)) if ttl > 0 else 0
+            histogram[bucket] = histogram.get(bucket, 0) + 1
+
+        return {
+            'keys': len(ttls),
+            'min': min(ttls, default=None),
+            'mean': sum(ttls) / len(ttls) if ttls else None,
+            'max': max(ttls, default=None),
+            'histogram': dict(sorted(histogram.items())),
+        }
+
+    def _clamp(self, ttl: float) -> float:
+        return min(self.max_ttl, max(self.min_ttl, ttl))
+
+    def _key_stats(self, key: Hashable) -> _KeyStats:
+        stats = self._stats.get(key)
+        if stats is not None:
+            return stats
+        if len(self._stats) >= self.max_keys:
+            self._stats.popitem(last=False)
+        self._stats[key] = _KeyStats(self.initial_ttl)
+        return self._stats[key]
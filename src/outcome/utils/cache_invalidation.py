@@ -0,0 +1,112 @@
+"""Invalidation broadcast between processes sharing a host.
+
+Each process binds a Unix datagram socket in a shared directory. Publishing an
+invalidation sends it to every other socket in that directory, and a daemon thread
+hands the invalidations it receives to a handler.
+
+Delivery is best-effort: a sibling with a full receive buffer will miss the message,
+and keep its stale copy until the entry expires.
+
+A bus created before a fork, for instance by a gunicorn app preloaded in the master
+process, binds a new socket and starts a new listener in each child.
+"""
+
+import json
+import os
+import socket
+import threading
+import weakref
+from pathlib import Path
+from typing import Callable, Tuple, Union
+
+ValidPath = Union[str, Path]
+Invalidation = Tuple[str, str]
+
+delete_op = 'delete'
+prefix_op = 'prefix'
+
+_socket_suffix = '.sock'
+_max_message_size = 65536
+
+
+class InvalidationBus:
+
+    def __init__(self, path: ValidPath, handler: Callable[[Invalidation], None]):
+        self.directory = Path(path)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.handler = handler
+        self.closed = False
+        self._start()
+        _buses.add(self)
+
+    def publish(self, op: str, key: str) -> None:
+        message = json.dumps([op, key]).encode('utf-8')
+
+        for peer in self.directory.glob(f'*{_socket_suffix}'):
+            if peer == self.address:
+                continue
+            try:
+                self._sender.sendto(message, str(peer))
+            except (ConnectionRefusedError, FileNotFoundError):
+                # The process that owned the socket is gone
+                peer.unlink(missing_ok=True)
+            except BlockingIOError:
+                pass
+
+    def close(self) -> None:
+        if self.closed:
+            return
+
+        self.closed = True
+        # Wake the listener up so that it can exit
+        self._sender.sendto(b'', str(self.address))
+        self._thread.join()
+
+        self._receiver.close()
+        self._sender.close()
+        self.address.unlink(missing_ok=True)
+
+    def _start(self) -> None:
+        self.address = self.directory / f'{os.getpid()}-{id(self):x}{_socket_suffix}'
+
+        self._receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._receiver.bind(str(self.address))
+
+        # Publishing never blocks the caller, if a sibling can't keep up the message is dropped
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setblocking(False)
+
+        self._thread = threading.Thread(target=self._listen, daemon=True)
+        self._thread.start()
+
+    def _after_fork(self) -> None:
+        if self.closed:
+            return
+
+        # The child inherits the parent's sockets, but not its listener thread. The copies are
+        # closed in the child only, the parent keeps its socket and its address
+        self._receiver.close()
+        self._sender.close()
+        self._start()
+
+    def _listen(self) -> None:
+        while True:
+            data = self._receiver.recv(_max_message_size)
+            if self.closed:
+                break
+            try:
+                op, key = json.loads(data)
+            except ValueError:
+                continue
+            self.handler((op, key))
+
+
+_buses: 'weakref.WeakSet[InvalidationBus]' = weakref.WeakSet()
+
+
+def _restart_buses() -> None:
+    for bus in list(_buses):
+        bus._after_fork()  # noqa: WPS437 - protected attribute usage
+
+
+os.register_at_fork(after_in_child=_restart_buses)
@@ -0,0 +1,224 @@
+"""Refresh-ahead for hot cached functions.
+
+Functions registered with a `RefreshAheadScheduler` have their recently used argument sets
+recomputed shortly before they expire, on a bounded pool of background threads, so that
+callers never wait for the value to be computed.
+
+Usage:
+
+```
+region = cache.get_cache_region()
+cache.configure_cache_region(region, settings, prefix='pricing')
+scheduler = RefreshAheadScheduler(region, lead_time=30)
+
+@scheduler.register
+@region.cache_on_arguments()
+def pricing_table(currency):
+    ...
+
+scheduler.start()
+```
+
+Only the argument sets that have been read within `idle_window` are refreshed, so the
+refresh work stays proportional to the actual demand.
+
+Functions decorated with `cache.cache_async` are awaited on an event loop in the background
+thread, and the cache is updated with the completed value.
+"""
+
+import asyncio
+import inspect
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from dogpile.cache import CacheRegion
+from dogpile.cache.api import CachedValue
+
+Call = Tuple[Callable[..., Any], Tuple[Any, ...]]
+
+
+class _Usage:
+    __slots__ = ('refreshed_at', 'read_at')
+
+    def __init__(self, refreshed_at: float, read_at: float):
+        self.refreshed_at = refreshed_at
+        self.read_at = read_at
+
+
+class RefreshAheadScheduler:  # noqa: WPS214 - too many methods
+
+    def __init__(  # noqa: WPS211 - too many arguments
+        self,
+        region: CacheRegion,
+        lead_time: float,
+        expiration: Optional[float] = None,
+        idle_window: Optional[float] = None,
+        max_keys: int = 100,
+        max_workers: int = 2,
+        interval: float = 1,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        """Create a refresh-ahead scheduler.
+
+        Arguments:
+            region (CacheRegion): The region the registered functions are cached in.
+            lead_time (float): How long before expiry a value is recomputed, in seconds.
+            expiration (float, optional): The expiration of the cached values, defaults to the region's.
+            idle_window (float, optional): Argument sets not read for this long aren't refreshed, defaults to `expiration`.
+            max_keys (int): The number of argument sets tracked per function, the least recently used are dropped first.
+            max_workers (int): The maximum number of concurrent refreshes.
+            interval (float): How often the background thread looks for values to refresh, in seconds.
+            timer (Callable[[], float]): The clock.
+
+        Raises:
+            ValueError: If the region has no expiration and none is provided.
+        """
+        expiration = region.expiration_time if expiration is None else expiration
+        if not expiration or expiration < 0:
+            raise ValueError('Refresh-ahead requires an expiration')
+
+        self.region = region
+        self.expiration = expiration
+        self.lead_time = lead_time
+        self.idle_window = expiration if idle_window is None else idle_window
+        self.max_keys = max_keys
+        self._max_workers = max_workers
+        self._interval = interval
+        self.timer = timer
+
+        self._usage: Dict[Callable[..., Any], OrderedDict] = {}
+        self._key_generators: Dict[Callable[..., Any], Callable[..., str]] = {}
+        self._coroutine_functions: Set[Callable[..., Any]] = set()
+        self._in_flight: Set[Call] = set()
+
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def register(self, fn: Callable[..., Any], namespace: Optional[str] = None) -> Callable[..., Any]:
+        """Track the calls to a function decorated with `region.cache_on_arguments`.
+
+        Arguments:
+            fn (Callable): The cached function.
+            namespace (str, optional): The namespace passed to `cache_on_arguments`.
+
+        Returns:
+            Callable: The function, recording the argument sets it's called with.
+        """
+        usage: OrderedDict = OrderedDict()
+        self._usage[fn] = usage
+        # The keys of the cached values, to read their age
+        self._key_generators[fn] = self.region.function_key_generator(namespace, fn.original)
+        if asyncio.iscoroutinefunction(inspect.unwrap(fn)):
+            self._coroutine_functions.add(fn)
+
+        # The arguments are kept positional, as they are by dogpile's key generators
+        @wraps(fn)
+        def wrapped(*args):
+            self._record(fn, usage, args)
+            return fn(*args)
+
+        return wrapped
+
+    def due(self) -> List[Call]:
+        now = self.timer()
+        calls = []
+
+        with self._lock:
+            for fn, usage in self._usage.items():
+                calls.extend((fn, args) for args in self._due_args(usage, now))
+
+        return calls
+
+    def run_pending(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix='refresh-ahead')
+
+        for call in self.due():
+            if call in self._in_flight:
+                continue
+            self._in_flight.add(call)
+            self._executor.submit(self._refresh, call)
+
+    def start(self) -> None:
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name='refresh-ahead-scheduler')
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _record(self, fn: Callable[..., Any], usage: OrderedDict, args: Tuple[Any, ...]) -> None:
+        now = self.timer()
+        # A value that isn't tracked, such as one dropped while idle, may have been cached a while ago
+        refreshed_at = now if args in usage else now - self._age(fn, args)
+        with self._lock:
+            entry = usage.get(args)
+            if entry is None:
+                usage[args] = _Usage(refreshed_at, now)
+                if len(usage) > self.max_keys:
+                    usage.popitem(last=False)
+            else:
+                entry.read_at = now
+                usage.move_to_end(args)
+
+    def _age(self, fn: Callable[..., Any], args: Tuple[Any, ...]) -> float:
+        # The age of the cached value, from the creation time dogpile stores with it, 0 if it isn't cached
+        key = self._key_generators[fn](*args)
+        if self.region.key_mangler:
+            key = self.region.key_mangler(key)
+        cached_value = self.region._get_from_backend(key)
+        if not isinstance(cached_value, CachedValue):
+            return 0
+        return max(time.time() - cached_value.metadata['ct'], 0)
+
+    def _due_args(self, usage: OrderedDict, now: float) -> List[Tuple[Any, ...]]:
+        # The argument sets due for a refresh, the idle ones are dropped
+        due = []
+        for args, entry in list(usage.items()):
+            if now - entry.read_at > self.idle_window:
+                del usage[args]  # noqa: WPS420 - del usage
+            elif now - entry.refreshed_at >= self.expiration - self.lead_time:
+                due.append(args)
+        return due
+
+    def _refresh(self, call: Call) -> None:
+        fn, args = call
+        try:
+            if fn in self._coroutine_functions:
+                fn.set(asyncio.run(self._compute(fn, args)), *args)
+            else:
+                fn.refresh(*args)
+        except Exception as exc:
+            # The cached value is left as is, and the refresh is retried on the next run
+            warnings.warn(f'Refresh-ahead of {fn.__name__}{args} failed: {exc!r}', RuntimeWarning)  # noqa: WPS609
+        else:
+            with self._lock:
+                entry = self._usage[fn].get(args)
+                if entry is not None:
+                    entry.refreshed_at = self.timer()
+        finally:
+            self._in_flight.discard(call)
+
+    async def _compute(self, fn: Callable[..., Any], args: Tuple[Any, ...]) -> Any:
+        # `cache_async` creates the value's lock when it's called, so it's called within the loop.
+        # The value is only cached once it's done, so readers never await it
+        value = fn.original(*args)
+        await value
+        return value
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            self.run_pending()
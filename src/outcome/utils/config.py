@@ -1,18 +1,46 @@
 """Config helper."""
 
-import base64
+import asyncio
+import hashlib
+import marshal
 import os
+import threading
+import time
+import warnings
 from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union, cast
+from typing import (  # noqa: WPS235
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
 
 import toml
-from dotenv import load_dotenv
+from dotenv import dotenv_values
 from outcome.utils import env
+from outcome.utils.config_resolvers import ValueResolvers, resolvers
 
 ValidPath = Union[str, Path]
+ValidPaths = Union[ValidPath, Sequence[ValidPath]]
 ValidConfigType = Union[str, int, float, bool]
 ConfigDict = Dict[str, ValidConfigType]
+ChangeListener = Callable[[Set[str]], None]
+# The items of a TOML table, or of an array of tables by index
+_TableItems = Iterator[Tuple[str, Any]]
 
 NO_DEFAULT = object()
 
@@ -26,14 +54,66 @@ class ConfigBackend(ABC):
     def __contains__(self, key: str) -> bool:  # pragma: no cover
         ...
 
+    def items(self) -> Iterable[Tuple[str, ValidConfigType]]:
+        # Used to export the config, backends that can't list their values can't be exported
+        raise NotImplementedError(f'{type(self).__name__} does not support listing its values')
+
 
 base_64_protocol = 'base64://'  # noqa: WPS114
 
 
-class EnvBackend(ConfigBackend):
-    def __init__(self):
-        dotenv_file = Path.cwd() / '.env'
-        load_dotenv(dotenv_path=dotenv_file, verbose=env.is_dev())
+# The `.env` files loaded by the process, with their modification time when they were loaded
+_loaded_dotenv_files: Dict[Path, Optional[int]] = {}
+# The variables set from each `.env` file, the only ones a reload of the file may change
+_dotenv_variables: Dict[Path, Dict[str, str]] = {}
+_dotenv_lock = threading.Lock()
+
+
+def load_dotenv_once(path: Path) -> None:
+    """Load a `.env` file into the environment, unless it was already loaded and hasn't changed since.
+
+    Arguments:
+        path (Path): The `.env` file.
+    """
+    try:
+        mtime: Optional[int] = path.stat().st_mtime_ns
+    except OSError:
+        mtime = None
+
+    with _dotenv_lock:
+        if path in _loaded_dotenv_files and _loaded_dotenv_files[path] == mtime:
+            return
+        applied = _dotenv_variables.setdefault(path, {})
+        for key, value in dotenv_values(path, verbose=env.is_dev()).items():
+            # The variables set outside of the file always win, a reload only updates the ones set from the file
+            if value is None or (key in os.environ and key not in applied):
+                continue
+            os.environ[key] = value
+            applied[key] = value
+        _loaded_dotenv_files[path] = mtime
+
+
+class EnvBackend(ConfigBackend):  # noqa: WPS214 - too many methods
+    """Reads config values from environment variables.
+
+    The `.env` file of the working directory is loaded into the environment when the backend is created,
+    so it's visible to `outcome.utils.env`. The file is only parsed again if it has changed.
+    """
+
+    resolvers: ValueResolvers
+    dotenv_path: Path
+
+    def __init__(self, value_resolvers: Optional[ValueResolvers] = None):
+        self.dotenv_path = Path.cwd() / '.env'
+        self.resolvers = value_resolvers or resolvers
+        self.load_dotenv()
+
+    def load_dotenv(self) -> None:
+        load_dotenv_once(self.dotenv_path)
+
+    def raw(self, key: str) -> Optional[str]:
+        # The undecoded value, used to detect changes to the environment
+        return os.environ.get(key)
 
     def get(self, key: str) -> ValidConfigType:
         value = cast(str, os.environ[key])
@@ -45,14 +125,37 @@ class EnvBackend(ConfigBackend):
         # This can be useful to store RSA keys as env variable since they need to be encoded as base64 strings.
         # This can also be used to specify a path to sensitive data stored in a remote database, and the get function
         # will be able to fetch the corresponding data depending on the specified protocol.
-        if value.startswith(base_64_protocol):
-            return base64.b64decode(value[len(base_64_protocol) :]).decode('utf-8')
-
-        return value
+        #
+        # The protocols are handled by the resolvers registered in `outcome.utils.config_resolvers`.
+        return self.resolvers.resolve(value)
 
     def __contains__(self, key: str) -> bool:
         return key in os.environ
 
+    def items(self) -> Iterable[Tuple[str, ValidConfigType]]:
+        return [(key, self.resolvers.resolve(value)) for key, value in os.environ.items()]
+
+    def select(self, keys: Collection[str], prefixes: Tuple[str, ...] = ()) -> List[Tuple[str, ValidConfigType]]:
+        """Return the resolved values of some environment variables.
+
+        Only the selected variables are resolved.
+
+        Arguments:
+            keys (Collection[str]): The variables.
+            prefixes (Tuple[str, ...]): The variables starting with one of these prefixes are also selected.
+
+        Returns:
+            List[Tuple[str, ValidConfigType]]: The selected variables that are set, with their values.
+        """
+        return [
+            (key, self.resolvers.resolve(value))
+            for key, value in os.environ.items()
+            if key in keys or key.startswith(prefixes)
+        ]
+
+    async def prefetch(self) -> None:
+        await self.resolvers.resolve_many(value for value in os.environ.values() if self.resolvers.handles(value))
+
 
 class DefaultBackend(ConfigBackend):
 
@@ -67,17 +170,184 @@ class DefaultBackend(ConfigBackend):
     def __contains__(self, key: str) -> bool:
         return key in self.defaults
 
+    def items(self) -> Iterable[Tuple[str, ValidConfigType]]:
+        return self.defaults.items()
+
+
+_cache_format = 1
+# The length of the hex digest of the source file recorded in the cache
+_digest_length = 16
+
+
+def cache_path_for(source: ValidPath, kind: Optional[str] = None) -> Path:
+    source = Path(source)
+    suffix = f'.{kind}' if kind else ''
+    return source.with_name(f'.{source.name}{suffix}.cache')
+
+
+def cached_load(source: ValidPath, build: Callable[[], Any], salt: str = '', kind: Optional[str] = None) -> Any:
+    """Return the result of `build`, cached in a marshal file next to `source`.
+
+    The cache file is a dotfile named after `source` and `kind`, such as `.config.toml.cache`, or
+    `.config.toml.layer.cache`, see `cache_path_for`.
+
+    The cache is used when the size, modification time and content hash of `source`, and the
+    `salt`, match the ones recorded in the cache. Otherwise the result is rebuilt and the cache
+    is rewritten. Results that can't be marshalled, and cache files that can't be written, are
+    silently not cached.
+
+    Arguments:
+        source (ValidPath): The file the result is built from.
+        build (Callable[[], Any]): Builds the result from the file.
+        salt (str): Any other input to `build`, such as its options.
+        kind (str, optional): The kind of result, results of different kinds built from the same file are cached separately.
+
+    Returns:
+        Any: The result of `build`.
+    """
+    source = Path(source)
+    cache_file = cache_path_for(source, kind)
+
+    stat = source.stat()
+    digest = hashlib.sha256(source.read_bytes()).hexdigest()[:_digest_length]
+    fingerprint = (_cache_format, stat.st_mtime_ns, stat.st_size, digest, salt)
+
+    try:
+        with open(cache_file, 'rb') as f:
+            cached_fingerprint, cached_result = marshal.load(f)  # noqa: S302 - marshal usage
+        if cached_fingerprint == fingerprint:
+            return cached_result
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    result = build()
+
+    try:
+        data = marshal.dumps((fingerprint, result))
+        # Write to a temporary file first, so that other processes never read a partial cache
+        tmp_file = cache_file.with_name(f'{cache_file.name}.{os.getpid()}')
+        tmp_file.write_bytes(data)
+        os.replace(tmp_file, cache_file)
+    except (OSError, ValueError):
+        pass
+
+    return result
+
+
+def merge_documents(base: Dict[str, Any], overlay: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge two TOML documents, the tables are merged recursively, other values are replaced.
+
+    Arguments:
+        base (Dict[str, Any]): The base document.
+        overlay (Dict[str, Any]): The document overriding the base document.
+
+    Returns:
+        Dict[str, Any]: The merged document, the input documents aren't modified.
+    """
+    merged = dict(base)
+    for key, value in overlay.items():
+        current = merged.get(key)
+        if isinstance(current, dict) and isinstance(value, dict):
+            merged[key] = merge_documents(current, value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def fold_env_sections(document: Dict[str, Any], environment: str) -> Dict[str, Any]:
+    """Resolve the environment sections of a TOML document.
+
+    In every table, the sub-tables named after an environment, such as `[app.production]`, are
+    removed, and the one named after `environment`, if any, is merged into its parent table.
+
+    Arguments:
+        document (Dict[str, Any]): The TOML document.
+        environment (str): The current environment.
+
+    Returns:
+        Dict[str, Any]: The document without environment sections.
+    """
+    names = {*env.environments, environment}
+    folded = {}
+    section = None
+
+    for key, value in document.items():
+        if not isinstance(value, dict):
+            folded[key] = value
+        elif key == environment:
+            section = value
+        elif key not in names:
+            folded[key] = fold_env_sections(value, environment)
+
+    if section is None:
+        return folded
+    return merge_documents(folded, fold_env_sections(section, environment))
+
+
+class TomlBackend(ConfigBackend):  # noqa: WPS214, WPS230 - too many methods and attributes
+    """Reads config values from a TOML file.
+
+    With `cache=True`, the flattened config is cached in a `.<name>.cache` file next to the
+    TOML file, and reused by later processes as long as the TOML file is unchanged. The cache
+    files are build artifacts, add `.*.cache` to the `.gitignore` of the project.
+
+    With `watch=True`, a background thread polls the file every `poll_interval` seconds, and
+    reloads it when it changes. The new config is built off to the side and swapped in as a
+    whole, so readers never see a partial config and never need a lock. The callbacks registered
+    with `on_change` are then called with the set of keys that changed.
+
+    With `env_sections=True`, the tables named after an environment are folded into their
+    parent table when the file is loaded, see `fold_env_sections`. For instance, in production:
 
-class TomlBackend(ConfigBackend):
+    ```toml
+    [app]
+    port = 80
+
+    [app.production]
+    port = 443
+    ```
+
+    Will be transformed into
+
+    ```py
+    {
+        'APP_PORT': 443
+    }
+    ```
+
+    The environment defaults to `env.env()`, read each time the file is loaded.
+    """
 
     path: Optional[ValidPath]
     config: Optional[ConfigDict]
     aliases: Optional[Dict[str, str]]
+    cache: bool
+    env_sections: bool
+    environment: Optional[str]
+    listeners: List[ChangeListener]
 
-    def __init__(self, path: Optional[ValidPath] = None, aliases: Optional[Dict[str, str]] = None):
+    def __init__(  # noqa: WPS211 - too many arguments
+        self,
+        path: Optional[ValidPath] = None,
+        aliases: Optional[Dict[str, str]] = None,
+        cache: bool = False,
+        watch: bool = False,
+        poll_interval: float = 1,
+        env_sections: bool = False,
+        environment: Optional[str] = None,
+    ):
         self.path = path
         self.aliases = aliases
+        self.cache = cache
+        self.env_sections = env_sections
+        self.environment = environment
         self.config = None
+        self.listeners = []
+
+        self._stopped = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        if watch:
+            self.watch(poll_interval)
 
     def get(self, key: str) -> ValidConfigType:
         if not self.config:
@@ -89,38 +359,396 @@ class TomlBackend(ConfigBackend):
             self.load_config()
         return key in self.config
 
+    def items(self) -> Iterable[Tuple[str, ValidConfigType]]:
+        if not self.config:
+            self.load_config()
+        return self.config.items()
+
     def load_config(self):
-        self.config = self.get_config(self.path, self.aliases)
+        self.config = self.build_config()
+
+    def current_environment(self) -> str:
+        # Not read when the backend is created, since `.env` may not be loaded yet
+        return self.environment or env.env()
+
+    def build_config(self) -> ConfigDict:
+        environment = self.current_environment() if self.env_sections else None
+        if self.cache:
+            salt = repr((sorted((self.aliases or {}).items()), environment))
+            return cached_load(self.path, lambda: self.get_config(self.path, self.aliases, environment), salt)
+        return self.get_config(self.path, self.aliases, environment)
+
+    def on_change(self, listener: ChangeListener):
+        self.listeners.append(listener)
+
+    def reload(self) -> Set[str]:
+        """Reload the config file, and notify the listeners of the keys that changed.
+
+        If the file can't be parsed, for instance because it's being written, the current
+        config is kept.
+
+        Returns:
+            Set[str]: The keys that were added, removed or modified.
+        """
+        try:
+            new_config = self.build_config()
+        except (OSError, toml.TomlDecodeError) as exc:
+            warnings.warn(f'Could not reload {self.path}: {exc}', RuntimeWarning)
+            return set()
+
+        old_config = self.config or {}
+        self.config = new_config
+
+        missing = object()
+        changed = {k for k in old_config.keys() | new_config.keys() if old_config.get(k, missing) != new_config.get(k, missing)}
+
+        if changed:
+            for listener in self.listeners:
+                listener(changed)
+        return changed
+
+    def watch(self, poll_interval: float = 1):
+        self._stopped.clear()
+        # The signature is read now, so changes made once `watch` returns are always seen
+        poll_args = (poll_interval, self._file_signature())
+        self._watcher = threading.Thread(target=self._poll, args=poll_args, daemon=True, name=f'toml-watcher-{self.path}')
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stopped.set()
+        if self._watcher:
+            self._watcher.join()
+            self._watcher = None
 
     @classmethod
-    def get_config(cls, path: ValidPath, aliases: Dict[str, str] = None) -> Dict[str, ValidConfigType]:
+    def get_config(
+        cls, path: ValidPath, aliases: Dict[str, str] = None, environment: Optional[str] = None,
+    ) -> Dict[str, ValidConfigType]:
         config = toml.load(path)
-        config_flattened = cls.flatten_keys(config)
+        if environment is not None:
+            config = fold_env_sections(config, environment)
+        return cls.flatten_keys(config, aliases=aliases)
+
+    @classmethod
+    def flatten_keys(cls, value: Any, key: Optional[str] = None, aliases: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Flatten nested tables into a single dict, joining the keys with `_` and uppercasing them.
+
+        Arrays of tables are kept as a whole under their own key, and each of their tables is
+        also flattened under its index, e.g. `SERVERS_0_HOST`.
 
-        if aliases:
-            for original, alias in aliases.items():
-                config_flattened[alias.upper()] = config_flattened.pop(original.upper())
+        Arguments:
+            value (Any): The document to flatten.
+            key (str, optional): The prefix of all the keys.
+            aliases (Dict[str, str], optional): Keys to rename, from original to alias, the original keys must be in the document.
 
-        return config_flattened
+        Raises:
+            Exception: If the value isn't a dict and there's no key.
 
-    @classmethod
-    def flatten_keys(cls, value: Any, key: Optional[str] = None) -> Dict[str, Any]:
+        Returns:
+            Dict[str, Any]: The flattened document.
+        """
         if not isinstance(value, dict):
             if not key:
                 raise Exception('Value cannot be a non-dict without a key')
 
             return {key.upper(): value}
 
-        flattened = {}
+        flattened = _flatten_document(value, f'{key}_'.upper() if key else '')
 
-        for k, v in value.items():
-            prefix = (f'{key}_' if key else '').upper()
-            flattened.update({f'{prefix}{skey}': sval for skey, sval in cls.flatten_keys(v, k).items()})
+        # The aliases are applied once the document is flattened, so an alias always wins over a key of the same name
+        for original, alias in (aliases or {}).items():
+            flattened[alias.upper()] = flattened.pop(original.upper())
 
         return flattened
 
+    def _poll(self, poll_interval: float, signature: Any):
+        while not self._stopped.wait(poll_interval):
+            current = self._file_signature()
+            if current != signature:
+                signature = current
+                self.reload()
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+
+def _nested_items(value: Any) -> Optional[_TableItems]:
+    # None for the values that aren't a table or an array of tables
+    if isinstance(value, dict):
+        return iter(value.items())
+    if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+        return ((str(i), item) for i, item in enumerate(value))
+    return None
+
+
+def _flatten_document(document: Dict[str, Any], root_prefix: str) -> Dict[str, Any]:
+    # The document is walked iteratively, with a stack of prefixes, so each key is built once
+    flattened = {}
 
-class Config:  # pragma: only-covered-in-unit-tests
+    stack = [(root_prefix, iter(document.items()))]
+    while stack:
+        prefix, items = stack[-1]
+
+        for k, v in items:
+            name = f'{prefix}{k}'.upper()
+            nested = _nested_items(v)
+
+            # Tables are only kept flattened, arrays of tables are kept as a whole too
+            if not isinstance(v, dict):
+                flattened[name] = v
+
+            if nested is not None:
+                # Descend into the table, the remaining items of this one are resumed after it
+                stack.append((f'{name}_', nested))
+                break
+        else:
+            stack.pop()
+
+    return flattened
+
+
+_base_layer = 'base'
+_local_layer = 'local'
+
+
+class LayeredTomlBackend(TomlBackend):
+    """Reads config values from several TOML files, each overriding the previous ones.
+
+    The files are either given as a list, or as a directory containing any of `base.toml`,
+    `<environment>.toml` and `local.toml`, where the environment defaults to `env.env()`.
+
+    The files are parsed concurrently, and merged once into a single flattened config, so the
+    lookups cost the same whatever the number of files. With `cache=True`, each parsed file is
+    cached next to it, in a `.<name>.layer.cache` file, see `cached_load`.
+
+    With `env_sections=True`, the environment sections of each file are folded before the files
+    are merged, so a later file always overrides an earlier one.
+    """
+
+    paths: ValidPaths
+
+    def __init__(  # noqa: WPS211 - too many arguments
+        self,
+        paths: ValidPaths,
+        aliases: Optional[Dict[str, str]] = None,
+        cache: bool = False,
+        watch: bool = False,
+        poll_interval: float = 1,
+        env_sections: bool = False,
+        environment: Optional[str] = None,
+    ):
+        self.paths = paths
+        super().__init__(
+            path=paths,
+            aliases=aliases,
+            cache=cache,
+            watch=watch,
+            poll_interval=poll_interval,
+            env_sections=env_sections,
+            environment=environment,
+        )
+
+    def layers(self) -> List[Path]:
+        if isinstance(self.paths, (list, tuple)):
+            return [Path(path) for path in self.paths]
+
+        directory = Path(self.paths)
+        names = (_base_layer, self.current_environment(), _local_layer)
+        # The directory's layers are looked up on each load, so new layers are picked up on reload
+        return [directory / f'{name}.toml' for name in names if (directory / f'{name}.toml').is_file()]
+
+    def load_layer(self, path: Path, environment: str) -> Dict[str, Any]:
+        document = cached_load(path, lambda: toml.load(path), kind='layer') if self.cache else toml.load(path)
+        if self.env_sections:
+            return fold_env_sections(document, environment)
+        return document
+
+    def build_config(self) -> ConfigDict:
+        layers = self.layers()
+        environment = self.current_environment()
+        if len(layers) > 1:
+            with ThreadPoolExecutor(max_workers=len(layers), thread_name_prefix='toml-layer') as executor:
+                documents = list(executor.map(lambda layer: self.load_layer(layer, environment), layers))
+        else:
+            documents = [self.load_layer(layer, environment) for layer in layers]
+
+        merged: Dict[str, Any] = {}
+        for document in documents:
+            merged = merge_documents(merged, document)
+        return self.flatten_keys(merged, aliases=self.aliases)
+
+    def _file_signature(self):
+        signatures = []
+        for path in self.layers():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                signatures.append(None)
+            else:
+                signatures.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signatures)
+
+
+_snapshot_format = 1
+
+
+def _marshallable(value: Any) -> bool:
+    try:
+        marshal.dumps(value)
+    except ValueError:
+        return False
+    return True
+
+
+class ConfigSnapshot(ConfigBackend, Mapping[str, ValidConfigType]):  # noqa: WPS214 - too many methods
+    """An immutable view of the merged config values, created with `Config.snapshot`.
+
+    The snapshot can be used as a mapping, or as a config backend. It's serialized with marshal,
+    so it can be passed to worker processes cheaply, instead of having them re-read the
+    environment and the config files.
+
+    ```
+    snapshot = config.snapshot()
+    process = multiprocessing.Process(target=worker, args=(snapshot,))
+    ```
+    """
+
+    def __init__(self, values: Mapping[str, ValidConfigType]):
+        self._values = dict(values)
+
+    def get(self, key: str, default: Optional[ValidConfigType] = None) -> Optional[ValidConfigType]:
+        # Behaves like `Mapping.get`, the missing keys raise a KeyError with `snapshot[key]`
+        return self._values.get(key, default)
+
+    def __getitem__(self, key: str) -> ValidConfigType:
+        return self._values[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._values
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def items(self):
+        return self._values.items()
+
+    def __repr__(self) -> str:
+        return f'ConfigSnapshot({len(self._values)} keys)'
+
+    def dumps(self) -> bytes:
+        """Serialize the snapshot with marshal.
+
+        Raises:
+            ValueError: If some values can't be marshalled, such as TOML dates.
+
+        Returns:
+            bytes: The serialized snapshot.
+        """
+        try:
+            return marshal.dumps((_snapshot_format, self._values))
+        except ValueError:
+            unsupported = ', '.join(sorted(key for key, value in self._values.items() if not _marshallable(value)))
+            raise ValueError(
+                f'The config snapshot can only serialize strings, numbers, booleans, and lists and dicts of them: {unsupported}',
+            ) from None
+
+    @classmethod
+    def loads(cls, data: bytes) -> 'ConfigSnapshot':
+        """Load a snapshot serialized with `dumps`.
+
+        Arguments:
+            data (bytes): The serialized snapshot.
+
+        Raises:
+            ValueError: If the data isn't a snapshot serialized by this version.
+
+        Returns:
+            ConfigSnapshot: The snapshot.
+        """
+        try:
+            snapshot_format, values = marshal.loads(data)  # noqa: S302 - marshal usage
+        except (EOFError, ValueError, TypeError) as exc:
+            raise ValueError('Invalid config snapshot') from exc
+        if snapshot_format != _snapshot_format:
+            raise ValueError(f'Unsupported config snapshot format: {snapshot_format}')
+        return cls(values)
+
+    def __reduce__(self):  # noqa: WPS603
+        return (self.loads, (self.dumps(),))
+
+
+class ResolvedValue(NamedTuple):
+    value: ValidConfigType
+    backend: ConfigBackend
+    # The raw value of the environment variable when the key was resolved, None if it wasn't set
+    env_value: Optional[str]
+
+
+class _BackendStats:
+    __slots__ = ('reads', 'lookups', 'lookup_time')
+
+    def __init__(self):
+        self.reads = 0
+        self.lookups = 0
+        self.lookup_time = 0.0
+
+
+_fallback_backend = 'fallback'
+_missing_backend = 'missing'
+
+
+class ConfigTrace:
+    """Counts the reads of a traced `Config`, by key and by backend, and times the backend lookups.
+
+    Reads served by the resolved-value index are counted for the backend that provided the value,
+    but only the reads that went through the backends are timed.
+    """
+
+    def __init__(self, timer: Callable[[], float] = time.perf_counter):
+        self.timer = timer
+        self.reads: Counter = Counter()
+        self.backends: Dict[str, _BackendStats] = {}
+
+    def record(self, key: str, backend: str, lookup_time: Optional[float]) -> None:
+        self.reads[key] += 1
+        if backend not in self.backends:
+            self.backends[backend] = _BackendStats()
+        stats = self.backends[backend]
+        stats.reads += 1
+        if lookup_time is not None:
+            stats.lookups += 1
+            stats.lookup_time += lookup_time
+
+    def report(self, defined_keys: Iterable[str], top: int = 10) -> Dict[str, Any]:
+        """Summarize the reads.
+
+        Arguments:
+            defined_keys (Iterable[str]): The keys defined in the config, to find the unused ones.
+            top (int): The number of hot keys.
+
+        Returns:
+            Dict[str, Any]: The number of reads, the most read keys, the reads and lookup time
+                per backend, and the defined keys that were never read.
+        """
+        return {
+            'reads': sum(self.reads.values()),
+            'hot_keys': self.reads.most_common(top),
+            'backends': {
+                name: {'reads': stats.reads, 'lookups': stats.lookups, 'lookup_time': stats.lookup_time}
+                for name, stats in sorted(self.backends.items())
+            },
+            'unused_keys': sorted(set(defined_keys) - self.reads.keys()),
+        }
+
+
+class Config:  # pragma: only-covered-in-unit-tests  # noqa: WPS214, WPS230 - too many methods and attributes
     """This class helps with retrieving config values from a project environment.
 
     You can provide a path to a TOML file, typically the pyproject.toml, or just
@@ -149,16 +777,27 @@ class Config:  # pragma: only-covered-in-unit-tests
     If needed you can modify Config backends to change the order of priority, or to add your own backends.
     You can use add_backend method to add your own backend at the desired priority.
     If you wish to add your own backend, it needs to inherit from ConfigBackend abstract class.
+
+    Resolved values are memoized per key, along with the backend that provided them. A memoized
+    value is used as long as the key's environment variable is unchanged. If you modify the backends
+    or their values in any other way than through add_backend, call invalidate.
     """
 
     backends: List[ConfigBackend]
     default_backend: DefaultBackend
+    env_backend: EnvBackend
+    resolved: Dict[str, ResolvedValue]
+    listeners: List[ChangeListener]
+    tracer: Optional[ConfigTrace]
 
-    def __init__(
+    def __init__(  # noqa: WPS211 - too many arguments
         self,
-        path: Optional[ValidPath] = None,
+        path: Optional[ValidPaths] = None,
         aliases: Optional[Dict[str, str]] = None,
         defaults: Optional[Dict[str, ValidConfigType]] = None,
+        cache: bool = False,
+        watch: bool = False,
+        env_sections: bool = False,
     ) -> None:
         """Initialize the class with an optional config file and set of aliases.
 
@@ -174,32 +813,227 @@ class Config:  # pragma: only-covered-in-unit-tests
 
         The defaults dict is the final fallback.
 
+        The path can also be a directory or a list of files, to layer several config files,
+        see LayeredTomlBackend.
+
         Arguments:
-            path (ValidPath, optional): The path to the config file.
+            path (ValidPaths, optional): The path to the config file, or the config files.
             aliases (Dict[str, str], optional): The aliasing dict.
             defaults (Dict[str, ValidConfigType], optional): A dict of hardcoded values
+            cache (bool): Cache the parsed config file next to it, see TomlBackend.
+            watch (bool): Reload the config file when it changes, see TomlBackend.
+            env_sections (bool): Fold the config file's environment sections, see TomlBackend.
         """
-        self.backends = [EnvBackend()]
+        self.listeners = []
+        self.resolved = {}
+        self.tracer = None
+        self.env_backend = EnvBackend()
+        self.backends = [self.env_backend]
         if path:
-            self.backends.append(TomlBackend(path=path, aliases=aliases))
+            options = {'aliases': aliases, 'cache': cache, 'watch': watch, 'env_sections': env_sections}
+            if not isinstance(path, (list, tuple)) and not Path(path).is_dir():
+                toml_backend = TomlBackend(path=path, **options)
+            else:
+                toml_backend = LayeredTomlBackend(paths=path, **options)
+            toml_backend.on_change(self._backend_changed)
+            self.backends.append(toml_backend)
 
         self.default_backend = DefaultBackend(defaults or {})
 
     def get(self, key: str, default: Optional[ValidConfigType] = NO_DEFAULT) -> ValidConfigType:
+        resolved = self.resolved.get(key)
+        if resolved is not None and resolved.env_value == self.env_backend.raw(key):
+            return resolved.value
+
+        return self._resolve(key, default)
+
+    def get_many(self, keys: Iterable[str], default: Optional[ValidConfigType] = NO_DEFAULT) -> Dict[str, ValidConfigType]:
+        """Get several values at once.
+
+        Arguments:
+            keys (Iterable[str]): The keys.
+            default (ValidConfigType, optional): The value of the missing keys.
+
+        Raises:
+            KeyError: With all the missing keys, if some are missing and there's no default.
+
+        Returns:
+            Dict[str, ValidConfigType]: The values, by key.
+        """
+        values = {}
+        missing = []
+
+        for key in keys:
+            try:
+                values[key] = self.get(key)
+            except KeyError:
+                if default is NO_DEFAULT:
+                    missing.append(key)
+                else:
+                    values[key] = default
+
+        if missing:
+            raise KeyError(', '.join(missing))
+        return values
+
+    def snapshot(self, env_keys: Iterable[str] = (), env_prefixes: Iterable[str] = ()) -> ConfigSnapshot:
+        """Merge the values of all the backends, in priority order, into an immutable snapshot.
+
+        The environment only overrides the keys defined by the other backends, and the keys
+        given in `env_keys` or starting with one of `env_prefixes`, so unrelated variables,
+        such as credentials of other tools, aren't copied into the snapshot. The backends that
+        can't list their values raise a NotImplementedError.
+
+        Arguments:
+            env_keys (Iterable[str]): Environment variables to include, even if no other backend defines them.
+            env_prefixes (Iterable[str]): Prefixes of environment variables to include.
+
+        Returns:
+            ConfigSnapshot: The snapshot.
+        """
+        sources = (self.default_backend, *reversed(self.backends))
+        listed = {backend: list(backend.items()) for backend in sources if not isinstance(backend, EnvBackend)}
+        keys = {key for items in listed.values() for key, _ in items}.union(env_keys)
+        prefixes = tuple(env_prefixes)
+
+        values: Dict[str, ValidConfigType] = {}
+        # Lowest priority first, so higher priority backends overwrite their values
+        for backend in sources:
+            if isinstance(backend, EnvBackend):
+                values.update(backend.select(keys, prefixes))
+            else:
+                values.update(listed[backend])
+        return ConfigSnapshot(values)
+
+    def start_tracing(self, timer: Callable[[], float] = time.perf_counter) -> ConfigTrace:
+        """Count and time the reads until `stop_tracing` is called.
+
+        The tracing wraps `get` on this instance only, so untraced configs pay nothing for it.
+
+        Arguments:
+            timer (Callable[[], float]): The clock used to time the lookups.
+
+        Returns:
+            ConfigTrace: The trace being recorded.
+        """
+        self.tracer = ConfigTrace(timer)
+        self.get = self._traced_get  # type: ignore
+        return self.tracer
+
+    def stop_tracing(self) -> Optional[ConfigTrace]:
+        tracer = self.tracer
+        self.__dict__.pop('get', None)  # noqa: WPS609
+        self.tracer = None
+        return tracer  # noqa: R504
+
+    def defined_keys(self) -> Set[str]:
+        # The keys defined by the config files, the defaults and any custom backend, but not the environment
+        keys = set()
+        for backend in (*self.backends, self.default_backend):
+            if backend is self.env_backend:
+                continue
+            try:
+                keys.update(key for key, _ in backend.items())
+            except NotImplementedError:
+                # The backends that can't list their values don't define any known key
+                pass
+        return keys
+
+    def trace_report(self, top: int = 10) -> Dict[str, Any]:
+        """Summarize the reads traced since `start_tracing`, see `ConfigTrace.report`.
+
+        Arguments:
+            top (int): The number of hot keys.
 
-        for backend in self.backends:
-            if key in backend:
-                return backend.get(key)
+        Raises:
+            RuntimeError: If the config isn't being traced.
+
+        Returns:
+            Dict[str, Any]: The report.
+        """
+        if self.tracer is None:
+            raise RuntimeError('The config is not being traced, call start_tracing first')
+        return self.tracer.report(self.defined_keys(), top)
+
+    def invalidate(self):
+        self.resolved.clear()
+
+    def prefetch(self):
+        """Resolve all the environment values that use a registered resolver, concurrently.
+
+        Call it at startup, so that the first reads of these values don't wait for their resolvers.
+        """
+        asyncio.run(self.aprefetch())
+
+    async def aprefetch(self):
+        await self.env_backend.prefetch()
+
+    def on_change(self, listener: ChangeListener):
+        """Register a callback, called with the set of keys changed when a backend reloads.
+
+        Arguments:
+            listener (ChangeListener): The callback.
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: ChangeListener):
+        """Unregister a callback registered with `on_change`, if it is registered.
+
+        Arguments:
+            listener (ChangeListener): The callback.
+        """
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def add_backend(self, backend: ConfigBackend, priority: int):
+        self.backends.insert(priority, backend)
+        if isinstance(backend, TomlBackend):
+            backend.on_change(self._backend_changed)
+        self.invalidate()
+
+    def _resolve(self, key: str, default: Optional[ValidConfigType] = NO_DEFAULT) -> ValidConfigType:
+        env_value = self.env_backend.raw(key)
+        backend = next((candidate for candidate in self.backends if key in candidate), self.default_backend)
 
         try:
-            return self.default_backend.get(key)
+            value = backend.get(key)
         except KeyError as exc:
-            if default is not NO_DEFAULT:
+            if backend is self.default_backend and default is not NO_DEFAULT:
                 return default
             raise exc
 
-    def add_backend(self, backend: ConfigBackend, priority: int):
-        self.backends.insert(priority, backend)
+        # Values from resolvers with a TTL are cached by the resolvers, and mustn't outlive it here
+        if backend is not self.env_backend or not self.env_backend.resolvers.expires(env_value):
+            self.resolved[key] = ResolvedValue(value, backend, env_value)
+        return value
+
+    def _traced_get(self, key: str, default: Optional[ValidConfigType] = NO_DEFAULT) -> ValidConfigType:
+        tracer = cast(ConfigTrace, self.tracer)
+        resolved = self.resolved.get(key)
+        memoized = resolved is not None and resolved.env_value == self.env_backend.raw(key)
+
+        start = tracer.timer()
+        try:
+            # Goes through the class's `get`, so subclasses' overrides are traced too
+            value = type(self).get(self, key, default)  # noqa: WPS609
+        except KeyError:
+            tracer.record(key, _missing_backend, None if memoized else tracer.timer() - start)
+            raise
+        lookup_time = None if memoized else tracer.timer() - start
+
+        resolved = self.resolved.get(key)
+        backend = type(resolved.backend).__name__ if resolved else _fallback_backend  # noqa: WPS609
+        tracer.record(key, backend, lookup_time)
+        return value  # noqa: R504
+
+    def _backend_changed(self, keys: Set[str]):
+        for key in keys:
+            self.resolved.pop(key, None)
+        for listener in self.listeners:
+            listener(keys)
+
+
+_app_name = 'APP_NAME'
 
 
 class AppConfig(Config):
@@ -213,8 +1047,14 @@ class AppConfig(Config):
 
     def get(self, key: str, default: Optional[ValidConfigType] = NO_DEFAULT) -> ValidConfigType:
         key_value = super().get(key, default)
-        if key == 'APP_NAME':
+        if key == _app_name:
             if key_value is default:
                 return default
             return key_value.split('-')[0]
         return key_value
+
+    def snapshot(self, env_keys: Iterable[str] = (), env_prefixes: Iterable[str] = ()) -> ConfigSnapshot:
+        snapshot = super().snapshot((_app_name, *env_keys), env_prefixes)
+        if _app_name not in snapshot:
+            return snapshot
+        return ConfigSnapshot({**snapshot, _app_name: snapshot[_app_name].split('-')[0]})
@@ -0,0 +1,190 @@
+"""Resolvers for config values that reference data stored elsewhere.
+
+A config value of the form `<scheme>://<reference>`, where `<scheme>` has a registered resolver,
+is replaced by the result of calling the resolver with `<reference>`. Resolvers can be plain
+functions, or coroutine functions for remote stores.
+
+Resolved values are cached for the TTL given when registering the resolver, or forever when
+the TTL is None, as is the case for pure decodings like `base64://`.
+
+Usage:
+
+```
+async def fetch_secret(name: str) -> str:
+    ...
+
+resolvers.register('secret', fetch_secret, ttl=300)
+
+config = Config()
+config.prefetch()  # Resolves all the `secret://` values concurrently
+config.get('DB_PASSWORD')
+```
+"""
+
+import asyncio
+import base64
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, NamedTuple, Optional, Tuple, Union  # noqa: WPS235
+
+ResolverResult = Union[str, Awaitable[str]]
+Resolver = Callable[[str], ResolverResult]
+_CacheEntry = Tuple[str, Optional[float]]
+
+_separator = '://'
+
+
+class _Registration(NamedTuple):
+    resolver: Resolver
+    ttl: Optional[float]
+
+
+def base64_resolver(reference: str) -> str:
+    return base64.b64decode(reference).decode('utf-8')
+
+
+def file_resolver(reference: str) -> str:
+    # Reads the value from a local file, such as a mounted secret, without the trailing newline
+    return Path(reference).read_text().rstrip('\n')
+
+
+def _run(coroutine: Awaitable[Any]) -> Any:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    # We're called synchronously from a running loop, which can't be re-entered
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+def _schedule(loop: asyncio.AbstractEventLoop, registration: _Registration, reference: str) -> Awaitable[str]:
+    if asyncio.iscoroutinefunction(registration.resolver):
+        return registration.resolver(reference)
+    return loop.run_in_executor(None, registration.resolver, reference)
+
+
+class ValueResolvers:  # noqa: WPS214
+    def __init__(self, timer: Callable[[], float] = time.monotonic):
+        self.registrations: Dict[str, _Registration] = {}
+        self.cache: Dict[str, _CacheEntry] = {}
+        self.timer = timer
+
+    def register(self, scheme: str, resolver: Resolver, ttl: Optional[float] = None) -> None:
+        """Register a resolver for `<scheme>://` values.
+
+        Arguments:
+            scheme (str): The scheme, without `://`.
+            resolver (Resolver): A function or coroutine function, called with the part after `://`.
+            ttl (float, optional): How long resolved values are cached, in seconds, forever if None.
+        """
+        self.registrations[scheme] = _Registration(resolver, ttl)
+        self.cache.clear()
+
+    def unregister(self, scheme: str) -> None:
+        self.registrations.pop(scheme, None)
+        self.cache.clear()
+
+    def handles(self, value: Any) -> bool:
+        return isinstance(value, str) and self._split(value) is not None
+
+    def expires(self, value: Any) -> bool:
+        """Whether the resolved value may change over time, so it shouldn't be memoized.
+
+        Arguments:
+            value (Any): The raw config value.
+
+        Returns:
+            bool: True if the value is resolved by a resolver with a TTL.
+        """
+        split = self._split(value) if isinstance(value, str) else None
+        return split is not None and split[0].ttl is not None
+
+    def resolve(self, value: Any) -> Any:
+        """Resolve a value, or return it unchanged if it doesn't use a registered scheme.
+
+        Arguments:
+            value (Any): The raw config value.
+
+        Returns:
+            Any: The resolved value.
+        """
+        split = self._split(value) if isinstance(value, str) else None
+        if split is None:
+            return value
+
+        cached = self._cached(value)
+        if cached is not None:
+            return cached
+
+        registration, reference = split
+        resolved = registration.resolver(reference)
+        if inspect.isawaitable(resolved):
+            resolved = _run(resolved)
+        return self._store(value, registration.ttl, resolved)
+
+    async def resolve_many(self, values: Iterable[Any]) -> Dict[str, Any]:
+        """Resolve several values concurrently.
+
+        Coroutine resolvers run concurrently on the current loop, and plain resolvers run
+        in the loop's default executor.
+
+        Arguments:
+            values (Iterable[Any]): The raw config values.
+
+        Returns:
+            Dict[str, Any]: The resolved values, keyed by raw value.
+        """
+        loop = asyncio.get_running_loop()
+        pending = {}
+        results = {}
+
+        for value in set(values):
+            split = self._split(value) if isinstance(value, str) else None
+            if split is None:
+                results[value] = value
+                continue
+
+            cached = self._cached(value)
+            if cached is not None:
+                results[value] = cached
+                continue
+
+            pending[value] = _schedule(loop, *split)
+
+        resolved = await asyncio.gather(*pending.values())
+        for raw, result in zip(pending.keys(), resolved):
+            registration, _ = self._split(raw)
+            results[raw] = self._store(raw, registration.ttl, result)
+
+        return results
+
+    def _split(self, value: str) -> Optional[Tuple[_Registration, str]]:
+        scheme, separator, reference = value.partition(_separator)
+        if not separator:
+            return None
+        registration = self.registrations.get(scheme)
+        if registration is None:
+            return None
+        return registration, reference
+
+    def _cached(self, value: str) -> Optional[str]:
+        cached = self.cache.get(value)
+        if cached is None:
+            return None
+        resolved, expires_at = cached
+        if expires_at is not None and expires_at <= self.timer():
+            return None
+        return resolved
+
+    def _store(self, value: str, ttl: Optional[float], resolved: str) -> str:
+        self.cache[value] = (resolved, None if ttl is None else self.timer() + ttl)
+        return resolved
+
+
+# The registry used by default by `EnvBackend`
+resolvers = ValueResolvers()
+resolvers.register('base64', base64_resolver)
@@ -0,0 +1,186 @@
+"""Typed config schemas.
+
+A schema declares the config keys an application uses, with their types and defaults. Loading
+it against a `Config` reads and coerces every key once, and returns an immutable object whose
+attributes are slots, so reading a setting is a plain attribute access.
+
+All the missing and invalid keys are reported together.
+
+Usage:
+
+```
+schema = Schema('AppSettings', [
+    Field('APP_PORT', int),
+    Field('APP_DEBUG', bool, default=False),
+    Field('APP_TIMEOUT', timedelta, default=timedelta(seconds=30), alias='timeout'),
+])
+
+settings = schema.load(Config('pyproject.toml'))
+settings.app_port  # -> 8000
+settings.timeout  # -> timedelta(seconds=30)
+```
+"""
+
+import re
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Type
+
+from outcome.utils.config import NO_DEFAULT, Config
+
+_true_values = frozenset(('yes', 'y', 'true', 't', '1'))
+_false_values = frozenset(('no', 'n', 'false', 'f', '0'))
+
+_duration_pattern = re.compile(r'(\d+(?:\.\d*)?)(ms|s|m|h|d)')
+_duration_units = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+class ConfigSchemaException(Exception):
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        listed = '\n'.join(f'- {error}' for error in errors)
+        super().__init__(f'Invalid config:\n{listed}')
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    normalized = str(value).lower()
+    if normalized in _true_values:
+        return True
+    if normalized in _false_values:
+        return False
+    raise ValueError(f'not a boolean: {value!r}')
+
+
+def _to_int(value: Any) -> int:
+    if isinstance(value, (bool, float)):
+        raise ValueError(f'not an integer: {value!r}')
+    return int(value)
+
+
+def _to_duration(value: Any) -> timedelta:
+    if isinstance(value, timedelta):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return timedelta(seconds=value)
+
+    text = str(value).strip().lower()
+    try:
+        return timedelta(seconds=float(text))
+    except ValueError:
+        pass
+
+    # Durations such as `1h30m`, `45s` or `500ms`
+    parts = _duration_pattern.findall(text)
+    if not parts or ''.join(f'{number}{unit}' for number, unit in parts) != text:
+        raise ValueError(f'not a duration: {value!r}')
+    return timedelta(seconds=sum(float(number) * _duration_units[unit] for number, unit in parts))
+
+
+_coercers: Dict[Type[Any], Callable[[Any], Any]] = {
+    str: str,
+    int: _to_int,
+    float: float,
+    bool: _to_bool,
+    timedelta: _to_duration,
+}
+
+
+class Field:
+    __slots__ = ('key', 'field_type', 'default', 'alias')
+
+    def __init__(self, key: str, field_type: Type[Any] = str, default: Any = NO_DEFAULT, alias: Optional[str] = None):
+        """Declare a config key.
+
+        Arguments:
+            key (str): The config key.
+            field_type (Type): One of `str`, `int`, `float`, `bool` or `timedelta`.
+            default (Any): The value when the key isn't set, the key is required if omitted.
+            alias (str, optional): The attribute name on the loaded object, defaults to the lowercased key.
+
+        Raises:
+            ConfigSchemaException: If the type isn't supported, or the alias isn't a valid attribute name.
+        """
+        if field_type not in _coercers:
+            raise ConfigSchemaException([f'{key}: unsupported type {field_type!r}'])
+
+        alias = alias or key.lower()
+        if not alias.isidentifier():
+            raise ConfigSchemaException([f'{key}: invalid attribute name {alias!r}'])
+
+        self.key = key
+        self.field_type = field_type
+        self.default = default
+        self.alias = alias
+
+
+class SchemaValues:
+    # The base class of the compiled schema classes, the subclasses declare one slot per field
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f'{type(self).__name__} is read-only')
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        values = ', '.join(f'{name}={value!r}' for name, value in self.as_dict().items())
+        return f'{type(self).__name__}({values})'
+
+
+def _field_value(field: Field, config: Config) -> Any:
+    # Raises a ValueError describing the error when the field is missing or invalid
+    try:
+        raw = config.get(field.key)
+    except KeyError:
+        if field.default is NO_DEFAULT:
+            raise ValueError(f'{field.key}: missing') from None
+        return field.default
+
+    try:
+        return _coercers[field.field_type](raw)
+    except (ValueError, TypeError, OverflowError):
+        # Overflows come from durations too long for a timedelta, such as `inf`
+        raise ValueError(f'{field.key}: invalid {field.field_type.__name__}: {raw!r}') from None  # noqa: WPS609
+
+
+class Schema:
+    def __init__(self, name: str, fields: Iterable[Field]):
+        self.fields = tuple(fields)
+
+        aliases = [field.alias for field in self.fields]
+        duplicates = sorted({alias for alias in aliases if aliases.count(alias) > 1})
+        if duplicates:
+            raise ConfigSchemaException([f'duplicate attribute: {alias}' for alias in duplicates])
+
+        self.values_class: Type[SchemaValues] = type(name, (SchemaValues,), {'__slots__': tuple(aliases)})
+
+    def load(self, config: Config) -> SchemaValues:
+        """Read, coerce and validate all the fields.
+
+        Arguments:
+            config (Config): The config to read the values from.
+
+        Raises:
+            ConfigSchemaException: With all the missing and invalid keys.
+
+        Returns:
+            SchemaValues: An immutable object, with one attribute per field.
+        """
+        values = {}
+        errors = []
+
+        for field in self.fields:
+            try:
+                values[field.alias] = _field_value(field, config)
+            except ValueError as exc:
+                errors.append(str(exc))
+
+        if errors:
+            raise ConfigSchemaException(errors)
+
+        instance = object.__new__(self.values_class)  # noqa: WPS609
+        for alias, value in values.items():
+            object.__setattr__(instance, alias, value)  # noqa: WPS609
+        return instance
@@ -15,6 +15,9 @@ _integration_key = 'integration'
 _e2e_key = 'e2e'
 _prod_key = 'production'
 
+# The known environment names
+environments = (_dev_key, _test_key, _integration_key, _e2e_key, _prod_key)
+
 
 def env() -> str:
     if _env_key in os.environ:
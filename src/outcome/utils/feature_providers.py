@@ -0,0 +1,155 @@
+"""Remote sources of feature states.
+
+A provider fetches the states of the features, as a JSON object of feature names to states,
+from an HTTP endpoint or a local file. Once installed with `feature_set.set_provider`, it's
+polled on a background thread, and its states override the ones from the config and the
+defaults, so `is_active` never waits for the provider.
+
+```
+feature_set.set_provider(HttpFlagProvider('https://flags.example.com/my-app.json'), interval=30)
+```
+
+When the provider can't be reached, the last states it returned are kept, or, with
+`fallback_to_defaults=True`, dropped so the features fall back to the config and the defaults.
+"""
+
+import json
+import os
+import threading
+import warnings
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+import requests
+
+FlagStates = Dict[str, Union[bool, str]]
+
+
+def _parse_states(document: Any) -> FlagStates:
+    if not isinstance(document, dict):
+        raise ValueError('The feature states must be a JSON object')
+    return document
+
+
+class FlagProvider(ABC):
+    @abstractmethod
+    def fetch(self) -> Optional[FlagStates]:  # pragma: no cover
+        """Fetch the feature states, or None if they haven't changed since the last fetch."""
+
+    def reset(self) -> None:
+        # Forget what was fetched, so the next fetch returns the states even if they're unchanged
+        ...  # noqa: WPS428
+
+
+class FileFlagProvider(FlagProvider):
+    def __init__(self, path: Union[str, Path]):
+        self.path = path
+        self.signature = None
+
+    def fetch(self) -> Optional[FlagStates]:
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self.signature:
+            return None
+
+        states = _parse_states(json.loads(Path(self.path).read_text()))
+        self.signature = signature
+        return states  # noqa: R504
+
+    def reset(self) -> None:
+        self.signature = None
+
+
+class HttpFlagProvider(FlagProvider):
+    def __init__(self, url: str, timeout: float = 5, headers: Optional[Dict[str, str]] = None):
+        """Fetch the feature states from an HTTP endpoint returning a JSON object.
+
+        The states are only transferred when they changed, if the endpoint supports ETags.
+
+        Arguments:
+            url (str): The URL.
+            timeout (float): The request timeout, in seconds.
+            headers (Dict[str, str], optional): Additional request headers, such as credentials.
+        """
+        self.url = url
+        self.timeout = timeout
+        self.headers = headers or {}
+        self.etag: Optional[str] = None
+
+    def fetch(self) -> Optional[FlagStates]:
+        headers = dict(self.headers)
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+
+        response = requests.get(self.url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:  # noqa: WPS432
+            return None
+        response.raise_for_status()
+
+        states = _parse_states(response.json())
+        self.etag = response.headers.get('ETag')
+        return states  # noqa: R504
+
+    def reset(self) -> None:
+        self.etag = None
+
+
+class FlagPoller:
+    def __init__(
+        self,
+        provider: FlagProvider,
+        on_update: Callable[[FlagStates], None],
+        interval: float = 30,
+        fallback_to_defaults: bool = False,
+    ):
+        """Poll a provider, and pass the new states to `on_update`.
+
+        Arguments:
+            provider (FlagProvider): The provider.
+            on_update (Callable[[FlagStates], None]): Called with the states, when they change.
+            interval (float): The time between two polls, in seconds.
+            fallback_to_defaults (bool): Call `on_update` with no states when the provider fails,
+                rather than keeping the last states.
+        """
+        self.provider = provider
+        self.on_update = on_update
+        self.interval = interval
+        self.fallback_to_defaults = fallback_to_defaults
+        self.failed = False
+
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def poll(self) -> None:
+        try:
+            states = self.provider.fetch()
+        except (requests.RequestException, OSError, ValueError) as exc:
+            warnings.warn(f'Could not fetch the feature states: {exc}', RuntimeWarning)
+            if self.fallback_to_defaults and not self.failed:
+                # The provider must return the states on its next fetch, even if they're unchanged
+                self.provider.reset()
+                self.on_update({})
+            self.failed = True
+            return
+
+        self.failed = False
+        if states is not None:
+            self.on_update(states)
+
+    def start(self) -> None:
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name='feature-flag-poller')
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        # The first poll happens on the thread too, so installing a provider never blocks
+        self.poll()
+        while not self._stopped.wait(self.interval):
+            self.poll()
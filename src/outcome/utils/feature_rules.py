@@ -0,0 +1,276 @@
+"""Targeting rules for feature flags.
+
+Rules are attached to a boolean feature when it's registered, and evaluated against a context,
+a mapping of attributes such as the user's ID:
+
+```
+feature_set.register_feature('new_checkout', rules=[
+    DenyList({'blocked-user'}),
+    AllowList({'beta-tester'}),
+    AttributeMatch('country', {'FR', 'BE'}),
+    Rollout(10),
+])
+
+feature_set.is_active('new_checkout', {'id': user_id, 'country': 'FR'})
+```
+
+Each rule either activates the feature, deactivates it, or doesn't apply to the context. The
+first rule that applies decides, and if none applies the feature has its global state.
+
+Turning the feature off in the config, such as `WITH_FEAT_NEW_CHECKOUT=false`, or through the
+provider, is a kill switch: the rules are skipped and the feature is inactive for everyone.
+The defaults don't: a feature registered with `default=False` is still activated by its rules.
+
+The rules precompute everything they need when they're created, so evaluating them only does
+set lookups and integer arithmetic.
+
+A missing attribute, or an attribute set to None, doesn't match any rule.
+
+Rules can also be evaluated over columns of attributes, for many contexts at once, see
+`Columns`. The columns are evaluated with NumPy when it's installed, through the `numpy` extra.
+"""
+
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Optional, Sequence, Tuple, Union  # noqa: WPS235
+
+try:
+    import numpy  # noqa: WPS433 - nested import
+except ImportError:  # pragma: no cover
+    numpy = None  # noqa: WPS440
+
+Context = Mapping[str, Any]
+# A boolean NumPy array, or a bytearray of 0s and 1s when NumPy isn't installed
+Mask = Union['numpy.ndarray', bytearray]
+_Factorized = Tuple[Any, List[Any]]
+
+_id_attribute = 'id'
+_buckets = 10000
+_multiplier = 2654435761  # Knuth's multiplicative hash constant, spreads the crc32 values evenly
+_mask = 0xFFFFFFFF
+_byte_order = 'little'
+
+
+def bucket(value: Any, salt: int) -> int:
+    """Return the stable rollout bucket of a value, between 0 and 9999.
+
+    Arguments:
+        value (Any): The value, typically an ID, converted to a string.
+        salt (int): A 32-bit salt, so that each feature rolls out to a different set of IDs.
+
+    Returns:
+        int: The bucket.
+    """
+    return ((zlib.crc32(str(value).encode()) ^ salt) * _multiplier & _mask) % _buckets
+
+
+class Columns:
+    """Columns of attributes, such as `{'id': ids, 'country': countries}`, all of the same length.
+
+    The hashes and distinct values of each column are computed once, and shared by all the
+    rules evaluated over the columns.
+    """
+
+    def __init__(self, columns: Mapping[str, Sequence[Any]]):
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError('The columns must all have the same length')
+
+        self.columns = columns
+        self.length = lengths.pop() if lengths else 0
+        self._factorized: Dict[str, _Factorized] = {}
+        self._hashes: Dict[str, Tuple[Any, Any]] = {}
+
+    def factorize(self, attribute: str) -> Tuple[Any, List[Any]]:
+        """Encode a column as indices into its distinct values.
+
+        Arguments:
+            attribute (str): The attribute.
+
+        Returns:
+            Tuple[Any, List[Any]]: The index of each value in the distinct values, and the distinct values.
+        """
+        if attribute not in self._factorized:
+            index: Dict[Any, int] = {}
+            codes = [index.setdefault(value, len(index)) for value in self.columns[attribute]]
+            if numpy is not None:
+                codes = numpy.array(codes, dtype=numpy.intp)
+            self._factorized[attribute] = (codes, list(index))
+        return self._factorized[attribute]
+
+    def hashes(self, attribute: str) -> Tuple[Any, Mask]:
+        """Return the crc32 of each value of a column, and which values are set.
+
+        Arguments:
+            attribute (str): The attribute.
+
+        Returns:
+            Tuple[Any, Mask]: The hashes, and the mask of the values that aren't None.
+        """
+        if attribute not in self._hashes:
+            values = self.columns[attribute]
+            crcs = [zlib.crc32(str(value).encode()) for value in values]
+            present = bytearray(value is not None for value in values)
+            if numpy is not None:
+                crcs = numpy.array(crcs, dtype=numpy.uint64)
+                present = numpy.frombuffer(present, dtype=bool)
+            self._hashes[attribute] = (crcs, present)
+        return self._hashes[attribute]
+
+    def evaluate(self, rules: Iterable['Rule'], state: bool) -> Mask:
+        """Evaluate rules over the columns, the first rule that applies to a row decides.
+
+        Arguments:
+            rules (Iterable[Rule]): The rules.
+            state (bool): The state of the rows no rule applies to.
+
+        Returns:
+            Mask: The state of each row.
+        """
+        # The rules are applied last to first, so the first one that applies has the last word
+        applicable = [rule for rule in rules if rule.attribute in self.columns][::-1]
+        if numpy is not None:
+            return self._evaluate_arrays(applicable, state)
+        return self._evaluate_bytes(applicable, state)
+
+    def _evaluate_arrays(self, rules: List['Rule'], state: bool) -> Mask:
+        result = numpy.full(self.length, state, dtype=bool)
+        for rule in rules:
+            result[rule.mask(self)] = rule.decision
+        return result
+
+    def _evaluate_bytes(self, rules: List['Rule'], state: bool) -> Mask:
+        # Without NumPy, the bytes of 0s and 1s are combined as big integers, one byte per row
+        combined = int.from_bytes(bytes([state]) * self.length, _byte_order)
+        for rule in rules:
+            mask = int.from_bytes(rule.mask(self), _byte_order)
+            combined = combined | mask if rule.decision else combined & ~mask
+        return bytearray(combined.to_bytes(self.length, _byte_order))
+
+
+class Rule(ABC):
+    __slots__ = ('attribute',)
+
+    # The state of the feature when the rule applies
+    decision: bool = True
+
+    def __init__(self, attribute: str):
+        self.attribute = attribute
+
+    def bind(self, feature: str) -> 'Rule':
+        # Returns the rule to use for `feature`, for rules that depend on the feature
+        return self
+
+    @abstractmethod
+    def applies(self, value: Any) -> bool:  # pragma: no cover
+        ...
+
+    @abstractmethod
+    def mask(self, columns: Columns) -> Mask:  # pragma: no cover
+        ...
+
+    def evaluate(self, context: Context) -> Optional[bool]:
+        """Evaluate the rule against a context.
+
+        Arguments:
+            context (Context): The attributes.
+
+        Returns:
+            Optional[bool]: Whether the feature is active, or None if the rule doesn't apply.
+        """
+        value = context.get(self.attribute)
+        if value is None or not self.applies(value):
+            return None
+        return self.decision
+
+
+class _SetRule(Rule):
+    __slots__ = ('values',)
+
+    def __init__(self, attribute: str, values: Iterable[Hashable]):
+        super().__init__(attribute)
+        self.values = frozenset(values)
+
+    def applies(self, value: Any) -> bool:
+        return value in self.values
+
+    def mask(self, columns: Columns) -> Mask:
+        # Membership is tested once per distinct value, and mapped back to the rows
+        codes, distinct = columns.factorize(self.attribute)
+        members = bytearray(value is not None and value in self.values for value in distinct)
+        if numpy is not None:
+            return numpy.frombuffer(members, dtype=bool)[codes]
+        return bytearray(map(members.__getitem__, codes))  # noqa: WPS609 - direct magic attribute usage
+
+
+class Rollout(Rule):
+    __slots__ = ('percentage', 'salt', 'threshold', 'salt_hash')
+
+    def __init__(self, percentage: float, attribute: str = _id_attribute, salt: Optional[str] = None):
+        """Activate the feature for a stable percentage of the values of an attribute.
+
+        Arguments:
+            percentage (float): The percentage of values, from 0 to 100, with a precision of 0.01.
+            attribute (str): The attribute, the ID by default.
+            salt (str, optional): The salt of the hash, defaults to the feature name.
+
+        Raises:
+            ValueError: If the percentage isn't between 0 and 100.
+        """
+        if percentage < 0 or percentage > 100:  # noqa: WPS432
+            raise ValueError(f'Invalid rollout percentage: {percentage}')
+
+        super().__init__(attribute)
+        self.percentage = percentage
+        self.salt = salt
+        self.threshold = round(percentage * _buckets / 100)  # noqa: WPS432
+        self.salt_hash = zlib.crc32(salt.encode()) if salt is not None else 0
+
+    def bind(self, feature: str) -> 'Rollout':
+        if self.salt is not None:
+            return self
+        return Rollout(self.percentage, self.attribute, feature)
+
+    def applies(self, value: Any) -> bool:
+        return bucket(value, self.salt_hash) < self.threshold
+
+    def mask(self, columns: Columns) -> Mask:
+        crcs, present = columns.hashes(self.attribute)
+        if numpy is not None:
+            # The product of two 32-bit integers fits in 64 bits
+            buckets = ((crcs ^ numpy.uint64(self.salt_hash)) * numpy.uint64(_multiplier) & numpy.uint64(_mask)) % _buckets
+            return (buckets < self.threshold) & present
+
+        salt, threshold = self.salt_hash, self.threshold
+        buckets = bytearray(((crc ^ salt) * _multiplier & _mask) % _buckets < threshold for crc in crcs)
+        active = int.from_bytes(buckets, _byte_order) & int.from_bytes(present, _byte_order)
+        return bytearray(active.to_bytes(len(buckets), _byte_order))
+
+
+class AllowList(_SetRule):
+    __slots__ = ()
+
+    def __init__(self, values: Iterable[Hashable], attribute: str = _id_attribute):
+        super().__init__(attribute, values)
+
+
+class DenyList(_SetRule):
+    __slots__ = ()
+
+    decision = False
+
+    def __init__(self, values: Iterable[Hashable], attribute: str = _id_attribute):
+        super().__init__(attribute, values)
+
+
+class AttributeMatch(_SetRule):
+    __slots__ = ()
+
+    def __init__(self, attribute: str, values: Iterable[Hashable]):
+        """Activate the feature when an attribute has one of the given values.
+
+        Arguments:
+            attribute (str): The attribute.
+            values (Iterable[Hashable]): The values, a single string is a single value.
+        """
+        super().__init__(attribute, (values,) if isinstance(values, str) else values)
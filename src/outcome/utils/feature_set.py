@@ -1,161 +1,818 @@
-"""Feature flag management."""
+"""Feature flag management.
+
+Features are registered in a `FeatureSet`. The module-level functions, such as `register_feature`
+and `is_active`, use the default feature set, and separate feature sets can be created, for
+instance one per tenant, each with its own config and provider.
+
+The states of the registered features are evaluated together into a snapshot, the first time
+a feature is checked. The snapshot is rebuilt after `register_feature`, `set_feature_default`,
+`set_config`, a reload of the config file, or an explicit `refresh`, so checking a feature is a
+single dict lookup.
+
+Changes to the environment variables are only seen after a `refresh`.
+
+States fetched by a provider installed with `set_provider` override the config and the defaults,
+see `outcome.utils.feature_providers`.
+
+Features can also be registered in bulk from a TOML table, such as `[tool.features]` in
+`pyproject.toml`, see `load_features`:
+
+```
+[tool.features]
+new_checkout = false
+banner_text = "Welcome"
+
+[tool.features.search]
+fuzzy = { default = true }
+```
+
+Code that derives state from a feature can `subscribe` to its changes, rather than checking it
+on each use. The subscribers are notified when the snapshot is rebuilt, with the features whose
+state changed.
+
+The evaluations can be counted, see `start_telemetry` and `outcome.utils.feature_telemetry`.
+
+Within a `feature_scope`, such as a request wrapped by `FeatureScopeMiddleware`, each feature
+is evaluated the first time it's checked, and keeps that state until the end of the scope.
+"""
 
 import re
+import threading
 import warnings
+from contextlib import contextmanager
+from contextvars import ContextVar
 from enum import Enum
-from typing import Dict, Literal, Optional, Union
-
+from typing import (  # noqa: WPS235
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+import toml
 from outcome.utils import env
-from outcome.utils.config import Config
+from outcome.utils.config import Config, ValidPath, cached_load
+from outcome.utils.feature_providers import FlagPoller, FlagProvider, FlagStates
+from outcome.utils.feature_rules import Columns, Context, Mask, Rule
+from outcome.utils.feature_telemetry import FeatureTelemetry
 from rich.console import Console
 from rich.table import Table
 
-StateSource = Literal['config', 'default']
+StateSource = Literal['provider', 'config', 'default']
+ChangeCallback = Callable[[str, Union[bool, str]], None]
+
+# The sources counted by the telemetry, in addition to the `StateSource`s: a targeting rule,
+# or the state frozen by a `feature_scope`
+_rule_source = 'rule'
+_scope_source = 'scope'
+_config_source: StateSource = 'config'
+_default_source: StateSource = 'default'
 
 
 class FeatureException(Exception):
     ...
 
 
+class FeatureDefinitionException(FeatureException):
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        listed = '\n'.join(f'- {error}' for error in errors)
+        super().__init__(f'Invalid feature definitions:\n{listed}')
+
+
 class FeatureType(Enum):
     boolean = 'boolean'
     string = 'string'
 
 
-_feature_pattern = r'^[a-z]+(_?[a-z]+_?[a-z])*$'
+# Matches the same parts as `^[a-z]+(_?[a-z]+_?[a-z])*$`, without its nested quantifiers, which
+# backtrack exponentially on long invalid names
+_feature_part = r'[a-z](?:[a-z]+(?:_[a-z]+)*|_[a-z](?:_[a-z]_?[a-z])*(?:[a-z]+(?:_[a-z]+)*|_[a-z]))?'
+_feature_pattern = re.compile(rf'{_feature_part}(?:\.{_feature_part})*')
+# Matches valid names, each followed by a line break, to check many names in a single match
+_feature_lines_pattern = re.compile(rf'(?:{_feature_pattern.pattern}\n)*')
 _feature_prefix = 'WITH_FEAT_'
+_namespace_separator = '.'
+_line_break = '\n'
 
-_features: Dict[str, Union[bool, str]]
-_feature_types: Dict[str, FeatureType]
-_config: Config
-
+_true_values = frozenset(('yes', 'y', 'true', 't', '1'))
 
-def reset():
-    global _config, _features, _feature_types
-    _config = Config()  # noqa: WPS122,WPS442
-    _features = {}  # noqa: WPS122,WPS442
-    _feature_types = {}  # noqa: WPS122,WPS442
 
-
-reset()
+def _is_valid_feature_name(feature: str):
+    return _feature_pattern.fullmatch(feature) is not None
 
 
-def _is_valid_feature_name(feature: str):
-    return all(re.match(_feature_pattern, part) is not None for part in feature.split('.'))
+def _are_valid_feature_names(features: List[str]) -> bool:
+    lines = _line_break.join([*features, ''])
+    # A name containing a line break would be matched as two names
+    return lines.count(_line_break) == len(features) and _feature_lines_pattern.fullmatch(lines) is not None
 
 
 def _feature_to_config_key(feature: str) -> str:
-    replaced = feature.replace('.', '_').upper()
+    replaced = feature.replace(_namespace_separator, '_').upper()
     return f'{_feature_prefix}{replaced}'
 
 
-def _coerce_boolean(v):
-    return str(v).lower() in {'yes', 'y', 'true', 't', '1'}
-
-
-def set_config(config: Config):
-    global _config
-    _config = config  # noqa: WPS122,WPS442
-
-
-def register_feature(feature: str, default: Optional[bool] = None, feature_type: FeatureType = FeatureType.boolean) -> None:
-    if not _is_valid_feature_name(feature):
-        raise FeatureException(f'Invalid feature name: {feature}')
-
-    if feature in _features:
-        raise FeatureException(f'Duplicate feature: {feature}')
+def _features_to_config_keys(features: List[str]) -> List[str]:
+    # The names are converted in a single pass, valid names don't contain line breaks
+    replaced = _line_break.join(features).replace(_namespace_separator, '_').upper().split(_line_break)
+    return [f'{_feature_prefix}{key}' for key in replaced]
 
-    if feature_type not in list(FeatureType):
-        raise FeatureException(f'Invalid Type: {feature_type}')
 
-    if default is None and feature_type == FeatureType.boolean:
-        default = False
-
-    _features[feature] = default
-    _feature_types[feature] = feature_type
-
-
-def features() -> Dict[str, bool]:
-    return {k: is_active(k) for k in _features.keys()}
-
-
-def display_features():  # pragma: no cover
-    console = Console()
-
-    table = Table(show_header=True, header_style='bold')
-    table.add_column('Feature Flag')
-    table.add_column('State', justify='right')
-    table.add_column('Feature Type')
-    table.add_column('Default State', justify='right')
-    table.add_column('Config Key', justify='left')
-    table.add_column('Set By', justify='right')
-
-    def state_repr(state):
-        return '[bold green]active[/bold green]' if state else '[bold red]inactive[/bold red]'
-
-    def type_repr(feature_type: FeatureType):
-        return feature_type.value
-
-    for feat, state in features().items():
-        table.add_row(
-            feat,
-            state_repr(state),
-            type_repr(_feature_types[feat]),
-            state_repr(_features[feat]),
-            _feature_to_config_key(feat),
-            _feature_state_source(feat),
-        )
-
-    console.print(table)
-
-
-def is_active(feature: str) -> bool:
-    if not _feature_check(feature):
-        return False
-
-    value = _feature_status_from_config(feature)
-
-    if value is not None:
-        return value
-
-    return _features[feature]
-
-
-def _feature_status_from_config(feature: str) -> Optional[bool]:
-    try:
-        feature_key = _feature_to_config_key(feature)
-        value = _config.get(feature_key)
-
-        if _feature_types[feature] == FeatureType.boolean:
-            return value if isinstance(value, bool) else _coerce_boolean(value)
-        return value
-
-    except KeyError:
-        return None
+def _coerce_boolean(v):
+    return str(v).lower() in _true_values
 
 
-def _feature_state_source(feature: str) -> StateSource:
-    _feature_check(feature)
+# A feature's name, type and default, as built from a TOML table, so it can be cached with marshal
+FeatureDefinition = Tuple[str, str, Union[bool, str, None]]
 
-    value = _feature_status_from_config(feature)
+_type_key = 'type'
+_default_key = 'default'
+_definition_keys = frozenset((_type_key, _default_key))
+# Enum lookups are slow, the definitions are checked against plain values
+_types_by_value = {feature_type.value: feature_type for feature_type in FeatureType}
+_boolean_type = FeatureType.boolean.value
+_string_type = FeatureType.string.value
+_default_types = {_boolean_type: (bool, type(None)), _string_type: (str, type(None))}
+_default_features_table = 'tool.features'
 
-    if value is None:
-        return 'default'
-    return 'config'
 
+def _parse_feature_definition(value: Any) -> Tuple[str, Union[bool, str, None]]:
+    # Most definitions are plain defaults, which are valid by construction
+    value_type = type(value)
+    if value_type is bool:
+        return _boolean_type, value
+    if value_type is str:
+        return _string_type, value
 
-def _feature_check(feature):
-    if feature not in _features:
-        if env.is_dev():
-            warnings.warn(
-                f'Checking unknown feature "{feature}", maybe you forgot to register it? This will raise an exception in production',  # noqa: E501
-                RuntimeWarning,
+    if not isinstance(value, dict):
+        return _checked_definition(None, value)
+
+    unknown = value.keys() - _definition_keys
+    if unknown:
+        raise ValueError(f'unknown keys: {", ".join(sorted(unknown))}')
+    return _checked_definition(value.get(_type_key), value.get(_default_key))
+
+
+def _checked_definition(feature_type: Optional[str], default: Any) -> Tuple[str, Union[bool, str, None]]:
+    if feature_type is None:
+        feature_type = _string_type if isinstance(default, str) else _boolean_type
+
+    if feature_type not in _types_by_value:
+        raise ValueError(f'invalid type {feature_type!r}')
+    if not isinstance(default, _default_types[feature_type]):
+        raise ValueError(f'invalid {feature_type} default {default!r}')
+    return feature_type, default
+
+
+def parse_feature_definitions(table: Mapping[str, Any], prefix: str = '') -> Tuple[List[FeatureDefinition], List[str]]:
+    """Parse feature definitions from a TOML table.
+
+    A definition is either the feature's default, a boolean or a string, or a table with
+    `default` and `type` keys. Other tables are namespaces, `[tool.features.search]` defines
+    the features named `search.*`.
+
+    Arguments:
+        table (Mapping[str, Any]): The table.
+        prefix (str): The namespace of the table's features.
+
+    Returns:
+        Tuple[List[FeatureDefinition], List[str]]: The valid definitions, and the errors.
+    """
+    definitions: List[FeatureDefinition] = []
+    errors: List[str] = []
+
+    values = _namespaced_values(table, prefix)
+    # The names are checked one by one only to find the invalid ones
+    names_valid = _are_valid_feature_names([feature for feature, _ in values])
+
+    for feature, value in values:
+        if not names_valid and _feature_pattern.fullmatch(feature) is None:
+            errors.append(f'{feature}: invalid feature name')
+            continue
+
+        try:
+            feature_type, default = _parse_feature_definition(value)
+        except ValueError as exc:
+            errors.append(f'{feature}: {exc}')
+            continue
+
+        definitions.append((feature, feature_type, default))
+
+    return definitions, errors
+
+
+def _namespaced_values(table: Mapping[str, Any], prefix: str) -> List[Tuple[str, Any]]:
+    values = []
+    for key, value in table.items():
+        feature = f'{prefix}{key}'
+        if isinstance(value, dict) and not _definition_keys & value.keys():
+            values.extend(_namespaced_values(value, f'{feature}.'))
+        else:
+            values.append((feature, value))
+    return values
+
+
+def _features_table(document: Mapping[str, Any], table: str) -> Mapping[str, Any]:
+    for key in table.split(_namespace_separator):
+        document = document.get(key, {})
+    return document
+
+
+class _Scope:
+    __slots__ = ('context', 'states')
+
+    def __init__(self, context: Optional[Context]):
+        self.context = context
+        self.states: Dict[str, Union[bool, str]] = {}
+
+
+# The current scope of each feature set, shared by all the sets rather than a context variable per set,
+# since context variables are never freed
+_Scopes = Dict['FeatureSet', _Scope]
+_scope: ContextVar[Optional[_Scopes]] = ContextVar('feature_scope', default=None)
+
+
+class FeatureSet:  # noqa: WPS214, WPS230 - too many methods and attributes
+    __slots__ = (
+        'defaults',
+        'types',
+        'config_keys',
+        'rules',
+        'config',
+        'states',
+        'sources',
+        'generation',
+        'provider_states',
+        'poller',
+        'telemetry',
+        'subscribers',
+        'observed',
+        'lock',
+    )
+
+    defaults: Dict[str, Union[bool, str]]
+    types: Dict[str, FeatureType]
+    # The config key of each feature, computed once
+    config_keys: Dict[str, str]
+    rules: Dict[str, Tuple[Rule, ...]]
+    config: Config
+    # The evaluated states of the features, None when they need to be evaluated again
+    states: Optional[FlagStates]
+    # The source of each state of the last snapshot
+    sources: Dict[str, StateSource]
+    # Incremented on each refresh, so an evaluation that raced with a refresh isn't kept
+    generation: int
+    provider_states: FlagStates
+    poller: Optional[FlagPoller]
+    telemetry: Optional[FeatureTelemetry]
+    subscribers: Dict[str, List[ChangeCallback]]
+    # The state of each subscribed feature, as last notified to its subscribers
+    observed: Dict[str, Union[bool, str, None]]
+    # Serializes the notifications, reentrant so the callbacks can check or change features
+    lock: threading.RLock
+
+    def __init__(self, config: Optional[Config] = None):
+        """Create a set of features.
+
+        Arguments:
+            config (Config, optional): The config the feature states are read from.
+        """
+        self.poller = None
+        self.generation = 0
+        self.sources = {}
+        self.subscribers = {}
+        self.observed = {}
+        self.lock = threading.RLock()
+        # Subscribed here, so `set_config` always has a previous config to compare with
+        self.config = config or Config()
+        self.config.on_change(self._config_changed)
+        self.reset(self.config)
+
+    def reset(self, config: Optional[Config] = None):
+        self.subscribers = {}
+        self.observed = {}
+        self.set_provider(None)
+        self.telemetry = None
+        self.defaults = {}
+        self.types = {}
+        self.config_keys = {}
+        self.rules = {}
+        self.set_config(config or Config())
+
+    def refresh(self):
+        self.generation += 1
+        self.states = None
+        if self.subscribers:
+            # Rebuilt now rather than on the next check, so the subscribers are notified of the changes
+            self._evaluate()
+
+    def set_config(self, config: Config):
+        previous = self.config
+        if config is not previous:
+            # Unsubscribed from the previous config, so it neither refreshes the set nor keeps it alive
+            previous.remove_listener(self._config_changed)
+            self.config = config
+            config.on_change(self._config_changed)
+        self.refresh()
+
+    def set_provider(self, provider: Optional[FlagProvider], interval: float = 30, fallback_to_defaults: bool = False):
+        """Install a provider of feature states, polled on a background thread.
+
+        The states from the provider override the config and the defaults. Until the first poll
+        succeeds, the features keep their config or default states.
+
+        Arguments:
+            provider (FlagProvider, optional): The provider, None to remove the current one.
+            interval (float): The time between two polls, in seconds.
+            fallback_to_defaults (bool): Drop the provider's states while it can't be reached,
+                rather than keeping the last ones.
+        """
+        if self.poller is not None:
+            self.poller.stop()
+            self.poller = None
+        self._provider_updated({})
+
+        if provider is not None:
+            self.poller = FlagPoller(provider, self._provider_updated, interval, fallback_to_defaults)
+            self.poller.start()
+
+    def register_feature(
+        self,
+        feature: str,
+        default: Optional[bool] = None,
+        feature_type: FeatureType = FeatureType.boolean,
+        rules: Optional[Iterable[Rule]] = None,
+    ) -> None:
+        """Register a feature.
+
+        Arguments:
+            feature (str): The feature name.
+            default (bool, optional): The state of the feature when it isn't set in the config.
+            feature_type (FeatureType): The type of the feature's state.
+            rules (Iterable[Rule], optional): Targeting rules, see `outcome.utils.feature_rules`.
+
+        Raises:
+            FeatureException: If the feature is invalid, already registered, or has rules without being boolean.
+        """
+        if not _is_valid_feature_name(feature):
+            raise FeatureException(f'Invalid feature name: {feature}')
+
+        if feature in self.defaults:
+            raise FeatureException(f'Duplicate feature: {feature}')
+
+        if feature_type not in _types_by_value.values():
+            raise FeatureException(f'Invalid Type: {feature_type}')
+
+        if rules is not None and feature_type != FeatureType.boolean:
+            raise FeatureException(f'Only boolean features can have rules: {feature}')
+
+        if default is None and feature_type == FeatureType.boolean:
+            default = False
+
+        self.defaults[feature] = default
+        self.types[feature] = feature_type
+        self.config_keys[feature] = _feature_to_config_key(feature)
+        if rules is not None:
+            self.rules[feature] = tuple(rule.bind(feature) for rule in rules)
+        self.refresh()
+
+    def register_features(self, table: Mapping[str, Any]) -> List[str]:
+        """Register the features defined in a table, see `parse_feature_definitions`.
+
+        Either all the features are registered, or none.
+
+        Arguments:
+            table (Mapping[str, Any]): The definitions.
+
+        Returns:
+            List[str]: The registered features.
+        """
+        definitions, errors = parse_feature_definitions(table)
+        return self._register_definitions(definitions, errors)
+
+    def load_features(self, path: ValidPath, table: str = _default_features_table, cache: bool = False) -> List[str]:
+        """Register the features defined in a table of a TOML file, see `parse_feature_definitions`.
+
+        Either all the features are registered, or none. With `cache=True`, the parsed definitions
+        are cached next to the file, like the config, and only parsed again when the file changes.
+
+        Arguments:
+            path (ValidPath): The TOML file, such as `pyproject.toml`.
+            table (str): The dotted name of the table, the file defines no features if it's missing.
+            cache (bool): Cache the parsed definitions.
+
+        Returns:
+            List[str]: The registered features.
+        """
+        def build():  # noqa: WPS430 - nested function
+            return parse_feature_definitions(_features_table(toml.load(path), table))
+
+        definitions, errors = cached_load(path, build, table, 'features') if cache else build()
+        return self._register_definitions(definitions, errors)
+
+    def subscribe(self, feature: str, callback: ChangeCallback) -> None:
+        """Call `callback` with the feature and its new state, each time the feature's state changes.
+
+        The changes are detected when the snapshot is rebuilt, after `set_feature_default`,
+        `set_config`, a reload of the config file, an update from the provider, or a `refresh`.
+        The callback is called on the thread that rebuilt the snapshot, one notification at a time.
+        An exception raised by the callback is reported as a `RuntimeWarning`.
+
+        Only the feature's global state is observed, targeting rules and scopes don't apply.
+
+        Arguments:
+            feature (str): The feature.
+            callback (ChangeCallback): The callback.
+        """
+        self._check(feature)
+        with self.lock:
+            states = self.states if self.states is not None else self._evaluate()
+            # When the feature already has subscribers, the state they were last notified of is kept
+            self.observed.setdefault(feature, states.get(feature))
+            self.subscribers.setdefault(feature, []).append(callback)
+
+    def unsubscribe(self, feature: str, callback: ChangeCallback) -> None:
+        with self.lock:
+            callbacks = self.subscribers.get(feature, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if not callbacks:
+                self.subscribers.pop(feature, None)
+                self.observed.pop(feature, None)
+
+    def set_feature_default(self, feature: str, default_state: bool) -> None:
+        self._check(feature)
+        self.defaults[feature] = default_state
+        self.refresh()
+
+    def features(self) -> Dict[str, bool]:
+        return {k: self.is_active(k) for k in self.defaults.keys()}
+
+    def start_telemetry(self) -> FeatureTelemetry:
+        """Count the evaluations of the features until `stop_telemetry` is called.
+
+        Returns:
+            FeatureTelemetry: The counters.
+        """
+        self.telemetry = FeatureTelemetry()
+        return self.telemetry
+
+    def stop_telemetry(self) -> Optional[FeatureTelemetry]:
+        telemetry = self.telemetry
+        self.telemetry = None
+        return telemetry  # noqa: R504
+
+    def telemetry_report(self) -> Dict[str, Dict[str, Any]]:
+        """Return the evaluations counted since `start_telemetry`, see `FeatureTelemetry.as_dict`.
+
+        The registered features that were never evaluated are included, with no evaluations.
+
+        Raises:
+            RuntimeError: If the telemetry isn't enabled.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: The evaluations of each feature.
+        """
+        if self.telemetry is None:
+            raise RuntimeError('The telemetry is not enabled, call start_telemetry first')
+
+        report = self.telemetry.as_dict()
+        for feature in self.defaults:
+            report.setdefault(feature, {'evaluations': 0, 'outcomes': {}, 'sources': {}})
+        return report
+
+    def display_features(self):  # pragma: no cover
+        console = Console()
+
+        table = Table(show_header=True, header_style='bold')
+        table.add_column('Feature Flag')
+        table.add_column('State', justify='right')
+        table.add_column('Feature Type')
+        table.add_column('Default State', justify='right')
+        table.add_column('Config Key', justify='left')
+        table.add_column('Set By', justify='right')
+
+        def state_repr(state):
+            return '[bold green]active[/bold green]' if state else '[bold red]inactive[/bold red]'
+
+        def type_repr(feature_type: FeatureType):
+            return feature_type.value
+
+        for feat, state in self.features().items():
+            table.add_row(
+                feat,
+                state_repr(state),
+                type_repr(self.types[feat]),
+                state_repr(self.defaults[feat]),
+                _feature_to_config_key(feat),
+                self.state_source(feat),
             )
+
+        console.print(table)
+
+    @contextmanager
+    def feature_scope(self, context: Optional[Context] = None) -> Iterator[None]:
+        """Freeze the states of the features checked within the block.
+
+        Each feature is evaluated the first time it's checked in the scope, for the scope's
+        context, and later checks return the same state, even if the config changes meanwhile.
+        Checks with an explicit context aren't affected.
+
+        The scope is stored in a context variable, so it follows the current task or thread.
+
+        Arguments:
+            context (Context, optional): The attributes the features' rules are evaluated against.
+
+        Yields:
+            None: Nothing.
+        """
+        # The scopes of the other feature sets are kept, so nested scopes of different sets don't interfere
+        token = _scope.set({**(_scope.get() or {}), self: _Scope(context)})
+        try:
+            yield
+        finally:
+            _scope.reset(token)
+
+    def is_active(self, feature: str, context: Optional[Context] = None) -> bool:
+        """Return the state of a feature.
+
+        Arguments:
+            feature (str): The feature name.
+            context (Context, optional): The attributes the feature's rules are evaluated against.
+
+        Returns:
+            bool: The state of the feature, which is a string for string features.
+        """
+        if context is None:
+            scopes = _scope.get()
+            if scopes is not None and self in scopes:
+                return self._scoped_state(scopes[self], feature)
+
+        states = self.states
+        if states is None:
+            states = self._evaluate()
+
+        if context is not None:
+            decision = self._rule_decision(feature, context, states)
+            if decision is not None:
+                return decision
+
+        try:
+            state = states[feature]
+        except KeyError:
+            self._check(feature)
             return False
-        raise FeatureException(f'Unknown feature: {feature}')
-    return True
 
+        if self.telemetry is not None:
+            self.telemetry.record(feature, state, self.sources.get(feature, _default_source))
+        return state
+
+    def evaluate_many(self, features: Iterable[str], columns: Mapping[str, Sequence[Any]]) -> Dict[str, Mask]:
+        """Evaluate boolean features for many contexts at once.
+
+        The contexts are given as columns of attributes, for instance `{'id': user_ids, 'country': countries}`,
+        where the contexts are the rows. The rules are evaluated column-wise, with NumPy when it's installed.
+
+        Arguments:
+            features (Iterable[str]): The features.
+            columns (Mapping[str, Sequence[Any]]): The columns of attributes, all of the same length.
+
+        Raises:
+            FeatureException: If a feature isn't boolean.
+
+        Returns:
+            Dict[str, Mask]: The state of each feature for each context, as a boolean NumPy array,
+                or a bytearray of 0s and 1s if NumPy isn't installed.
+        """
+        states = self.states if self.states is not None else self._evaluate()
+        table = Columns(columns)
+        results = {}
+
+        for feature in features:
+            if feature not in states:
+                self._check(feature)
+                results[feature] = table.evaluate((), state=False)
+                continue
+
+            if self.types.get(feature, FeatureType.boolean) != FeatureType.boolean:
+                raise FeatureException(f'Only boolean features can be evaluated in bulk: {feature}')
+
+            rules = () if self._switched_off(feature, states) else self.rules.get(feature, ())
+            results[feature] = table.evaluate(rules, bool(states[feature]))
+
+        return results
+
+    def state_source(self, feature: str) -> StateSource:
+        self._check(feature)
+
+        if self._status_from_provider(feature) is not None:
+            return 'provider'
+
+        value = self._status_from_config(feature)
+
+        if value is None:
+            return _default_source
+        return _config_source
+
+    def _config_changed(self, keys: Set[str]):
+        if any(key.startswith(_feature_prefix) for key in keys):
+            self.refresh()
+
+    def _provider_updated(self, states: FlagStates):
+        # The states are replaced as a whole, so readers never see a partial update
+        self.provider_states = states
+        self.refresh()
+
+    def _register_definitions(self, definitions: List[FeatureDefinition], errors: List[str]) -> List[str]:
+        features = [feature for feature, _, _ in definitions]
+        # The duplicates are only looked for one by one when there are some
+        if len(set(features)) != len(features) or not self.defaults.keys().isdisjoint(features):
+            errors = [*errors, *self._duplicates(features)]
+
+        if errors:
+            raise FeatureDefinitionException(errors)
+
+        self.config_keys.update(zip(features, _features_to_config_keys(features)))
+        for feature, feature_type, default in definitions:
+            self.defaults[feature] = False if default is None and feature_type == _boolean_type else default
+            self.types[feature] = _types_by_value[feature_type]
+
+        # The snapshot is rebuilt once for all the features
+        self.refresh()
+        return features
+
+    def _duplicates(self, features: List[str]) -> List[str]:
+        errors = []
+        seen = set()
+        for feature in features:
+            if feature in self.defaults or feature in seen:
+                errors.append(f'{feature}: duplicate feature')
+            seen.add(feature)
+        return errors
+
+    def _rule_decision(self, feature: str, context: Context, states: Dict[str, Union[bool, str]]) -> Optional[bool]:
+        # The decision of the first rule that applies to the context, if the feature isn't switched off
+        if feature not in self.rules or self._switched_off(feature, states):
+            return None
+
+        for rule in self.rules[feature]:
+            decision = rule.evaluate(context)
+            if decision is not None:
+                if self.telemetry is not None:
+                    self.telemetry.record(feature, decision, _rule_source)
+                return decision
+        return None
 
-def set_feature_default(feature: str, default_state: bool) -> None:
-    _feature_check(feature)
-    _features[feature] = default_state
+    def _switched_off(self, feature: str, states: Dict[str, Union[bool, str]]) -> bool:
+        # An explicit `false` from the config or the provider is a kill switch, which overrides the rules
+        return states.get(feature) is False and self.sources.get(feature, _default_source) != _default_source
+
+    def _scoped_state(self, scope: _Scope, feature: str) -> bool:
+        try:
+            state = scope.states[feature]
+        except KeyError:
+            # An empty context matches no rule, and isn't served from the scope
+            scope.states[feature] = self.is_active(feature, scope.context or {})
+            return scope.states[feature]
+
+        if self.telemetry is not None:
+            self.telemetry.record(feature, state, _scope_source)
+        return state
+
+    def _evaluate(self) -> Dict[str, Union[bool, str]]:
+        generation = self.generation
+
+        states = {}
+        sources: Dict[str, StateSource] = {}
+        for feature, default in self.defaults.items():
+            value = self._status_from_provider(feature)
+            if value is not None:
+                sources[feature] = 'provider'
+            else:
+                value = self._status_from_config(feature)
+                sources[feature] = _default_source if value is None else _config_source
+            states[feature] = default if value is None else value
+
+        if generation == self.generation:
+            self.sources = sources
+            self.states = states
+            if self.subscribers:
+                self._notify(states)
+        return states
+
+    def _notify(self, states: Dict[str, Union[bool, str]]):
+        with self.lock:
+            # All the changes are recorded before any callback runs, so a reentrant check doesn't notify them again
+            changed = [
+                (feature, states.get(feature))
+                for feature in list(self.subscribers)
+                if self.observed.get(feature) != states.get(feature)
+            ]
+            self.observed.update(changed)
+            for feature, state in changed:
+                self._notify_subscribers(feature, state)
+
+    def _notify_subscribers(self, feature: str, state: Union[bool, str, None]):
+        for callback in list(self.subscribers.get(feature, ())):
+            try:
+                callback(feature, state)
+            except Exception as exc:
+                # The other subscribers are still notified, and the thread that rebuilt the snapshot,
+                # such as the provider's poller, keeps running
+                warnings.warn(f'Subscriber of {feature} failed: {exc!r}', RuntimeWarning)  # noqa: WPS609
+
+    def _status_from_provider(self, feature: str) -> Optional[bool]:
+        value = self.provider_states.get(feature)
+        if value is None or self.types.get(feature) != FeatureType.boolean:
+            return value
+        return value if isinstance(value, bool) else _coerce_boolean(value)
+
+    def _status_from_config(self, feature: str) -> Optional[bool]:
+        try:
+            # Features set with `set_feature_default` without being registered have no precomputed key
+            feature_key = self.config_keys.get(feature) or _feature_to_config_key(feature)
+            value = self.config.get(feature_key)
+
+            if self.types[feature] == FeatureType.boolean:
+                return value if isinstance(value, bool) else _coerce_boolean(value)
+            return value
+
+        except KeyError:
+            return None
+
+    def _check(self, feature):
+        if feature not in self.defaults:
+            if env.is_dev():
+                warnings.warn(
+                    f'Checking unknown feature "{feature}", maybe you forgot to register it? This will raise an exception in production',  # noqa: E501
+                    RuntimeWarning,
+                )
+                return False
+            raise FeatureException(f'Unknown feature: {feature}')
+        return True
+
+
+ASGIApp = Callable[[Dict[str, Any], Callable[..., Awaitable[Any]], Callable[..., Awaitable[Any]]], Awaitable[None]]
+# Builds the context of a scope from the ASGI connection scope
+ContextFactory = Callable[[Dict[str, Any]], Optional[Context]]
+
+
+class FeatureScopeMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        context: Optional[ContextFactory] = None,
+        feature_set: Optional[FeatureSet] = None,
+    ):
+        """Wrap each HTTP and WebSocket connection of an ASGI app in a `feature_scope`.
+
+        Arguments:
+            app (ASGIApp): The ASGI app.
+            context (Callable, optional): Builds the scope's context from the ASGI connection scope.
+            feature_set (FeatureSet, optional): The feature set, defaults to the default feature set.
+        """
+        self.app = app
+        self.context = context
+        self.feature_set = feature_set or _default_set
+
+    async def __call__(self, scope, receive, send):  # noqa: WPS610 - ASGI apps are async callables
+        if scope['type'] not in {'http', 'websocket'}:
+            return await self.app(scope, receive, send)
+
+        with self.feature_set.feature_scope(self.context(scope) if self.context else None):
+            return await self.app(scope, receive, send)
+
+
+# The module-level functions are the methods of the default feature set, which is reset in place
+_default_set = FeatureSet()
+
+reset = _default_set.reset
+refresh = _default_set.refresh
+set_config = _default_set.set_config
+set_provider = _default_set.set_provider
+register_feature = _default_set.register_feature
+set_feature_default = _default_set.set_feature_default
+features = _default_set.features
+display_features = _default_set.display_features
+feature_scope = _default_set.feature_scope
+is_active = _default_set.is_active
+evaluate_many = _default_set.evaluate_many
+register_features = _default_set.register_features
+load_features = _default_set.load_features
+subscribe = _default_set.subscribe
+unsubscribe = _default_set.unsubscribe
+start_telemetry = _default_set.start_telemetry
+stop_telemetry = _default_set.stop_telemetry
+telemetry_report = _default_set.telemetry_report
+_feature_state_source = _default_set.state_source
@@ -0,0 +1,86 @@
+"""Counters of feature evaluations.
+
+Once enabled with `feature_set.start_telemetry`, each check of a feature is counted, with its
+outcome and where its state came from, to find the hot features and the ones never checked.
+
+```
+feature_set.start_telemetry()
+...
+feature_set.telemetry_report()
+# {'new_checkout': {'evaluations': 3, 'outcomes': {True: 1, False: 2}, 'sources': {'rule': 1, 'config': 2}}}
+```
+
+The counts are kept per thread, and merged when they're read, so counting an evaluation
+doesn't take a lock.
+
+The counts only live in the process that checks the features, `otc-utils features` runs in a
+process of its own and can't show them. A running service exports the report itself, such as
+from a debug endpoint returning `json.dumps(feature_set.telemetry_report())`, or by logging it
+periodically.
+"""
+
+import threading
+from collections import Counter, defaultdict
+from typing import Any, DefaultDict, Dict, List, Tuple, Union
+
+_Counts = DefaultDict[Tuple[str, Union[bool, str], str], int]
+
+
+class FeatureTelemetry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counters: List[_Counts] = []
+
+    def record(self, feature: str, state: Union[bool, str], source: str) -> None:
+        try:
+            counter = self._local.counter
+        except AttributeError:
+            counter = self._thread_counter()
+        counter[feature, state, source] += 1
+
+    def clear(self) -> None:
+        # The threads get new counters, rather than having their counters cleared under them
+        with self._lock:
+            self._local = threading.local()
+            self._counters = []
+
+    def counts(self) -> Counter:
+        with self._lock:
+            counters = list(self._counters)
+
+        merged: Counter = Counter()
+        for counter in counters:
+            # `dict.copy` runs without releasing the GIL, so the owning thread can't change the counter during the copy
+            merged.update(dict.copy(counter))
+        return merged
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Merge the counts of all the threads.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: For each evaluated feature, the number of evaluations,
+                and the number of evaluations per outcome and per source.
+        """
+        evaluations: Counter = Counter()
+        outcomes: DefaultDict[str, Counter] = defaultdict(Counter)
+        sources: DefaultDict[str, Counter] = defaultdict(Counter)
+        for key, count in self.counts().items():
+            feature, state, source = key
+            evaluations[feature] += count
+            outcomes[feature][state] += count
+            sources[feature][source] += count
+
+        return {
+            feature: {'evaluations': total, 'outcomes': dict(outcomes[feature]), 'sources': dict(sources[feature])}
+            for feature, total in evaluations.items()
+        }
+
+    def _thread_counter(self) -> _Counts:
+        # Runs once per thread, the counters of finished threads are kept so their counts aren't lost
+        # A defaultdict is cheaper to increment than a Counter
+        counter: _Counts = defaultdict(int)
+        with self._lock:
+            self._counters.append(counter)
+        self._local.counter = counter
+        return counter
@@ -0,0 +1,15 @@
+from unittest.mock import patch
+
+import pytest
+from outcome.utils import feature_rules
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def with_numpy(request):
+    # Runs the test with NumPy, when it's installed, and with the pure Python fallback
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+        yield True
+    else:
+        with patch.object(feature_rules, 'numpy', None):
+            yield False
@@ -3,7 +3,7 @@ import pickle  # noqa: S403
 from unittest.mock import mock_open, patch
 
 import pytest
-from dogpile.cache.api import NO_VALUE
+from dogpile.cache.api import NO_VALUE, CachedValue
 from outcome.utils import cache
 
 test = 'test'
@@ -107,6 +107,7 @@ class Timer(object):
 
 key = 'key'
 value = 'value'
+created = 12.5
 
 
 args_raw = {'maxsize': 100, 'ttl': test_ttl}
@@ -215,3 +216,112 @@ class TestTTLBackend:
         with patch('builtins.open', side_effect=side_effect):
             backend = cache.TTLBackend(args_persisted)
             assert backend.cache == mock_ttlcache.return_value
+
+
+class TestCompactTTLCache:
+    @pytest.fixture
+    def timer(self):
+        return Timer()
+
+    @pytest.fixture
+    def compact(self, timer):
+        return cache.CompactTTLCache(maxsize=3, ttl=test_ttl, timer=timer)
+
+    def test_get_set(self, compact, timer):
+        compact[key] = value
+        assert compact[key] == value
+        assert compact.get('missing') is None
+        assert len(compact) == 1
+        assert list(compact) == [key]
+
+        del compact[key]
+        assert key not in compact
+
+    def test_expiry(self, compact, timer):
+        compact[key] = value
+        timer.tick()
+        assert compact.get(key) is None
+
+    def test_expiry_reclaimed_by_wheel(self, compact, timer):
+        compact[key] = value
+        timer.tick(test_ttl * 10)
+        assert not compact
+        assert not compact._entries
+
+    def test_reset_key_is_not_reclaimed_early(self, compact, timer):
+        compact[key] = value
+        timer.tick(test_ttl - 2)
+        compact[key] = 'other'
+        timer.tick(1)
+        compact.expire()
+        assert compact[key] == 'other'
+
+    def test_per_entry_ttl_is_capped(self, compact, timer):
+        compact.set(key, value, ttl=1)
+        compact.set('other', value, ttl=test_ttl * 10)
+        timer.tick(1)
+        assert key not in compact
+        assert 'other' in compact
+        timer.tick()
+        assert 'other' not in compact
+
+    def test_eviction(self, compact):
+        for i in range(4):
+            compact[i] = i
+        assert list(compact) == [1, 2, 3]
+
+    def test_eviction_closest_to_expiry(self, compact):
+        compact.set('a', value, ttl=3)
+        compact.set('b', value, ttl=1)
+        compact.set('c', value, ttl=2)
+        # Deleted and re-set keys leave stale references in the wheel
+        compact.set('a', value, ttl=1)
+        compact.set('a', value, ttl=4)
+        del compact['b']
+        compact.set('b', value, ttl=4)
+        compact['d'] = value
+        assert sorted(compact) == ['a', 'b', 'd']
+
+    def test_eviction_without_wheel(self, compact):
+        for i in range(3):
+            compact[i] = i
+        for bucket in compact._wheel:
+            bucket.clear()
+        compact[3] = 3
+        assert list(compact) == [1, 2, 3]
+
+    def test_cached_value_metadata_is_shared(self, compact):
+        compact[key] = CachedValue(value, {'ct': created, 'v': 2})
+        entry = compact._entries[key]
+        assert entry.payload == value
+        assert entry.created == created
+        assert compact[key] == CachedValue(value, {'ct': created, 'v': 2})
+
+    def test_cached_value_with_other_metadata(self, compact):
+        compact['a'] = CachedValue(value, {'ct': 1, 'v': 2})
+        odd_version = CachedValue(value, {'ct': 1, 'v': 3})
+        extra_metadata = CachedValue(value, {'ct': 1, 'v': 2, 'x': 0})
+        compact['b'] = odd_version
+        compact['c'] = extra_metadata
+
+        assert compact._entries['b'].created is None
+        assert compact['b'] == odd_version
+        assert compact['c'] == extra_metadata
+
+    def test_backend(self, fs):
+        backend = cache.TTLBackend({'maxsize': 10, 'ttl': test_ttl, 'compact': 'true', 'cache_path': test_cache_path_raw})
+        assert isinstance(backend.cache, cache.CompactTTLCache)
+
+        cached = CachedValue(value, {'ct': 1, 'v': 2})
+        backend.set(key, cached)
+        assert backend.get(key) == cached
+
+        new_backend = cache.TTLBackend({'maxsize': 10, 'ttl': test_ttl, 'compact': True, 'cache_path': test_cache_path_raw})
+        assert new_backend.get(key) == cached
+
+    def test_backend_ignores_other_persisted_cache_type(self, fs):
+        backend = cache.TTLBackend({'maxsize': 10, 'ttl': test_ttl, 'cache_path': test_cache_path_raw})
+        backend.set(key, value)
+
+        compact_backend = cache.TTLBackend({'maxsize': 10, 'ttl': test_ttl, 'compact': True, 'cache_path': test_cache_path_raw})
+        assert compact_backend.get(key) == NO_VALUE
@@ -0,0 +1,126 @@
+import threading
+
+import pytest
+from dogpile.cache.api import NO_VALUE, CachedValue
+from outcome.utils import cache
+from outcome.utils.cache_adaptive import AdaptiveTTLPolicy
+
+key = 'key'
+min_ttl = 10
+max_ttl = 100
+initial_ttl = 20
+# The TTL is multiplied or divided by a factor between these bounds
+min_factor = 1.5
+max_factor = 2
+
+
+class Clock:
+    def __init__(self):
+        self.time = 0
+
+    def __call__(self):
+        return self.time
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def policy(clock):
+    return AdaptiveTTLPolicy(min_ttl=min_ttl, max_ttl=max_ttl, initial_ttl=initial_ttl, expensive_cost=2, timer=clock)
+
+
+def refresh(policy, clock, value, cost=0):
+    policy.miss(key)
+    clock.time += cost
+    return policy.ttl(key, value)
+
+
+class TestAdaptiveTTLPolicy:
+    def test_initial_ttl(self, policy, clock):
+        assert refresh(policy, clock, 'value') == initial_ttl
+
+    def test_initial_ttl_defaults_to_min(self):
+        assert AdaptiveTTLPolicy(min_ttl=min_ttl, max_ttl=max_ttl).initial_ttl == min_ttl
+
+    def test_stable_cheap_value(self, policy, clock):
+        refresh(policy, clock, 'value')
+        assert refresh(policy, clock, 'value') == initial_ttl * min_factor
+
+    def test_stable_expensive_value(self, policy, clock):
+        refresh(policy, clock, 'value')
+        assert refresh(policy, clock, 'value', cost=5) == initial_ttl * max_factor
+        assert refresh(policy, clock, 'value', cost=5) == initial_ttl * max_factor ** 2
+        assert refresh(policy, clock, 'value', cost=5) == max_ttl
+
+    def test_volatile_value(self, policy, clock):
+        refresh(policy, clock, 'value')
+        assert refresh(policy, clock, 'other') == min_ttl
+        assert refresh(policy, clock, 'value') == min_ttl
+
+    def test_volatile_expensive_value(self, policy, clock):
+        refresh(policy, clock, 'value')
+        assert refresh(policy, clock, 'other', cost=2) == pytest.approx(initial_ttl / min_factor)
+
+    def test_cached_values_compared_by_payload(self, policy, clock):
+        refresh(policy, clock, CachedValue('value', {'ct': 1, 'v': 2}))
+        assert refresh(policy, clock, CachedValue('value', {'ct': 2, 'v': 2})) == initial_ttl * min_factor
+
+    def test_set_without_miss_keeps_ttl(self, policy, clock):
+        refresh(policy, clock, 'value')
+        assert policy.ttl(key, 'value') == initial_ttl
+
+    def test_unpicklable_value_keeps_ttl(self, policy, clock):
+        refresh(policy, clock, 'value')
+        assert refresh(policy, clock, threading.Lock()) == initial_ttl
+
+    def test_max_keys(self, clock):
+        policy = AdaptiveTTLPolicy(min_ttl=min_ttl, max_ttl=max_ttl, max_keys=2, timer=clock)
+        for k in ('a', 'b', 'c'):
+            policy.miss(k)
+        assert list(policy._stats) == ['b', 'c']
+
+    def test_report(self, policy, clock):
+        assert policy.report() == {'keys': 0, 'min': None, 'mean': None, 'max': None, 'histogram': {}}
+
+        for k, ttl in (('a', min_ttl), ('b', initial_ttl), ('c', max_ttl)):
+            policy._stats[k] = policy._key_stats(k)
+            policy._stats[k].ttl = ttl
+
+        mean = (min_ttl + initial_ttl + max_ttl) / 3
+        assert policy.report() == {'keys': 3, 'min': min_ttl, 'mean': mean, 'max': max_ttl, 'histogram': {16: 1, 32: 1, 128: 1}}
+
+
+class TestAdaptiveBackend:
+    def test_configure(self):
+        region = cache.get_cache_region()
+        settings = {
+            'adaptive.memory.adaptive_ttl': 'true',
+            'adaptive.memory.min_ttl': str(min_ttl),
+            'adaptive.memory.max_ttl': str(max_ttl),
+        }
+        cache.configure_cache_region(region, settings=settings, prefix='adaptive')
+
+        assert region.expiration_time is None
+        backend = region.backend
+        assert isinstance(backend.cache, cache.CompactTTLCache)
+        assert backend.cache.ttl == max_ttl
+        assert backend.adaptive_ttl.min_ttl == min_ttl
+
+    def test_backend_uses_policy_ttl(self, clock):
+        backend = cache.TTLBackend(
+            {'maxsize': 10, 'ttl': initial_ttl, 'adaptive_ttl': True, 'min_ttl': min_ttl, 'max_ttl': max_ttl},
+        )
+        backend.cache.timer = clock
+        backend.adaptive_ttl.timer = clock
+
+        assert backend.get(key) == NO_VALUE
+        backend.set(key, 'value')
+        assert backend.cache._entries[key].expires == initial_ttl
+
+        clock.time = initial_ttl + 1
+        assert backend.get(key) == NO_VALUE
+        backend.set(key, 'value')
+        assert backend.cache._entries[key].expires == clock.time + initial_ttl * min_factor
@@ -0,0 +1,188 @@
+import os
+import queue
+import socket
+import time
+from contextlib import ExitStack
+from unittest.mock import patch
+
+import pytest
+from dogpile.cache.api import NO_VALUE
+from outcome.utils import cache
+from outcome.utils.cache_invalidation import InvalidationBus, delete_op, prefix_op
+
+try:
+    import coverage  # noqa: WPS433 - nested import
+except ImportError:  # pragma: no cover
+    coverage = None  # noqa: WPS440
+
+timeout = 5
+poll_interval = 0.01
+
+
+def exit_child(status):  # pragma: no cover
+    # `os._exit` skips the atexit handlers, so the child's coverage is saved explicitly
+    current = coverage.Coverage.current() if coverage else None
+    if current is not None:
+        current.stop()
+        current.save()
+    os._exit(status)  # noqa: WPS437 - protected attribute usage
+
+
+@pytest.fixture
+def received():
+    return queue.Queue()
+
+
+@pytest.fixture
+def buses(tmp_path, received):
+    publisher = InvalidationBus(tmp_path, lambda message: None)
+    subscriber = InvalidationBus(tmp_path, received.put)
+    yield publisher, subscriber
+    publisher.close()
+    subscriber.close()
+
+
+class TestInvalidationBus:
+    def test_publish(self, buses, received):
+        publisher, _ = buses
+        publisher.publish(delete_op, 'key')
+        assert received.get(timeout=timeout) == (delete_op, 'key')
+
+    def test_publish_does_not_reach_self(self, tmp_path, received):
+        bus = InvalidationBus(tmp_path, received.put)
+        bus.publish(delete_op, 'key')
+        bus.close()
+        assert received.empty()
+
+    def test_stale_socket_removed(self, buses, tmp_path):
+        publisher, _ = buses
+        stale = tmp_path / 'stale.sock'
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.bind(str(stale))
+
+        publisher.publish(delete_op, 'key')
+        assert not stale.exists()
+
+    def test_full_peer_is_skipped(self, buses, received):
+        publisher, _ = buses
+        with patch.object(publisher, '_sender') as mock_sender:
+            mock_sender.sendto.side_effect = BlockingIOError
+            publisher.publish(delete_op, 'key')
+        assert received.empty()
+
+    def test_invalid_message_ignored(self, buses, received):
+        publisher, subscriber = buses
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.sendto(b'not json', str(subscriber.address))
+        publisher.publish(prefix_op, 'prefix')
+        assert received.get(timeout=timeout) == (prefix_op, 'prefix')
+
+    def test_fork(self, tmp_path, received):
+        bus = InvalidationBus(tmp_path, received.put)
+        parent_address = bus.address
+        read_fd, write_fd = os.pipe()
+
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover - the child's own coverage is saved by exit_child
+            rebound = bus.address != parent_address and bus.address.name.startswith(f'{os.getpid()}-')
+            bus.publish(delete_op, 'from-child')
+            delivered = received.get(timeout=timeout) == (delete_op, 'from-parent')
+            os.write(write_fd, b'1' if rebound and delivered else b'0')
+            exit_child(0)
+
+        with ExitStack() as cleanup:
+            # Run in reverse order, once the child has exited
+            cleanup.callback(bus.close)
+            cleanup.callback(os.close, write_fd)
+            cleanup.callback(os.close, read_fd)
+            cleanup.callback(os.waitpid, pid, 0)
+
+            assert received.get(timeout=timeout) == (delete_op, 'from-child')
+            bus.publish(delete_op, 'from-parent')
+            assert os.read(read_fd, 1) == b'1'
+
+        assert not parent_address.exists()
+
+    def test_fork_closed(self, tmp_path):
+        bus = InvalidationBus(tmp_path, lambda message: None)
+        bus.close()
+        bus._after_fork()
+        assert bus.closed
+
+    def test_close(self, tmp_path):
+        bus = InvalidationBus(tmp_path, lambda message: None)
+        bus.close()
+        bus.close()
+        assert not bus.address.exists()
+
+
+def cached_fn():
+    ...
+
+
+@pytest.fixture
+def backends(tmp_path):
+    args = {'maxsize': 10, 'ttl': 60, 'invalidation_path': tmp_path}
+    first = cache.TTLBackend(dict(args))
+    second = cache.TTLBackend(dict(args))
+    yield first, second
+    first.invalidation_bus.close()
+    second.invalidation_bus.close()
+
+
+def wait_for_invalidation(backend):
+    # Wait for the bus thread to queue the invalidation, then let the backend apply it
+    deadline = time.monotonic() + timeout
+    while not backend.pending_invalidations and time.monotonic() < deadline:
+        time.sleep(poll_interval)
+
+
+class TestBackendInvalidation:
+    def test_delete_is_broadcast(self, backends):
+        first, second = backends
+        for backend in backends:
+            backend.set('key', 'value')
+
+        first.delete('key')
+        assert first.get('key') == NO_VALUE
+
+        wait_for_invalidation(second)
+        assert second.get('key') == NO_VALUE
+
+    def test_invalidate_function(self, backends, tmp_path):
+        _, second = backends
+        prefix = cache.function_namespace(cached_fn)
+        second.set(f'{prefix}a', 'value')
+        second.set(f'{prefix}ns|b', 'value')
+        second.set('other', 'value')
+
+        region = cache.get_cache_region()
+        cache.configure_cache_region(region, settings={'inv.memory.invalidation_path': str(tmp_path)}, prefix='inv')
+        cache.invalidate_function(region, cached_fn)
+        region.backend.invalidation_bus.close()
+
+        wait_for_invalidation(second)
+        second.set('new', 'value')
+        assert second.get(f'{prefix}a') == NO_VALUE
+        assert second.get(f'{prefix}ns|b') == NO_VALUE
+        assert second.get('other') == 'value'
+
+    def test_unknown_op_ignored(self, backends):
+        first, _ = backends
+        first.set('key', 'value')
+        first.pending_invalidations.append(('unknown', 'key'))
+        assert first.get('key') == 'value'
+
+
+def test_function_namespace():
+    assert cache.function_namespace(cached_fn) == f'{__name__}:cached_fn|'
+    assert cache.function_namespace(cached_fn, 'ns') == f'{__name__}:cached_fn|ns|'
+
+
+def test_invalidate_prefix_persists(fs):
+    backend = cache.TTLBackend({'maxsize': 10, 'ttl': 60, 'cache_path': 'test/.cache/cache.pkl'})
+    backend.set('a:key', 'value')
+    backend.invalidate_prefix('a:')
+
+    reloaded = cache.TTLBackend({'maxsize': 10, 'ttl': 60, 'cache_path': 'test/.cache/cache.pkl'})
+    assert reloaded.get('a:key') == NO_VALUE
@@ -0,0 +1,219 @@
+import time
+import warnings
+from unittest.mock import patch
+
+import pytest
+from outcome.utils import cache
+from outcome.utils.cache_refresh import RefreshAheadScheduler
+
+expiration = 60
+lead_time = 10
+idle_window = 30
+timeout = 5
+poll_interval = 0.01
+
+
+class Clock:
+    def __init__(self):
+        self.time = 0
+
+    def __call__(self):
+        return self.time
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def region():
+    region = cache.get_cache_region()
+    cache.configure_cache_region(region, settings={'refresh.expiration': expiration}, prefix='refresh')
+    return region
+
+
+@pytest.fixture
+def scheduler(region, clock):
+    scheduler = RefreshAheadScheduler(region, lead_time=lead_time, timer=clock)
+    yield scheduler
+    scheduler.stop()
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def cached(region, scheduler, calls):
+    @scheduler.register
+    @region.cache_on_arguments()
+    def cached_fn(value):
+        calls.append(value)
+        return value
+
+    return cached_fn
+
+
+def wait_for_refreshes(scheduler):
+    scheduler._executor.shutdown(wait=True)
+    scheduler._executor = None
+
+
+class TestRefreshAheadScheduler:
+    def test_requires_expiration(self):
+        region = cache.get_cache_region()
+        region.configure('memory', arguments={'maxsize': 10, 'ttl': 10})
+        with pytest.raises(ValueError):
+            RefreshAheadScheduler(region, lead_time=lead_time)
+
+    def test_not_due_before_lead_time(self, scheduler, cached, clock):
+        assert cached(1) == 1
+        clock.time = expiration - lead_time - 1
+        assert not scheduler.due()
+
+    def test_refresh_before_expiry(self, scheduler, cached, clock, calls):
+        cached(1)
+        clock.time = expiration - lead_time
+        cached(1)
+        assert len(scheduler.due()) == 1
+
+        scheduler.run_pending()
+        wait_for_refreshes(scheduler)
+
+        assert calls == [1, 1]
+        assert not scheduler.due()
+        assert scheduler._usage[cached.__wrapped__][(1,)].refreshed_at == clock.time
+
+    def test_executor_reused(self, scheduler, cached):
+        scheduler.run_pending()
+        executor = scheduler._executor
+        scheduler.run_pending()
+        assert scheduler._executor is executor
+
+    def test_idle_keys_are_dropped(self, scheduler, cached, clock):
+        cached(1)
+        clock.time = expiration + 1
+        assert not scheduler.due()
+        assert not scheduler._usage[cached.__wrapped__]
+
+    @pytest.mark.parametrize('namespace', [None, 'namespace'])
+    def test_dropped_key_keeps_its_age(self, region, clock, calls, namespace):
+        region.key_mangler = lambda key: f'mangled:{key}'
+        scheduler = RefreshAheadScheduler(region, lead_time=lead_time, idle_window=idle_window, timer=clock)
+
+        @region.cache_on_arguments(namespace=namespace)
+        def cached_fn(value):
+            calls.append(value)
+            return value
+
+        cached_fn = scheduler.register(cached_fn, namespace=namespace)
+
+        # dogpile's creation times use the same clock, which must not start at 0
+        start = 100
+        with patch('time.time', clock):
+            clock.time = start
+            cached_fn(1)
+            clock.time = start + idle_window + 1
+            assert not scheduler.due()
+            assert not scheduler._usage[cached_fn.__wrapped__]
+
+            # Read from the cache, computed a while ago
+            clock.time = start + idle_window + 2
+            cached_fn(1)
+            assert calls == [1]
+            clock.time = start + expiration - lead_time
+            assert scheduler.due() == [(cached_fn.__wrapped__, (1,))]
+
+    def test_max_keys(self, region, clock):
+        scheduler = RefreshAheadScheduler(region, lead_time=lead_time, max_keys=2, timer=clock)
+
+        @scheduler.register
+        @region.cache_on_arguments()
+        def cached_fn(value):
+            return value
+
+        for value in (1, 2, 1, 3):
+            cached_fn(value)
+
+        assert list(scheduler._usage[cached_fn.__wrapped__]) == [(1,), (3,)]
+
+    def test_in_flight_not_resubmitted(self, scheduler, cached, clock, calls):
+        cached(1)
+        clock.time = expiration
+        scheduler._in_flight.add((cached.__wrapped__, (1,)))
+        scheduler.run_pending()
+        wait_for_refreshes(scheduler)
+        assert calls == [1]
+
+    def test_refresh_failure(self, region, scheduler, clock):
+        @scheduler.register
+        @region.cache_on_arguments()
+        def failing(value):
+            if clock.time:
+                raise RuntimeError('upstream')
+            return value
+
+        failing(1)
+        clock.time = expiration
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            scheduler.run_pending()
+            wait_for_refreshes(scheduler)
+            assert issubclass(caught[-1].category, RuntimeWarning)
+
+        assert failing(1) == 1
+        assert len(scheduler.due()) == 1
+
+    @pytest.mark.asyncio
+    async def test_refresh_async(self, region, scheduler, clock, calls):  # noqa: WPS218 - too many `assert` statements
+        @scheduler.register
+        @region.cache_on_arguments()
+        @cache.cache_async
+        async def cached_async(value):
+            calls.append(value)
+            return value
+
+        assert await cached_async(1) == 1
+        clock.time = expiration - lead_time
+        assert scheduler._coroutine_functions == {cached_async.__wrapped__}
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            scheduler.run_pending()
+            wait_for_refreshes(scheduler)
+
+        assert calls == [1, 1]
+        assert not scheduler.due()
+        # The refreshed value is already computed, reading it doesn't call the function
+        cached_value = cached_async(1)
+        assert cached_value.done
+        assert await cached_value == 1
+        assert calls == [1, 1]
+
+    def test_refresh_of_dropped_key(self, scheduler, cached, clock):
+        cached(1)
+        call = (cached.__wrapped__, (1,))
+        scheduler._usage[cached.__wrapped__].clear()
+        scheduler._refresh(call)
+        assert not scheduler._in_flight
+
+    def test_background_thread(self, region, calls):
+        scheduler = RefreshAheadScheduler(region, lead_time=expiration, interval=poll_interval)
+
+        @scheduler.register
+        @region.cache_on_arguments()
+        def cached_fn(value):
+            calls.append(value)
+            return value
+
+        cached_fn(1)
+        scheduler.start()
+        deadline = time.monotonic() + timeout
+        while len(calls) < 2 and time.monotonic() < deadline:
+            time.sleep(poll_interval)
+        scheduler.stop()
+
+        assert len(calls) > 1
@@ -1,11 +1,27 @@
 import base64
+import datetime
+import marshal
+import os
+import pickle  # noqa: S403
+import time
 from pathlib import Path
 from typing import Tuple
 from unittest.mock import Mock, patch
 
 import pytest
 from outcome.devkit.test_helpers import skip_for_integration
-from outcome.utils import config
+from outcome.utils import config, env
+
+# The ports set in the TOML files of the tests
+app_port = 80
+changed_port = 81
+db_port = 5432
+test_port = 8000
+production_port = 443
+overlay_port = 8443
+
+timeout = 5
+poll_interval = 0.01
 
 
 # We separate this into a non-fixture function
@@ -69,6 +85,94 @@ class TestEnvBackend:
             env_backend.get('env_key')
 
 
+@skip_for_integration
+class TestEnvBackendDotenv:
+    @pytest.fixture(autouse=True)
+    def loaded_files(self):
+        with patch.dict(config._dotenv_variables, clear=True):
+            with patch.dict(config._loaded_dotenv_files, clear=True):
+                yield config._loaded_dotenv_files
+
+    @pytest.fixture
+    def env_file(self, fs):
+        return fs.create_file(Path.cwd() / '.env', contents='TEST_DOTENV_VAR=hello\n')
+
+    @patch.dict('os.environ', {}, clear=True)
+    def test_loaded_on_creation(self, env_file):
+        env_file.set_contents('APP_ENV=production\n')
+        config.Config()
+        assert env.is_prod()
+
+    @patch.dict('os.environ', {'TEST_DOTENV_VAR': 'from_env'}, clear=True)
+    def test_env_wins(self, env_file):
+        assert config.EnvBackend().get('TEST_DOTENV_VAR') == 'from_env'
+
+    @patch.dict('os.environ', {}, clear=True)
+    def test_raw(self, env_file):
+        assert config.EnvBackend().raw('TEST_DOTENV_VAR') == 'hello'
+
+    @patch.dict('os.environ', {}, clear=True)
+    def test_items(self, env_file):
+        assert ('TEST_DOTENV_VAR', 'hello') in config.EnvBackend().items()
+
+    @patch.dict('os.environ', {'OTHER_VAR': 'other'}, clear=True)
+    def test_select(self, env_file):
+        assert config.EnvBackend().select({'TEST_DOTENV_VAR'}) == [('TEST_DOTENV_VAR', 'hello')]
+
+    @patch.dict('os.environ', {}, clear=True)
+    def test_prefetch(self, env_file):
+        env_file.set_contents(f'TEST_DOTENV_VAR=base64://{base64.b64encode(b"prefetched").decode("utf-8")}\n')
+        conf = config.Config()
+        conf.prefetch()
+
+        # The value is now cached by the resolver
+        conf.prefetch()
+        assert conf.get('TEST_DOTENV_VAR') == 'prefetched'
+
+    @patch.dict('os.environ', {}, clear=True)
+    def test_memoized(self, env_file):
+        with patch('outcome.utils.config.dotenv_values', return_value={}) as mocked_dotenv_values:
+            config.EnvBackend().load_dotenv()
+            config.EnvBackend().load_dotenv()
+            mocked_dotenv_values.assert_called_once()
+
+    @patch.dict('os.environ', {}, clear=True)
+    def test_reloaded_on_change(self, env_file):
+        config.EnvBackend().load_dotenv()
+        env_file.set_contents('TEST_DOTENV_VAR=hello\nOTHER_VAR=world\n')
+        os.utime(env_file.path, ns=(0, 0))
+
+        assert config.EnvBackend().get('OTHER_VAR') == 'world'
+
+    @patch.dict('os.environ', {}, clear=True)
+    def test_changed_value_reloaded(self, env_file):
+        assert config.Config().get('TEST_DOTENV_VAR') == 'hello'
+        env_file.set_contents('TEST_DOTENV_VAR=changed\n')
+        os.utime(env_file.path, ns=(0, 0))
+
+        assert config.Config().get('TEST_DOTENV_VAR') == 'changed'
+
+    @patch.dict('os.environ', {'OTHER_VAR': 'from_env'}, clear=True)
+    def test_env_wins_on_reload(self, env_file):
+        env_file.set_contents('TEST_DOTENV_VAR=hello\nOTHER_VAR=from_file\n')
+        config.EnvBackend()
+        env_file.set_contents('TEST_DOTENV_VAR=changed\nOTHER_VAR=changed\nVALUELESS\n')
+        os.utime(env_file.path, ns=(0, 0))
+
+        backend = config.EnvBackend()
+        assert backend.get('TEST_DOTENV_VAR') == 'changed'
+        assert backend.get('OTHER_VAR') == 'from_env'
+        assert 'VALUELESS' not in backend
+
+    @patch.dict('os.environ', {}, clear=True)
+    def test_missing_file(self, fs, loaded_files):
+        with patch('outcome.utils.config.dotenv_values', return_value={}) as mocked_dotenv_values:
+            assert 'TEST_DOTENV_VAR' not in config.EnvBackend()
+            assert 'TEST_DOTENV_VAR' not in config.EnvBackend()
+            mocked_dotenv_values.assert_called_once()
+        assert loaded_files == {Path.cwd() / '.env': None}
+
+
 @skip_for_integration
 class TestDefaultBackend:
     def test_get(self):
@@ -134,12 +238,396 @@ class TestTomlBackend:
     def test_get_config_format(self, app_config):
         assert config.TomlBackend.flatten_keys(app_config) == {'APP_PORT': 8000, 'DB_PORT': 5432, 'DB_DATABASE': 'postgres'}
 
+    def test_flatten_with_key(self):
+        assert config.TomlBackend.flatten_keys({'port': 80}, key='app') == {'APP_PORT': 80}
+        assert config.TomlBackend.flatten_keys(app_port, key='port') == {'PORT': app_port}
+
+    def test_flatten_deep(self):
+        document = {'a': {'b': {'c': {'d': 1}, 'e': 2}, 'f': 3}, 'g': 4}
+        assert config.TomlBackend.flatten_keys(document) == {'A_B_C_D': 1, 'A_B_E': 2, 'A_F': 3, 'G': 4}
+
+    def test_flatten_array_of_tables(self):
+        servers = [{'host': 'a', 'ports': {'http': 80}}, {'host': 'b'}]
+        document = {'servers': servers, 'ports': [80, 443], 'empty': []}
+
+        assert config.TomlBackend.flatten_keys(document) == {
+            'SERVERS': servers,
+            'SERVERS_0_HOST': 'a',
+            'SERVERS_0_PORTS_HTTP': 80,
+            'SERVERS_1_HOST': 'b',
+            'PORTS': [80, 443],
+            'EMPTY': [],
+        }
+
+    def test_flatten_with_aliases(self, app_config):
+        flattened = config.TomlBackend.flatten_keys(app_config, aliases={'db_port': 'database_port'})
+        assert flattened == {'APP_PORT': 8000, 'DATABASE_PORT': 5432, 'DB_DATABASE': 'postgres'}
+
+    def test_flatten_alias_wins_over_key(self):
+        # As for `AppConfig`, where the project name is aliased to `APP_NAME`
+        document = {'tool': {'poetry': {'name': 'proj-api'}}, 'app': {'name': 'other'}}
+        flattened = config.TomlBackend.flatten_keys(document, aliases={'TOOL_POETRY_NAME': 'APP_NAME'})
+        assert flattened == {'APP_NAME': 'proj-api'}
+
+    def test_flatten_with_missing_alias(self, app_config):
+        with pytest.raises(KeyError):
+            config.TomlBackend.flatten_keys(app_config, aliases={'db_host': 'database_host'})
+
     def test_terminal_recursion_case(self):
         # The function should throw an error if a non-dict value is provided without a key
         with pytest.raises(Exception):
             config.TomlBackend.flatten_keys(value=1)
 
 
+@skip_for_integration
+class TestTomlBackendCache:
+    toml_path = Path('/project/pyproject.toml')
+
+    @pytest.fixture
+    def toml_file(self, fs):
+        fs.create_file(self.toml_path, contents='[app]\nport = 80\nname = "app"\n')
+        return self.toml_path
+
+    def test_cache_written(self, toml_file):
+        backend = config.TomlBackend(toml_file, cache=True)
+        assert backend.get('APP_PORT') == app_port
+        assert config.cache_path_for(toml_file).exists()
+
+    def test_cache_used(self, toml_file):
+        config.TomlBackend(toml_file, cache=True).load_config()
+
+        with patch('outcome.utils.config.toml', autospec=True) as mocked_toml:
+            backend = config.TomlBackend(toml_file, cache=True)
+            assert backend.get('APP_NAME') == 'app'
+            mocked_toml.load.assert_not_called()
+
+    def test_cache_rebuilt_on_change(self, toml_file):
+        config.TomlBackend(toml_file, cache=True).load_config()
+        toml_file.write_text('[app]\nport = 81\n')
+
+        assert config.TomlBackend(toml_file, cache=True).get('APP_PORT') == changed_port
+
+    def test_cache_rebuilt_on_aliases_change(self, toml_file):
+        config.TomlBackend(toml_file, cache=True).load_config()
+        backend = config.TomlBackend(toml_file, aliases={'app_port': 'port'}, cache=True)
+        assert backend.get('PORT') == app_port
+
+    def test_cache_kind(self, toml_file):
+        config.TomlBackend(toml_file, cache=True).load_config()
+        assert config.cached_load(toml_file, lambda: ['features'], kind='features') == ['features']
+
+        assert config.cache_path_for(toml_file, 'features').exists()
+        with patch('outcome.utils.config.toml', autospec=True) as mocked_toml:
+            assert config.TomlBackend(toml_file, cache=True).get('APP_PORT') == app_port
+            mocked_toml.load.assert_not_called()
+
+    def test_corrupt_cache(self, toml_file):
+        config.cache_path_for(toml_file).write_bytes(b'garbage')
+        assert config.TomlBackend(toml_file, cache=True).get('APP_PORT') == app_port
+
+    def test_unmarshallable_result(self, toml_file):
+        unmarshallable = object()
+        assert config.cached_load(toml_file, lambda: unmarshallable) is unmarshallable
+        assert not config.cache_path_for(toml_file).exists()
+
+    def test_unwritable_cache(self, toml_file):
+        with patch('outcome.utils.config.os.replace', side_effect=PermissionError):
+            assert config.TomlBackend(toml_file, cache=True).get('APP_PORT') == app_port
+
+    @patch.dict('os.environ', {}, clear=True)
+    def test_config_cache_option(self, toml_file):
+        conf = config.Config(toml_file, cache=True)
+        assert conf.get('APP_PORT') == app_port
+        assert conf.backends[1].cache
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(poll_interval)
+    return True
+
+
+@skip_for_integration
+class TestTomlBackendReload:
+    @pytest.fixture
+    def toml_file(self, tmp_path):
+        path = tmp_path / 'config.toml'
+        path.write_text('[app]\nport = 80\nname = "app"\n')
+        return path
+
+    @pytest.fixture
+    def watched_backend(self, toml_file):
+        backend = config.TomlBackend(toml_file, watch=True, poll_interval=poll_interval)
+        yield backend
+        backend.stop_watching()
+
+    def test_reload(self, toml_file):
+        backend = config.TomlBackend(toml_file)
+        changes = []
+        backend.on_change(changes.append)
+        assert backend.get('APP_PORT') == app_port
+
+        toml_file.write_text('[app]\nport = 81\nhost = "localhost"\n')
+        assert backend.reload() == {'APP_PORT', 'APP_NAME', 'APP_HOST'}
+        assert backend.get('APP_PORT') == changed_port
+        assert changes == [{'APP_PORT', 'APP_NAME', 'APP_HOST'}]
+
+    def test_reload_unchanged(self, toml_file):
+        backend = config.TomlBackend(toml_file)
+        backend.on_change(Mock())
+        backend.load_config()
+        assert backend.reload() == set()
+        backend.listeners[0].assert_not_called()
+
+    def test_reload_invalid_file(self, toml_file):
+        backend = config.TomlBackend(toml_file)
+        backend.load_config()
+        toml_file.write_text('[app\n')
+
+        with pytest.warns(RuntimeWarning):
+            assert backend.reload() == set()
+        assert backend.get('APP_PORT') == app_port
+
+    def test_watch(self, toml_file, watched_backend):
+        assert watched_backend.get('APP_PORT') == app_port
+        # Let the watcher poll the unchanged file a few times
+        time.sleep(poll_interval * 5)
+        toml_file.write_text('[app]\nport = 81\n')
+        assert wait_for(lambda: watched_backend.get('APP_PORT') == changed_port)
+        watched_backend.stop_watching()
+
+    def test_watch_deleted_file(self, toml_file, watched_backend):
+        watched_backend.load_config()
+        with pytest.warns(RuntimeWarning) as record:
+            toml_file.unlink()
+            assert wait_for(lambda: len(record) > 0)
+        assert watched_backend.get('APP_PORT') == app_port
+
+    @patch.dict('os.environ', {}, clear=True)
+    def test_config_notified(self, toml_file):  # noqa: WPS218 - too many `assert` statements
+        conf = config.Config(toml_file)
+        changes = []
+        conf.on_change(changes.append)
+        assert conf.get('APP_PORT') == app_port
+        assert conf.get('APP_NAME') == 'app'
+
+        toml_file.write_text('[app]\nport = 81\nname = "app"\n')
+        conf.backends[1].reload()
+
+        assert changes == [{'APP_PORT'}]
+        assert 'APP_PORT' not in conf.resolved
+        assert 'APP_NAME' in conf.resolved
+        assert conf.get('APP_PORT') == changed_port
+
+    @patch.dict('os.environ', {}, clear=True)
+    def test_added_backend_notifies_config(self, toml_file):
+        conf = config.Config()
+        backend = config.TomlBackend(toml_file)
+        conf.add_backend(backend, 1)
+        assert conf.get('APP_PORT') == app_port
+
+        toml_file.write_text('[app]\nport = 81\n')
+        backend.reload()
+        assert conf.get('APP_PORT') == changed_port
+
+    @patch.dict('os.environ', {}, clear=True)
+    def test_removed_listener(self, toml_file):
+        conf = config.Config(toml_file)
+        changes = []
+        conf.on_change(changes.append)
+        conf.remove_listener(changes.append)
+        conf.remove_listener(changes.append)
+
+        toml_file.write_text('[app]\nport = 81\nname = "app"\n')
+        conf.backends[1].reload()
+        assert not changes
+
+
+@skip_for_integration
+class TestEnvSections:
+    @pytest.fixture
+    def toml_file(self, tmp_path):
+        path = tmp_path / 'config.toml'
+        path.write_text(
+            '[app]\nport = 80\nname = "app"\n'
+            + '[app.production]\nport = 443\n[app.production.db]\nhost = "db"\n'
+            + '[app.test]\nport = 8000\n',
+        )
+        return path
+
+    def test_fold(self):
+        document = {
+            'app': {
+                'port': 80,
+                'production': {'port': 443, 'db': {'host': 'db', 'test': {'host': 'test'}}},
+                'test': {'port': 8000},
+            },
+            'tool': {'name': 'tool'},
+        }
+        assert config.fold_env_sections(document, 'production') == {
+            'app': {'port': 443, 'db': {'host': 'db'}},
+            'tool': {'name': 'tool'},
+        }
+        assert config.fold_env_sections(document, 'dev') == {'app': {'port': 80}, 'tool': {'name': 'tool'}}
+
+    def test_fold_custom_environment(self):
+        document = {'app': {'port': 80, 'staging': {'port': 8080}, 'production': {'port': 443}}}
+        assert config.fold_env_sections(document, 'staging') == {'app': {'port': 8080}}
+
+    def test_fold_non_table(self):
+        # Only tables are environment sections
+        assert config.fold_env_sections({'app': {'test': True}}, 'test') == {'app': {'test': True}}
+
+    def test_disabled_by_default(self, toml_file):
+        backend = config.TomlBackend(toml_file, environment='production')
+        assert backend.get('APP_PORT') == app_port
+        assert backend.get('APP_PRODUCTION_PORT') == production_port
+
+    def test_backend(self, toml_file):
+        backend = config.TomlBackend(toml_file, env_sections=True, environment='production')
+        assert dict(backend.items()) == {'APP_PORT': production_port, 'APP_NAME': 'app', 'APP_DB_HOST': 'db'}
+
+    @patch.dict('os.environ', {'APP_ENV': 'test'}, clear=True)
+    def test_default_environment(self, toml_file):
+        assert config.TomlBackend(toml_file, env_sections=True).get('APP_PORT') == test_port
+
+    def test_cache_salt(self, toml_file):
+        production = config.TomlBackend(toml_file, cache=True, env_sections=True, environment='production')
+        assert production.get('APP_PORT') == production_port
+
+        test = config.TomlBackend(toml_file, cache=True, env_sections=True, environment='test')
+        assert test.get('APP_PORT') == test_port
+
+    def test_layered(self, tmp_path, toml_file):
+        overlay = tmp_path / 'overlay.toml'
+        overlay.write_text(f'[app]\nport = {overlay_port}\n')
+
+        backend = config.LayeredTomlBackend([toml_file, overlay], env_sections=True, environment='production')
+        assert backend.get('APP_PORT') == overlay_port
+        assert backend.get('APP_DB_HOST') == 'db'
+
+    @patch.dict('os.environ', {'APP_ENV': 'production'}, clear=True)
+    def test_config(self, toml_file):
+        assert config.Config(toml_file, env_sections=True).get('APP_PORT') == production_port
+
+    @patch.dict('os.environ', {}, clear=True)
+    def test_environment_read_on_load(self, toml_file):
+        backend = config.TomlBackend(toml_file, env_sections=True)
+        os.environ['APP_ENV'] = 'production'
+        assert backend.get('APP_PORT') == production_port
+
+    @patch.dict('os.environ', {}, clear=True)
+    @patch.dict(config._loaded_dotenv_files, clear=True)
+    def test_dotenv_environment(self, tmp_path, monkeypatch, toml_file):
+        (tmp_path / '.env').write_text('APP_ENV=production\n')
+        monkeypatch.chdir(tmp_path)
+        assert config.Config(toml_file, env_sections=True).get('APP_PORT') == production_port
+
+
+@skip_for_integration
+class TestLayeredTomlBackend:
+    @pytest.fixture
+    def config_dir(self, tmp_path):
+        (tmp_path / 'base.toml').write_text('[app]\nport = 80\nname = "app"\n[[servers]]\nhost = "a"\n[[servers]]\nhost = "b"\n')
+        (tmp_path / 'production.toml').write_text('[app]\nport = 443\n[[servers]]\nhost = "c"\n')
+        (tmp_path / 'test.toml').write_text('[app]\nport = 8000\n')
+        return tmp_path
+
+    def test_merge_documents(self):
+        base = {'app': {'port': 80, 'name': 'app'}, 'ports': [80]}
+        merged = config.merge_documents(base, {'app': {'port': 443}, 'ports': [443]})
+        assert merged == {'app': {'port': 443, 'name': 'app'}, 'ports': [443]}
+        assert base == {'app': {'port': 80, 'name': 'app'}, 'ports': [80]}
+
+    def test_directory_layers(self, config_dir):
+        backend = config.LayeredTomlBackend(config_dir, environment='production')
+        assert backend.layers() == [config_dir / 'base.toml', config_dir / 'production.toml']
+
+        (config_dir / 'local.toml').write_text('[app]\nname = "local"\n')
+        assert backend.layers()[-1] == config_dir / 'local.toml'
+
+    @patch.dict('os.environ', {'APP_ENV': 'test'}, clear=True)
+    def test_default_environment(self, config_dir):
+        backend = config.LayeredTomlBackend(config_dir)
+        assert backend.get('APP_PORT') == test_port
+
+    @patch.dict('os.environ', {}, clear=True)
+    def test_environment_read_on_load(self, config_dir):
+        backend = config.LayeredTomlBackend(config_dir)
+        os.environ['APP_ENV'] = 'production'
+        assert backend.layers() == [config_dir / 'base.toml', config_dir / 'production.toml']
+        assert backend.get('APP_PORT') == production_port
+
+    def test_merged(self, config_dir):
+        backend = config.LayeredTomlBackend(config_dir, environment='production')
+        assert backend.get('APP_PORT') == production_port
+        assert backend.get('APP_NAME') == 'app'
+        # Arrays of tables are replaced as a whole
+        assert backend.get('SERVERS') == [{'host': 'c'}]
+        assert 'SERVERS_1_HOST' not in backend
+
+    def test_files(self, config_dir):
+        backend = config.LayeredTomlBackend([config_dir / 'test.toml', config_dir / 'base.toml'])
+        assert backend.get('APP_PORT') == app_port
+
+    def test_single_file(self, config_dir):
+        backend = config.LayeredTomlBackend([config_dir / 'test.toml'])
+        assert dict(backend.items()) == {'APP_PORT': test_port}
+
+    def test_aliases(self, config_dir):
+        backend = config.LayeredTomlBackend(config_dir, aliases={'app_port': 'port'}, environment='production')
+        assert backend.get('PORT') == production_port
+
+    def test_cache(self, config_dir):
+        backend = config.LayeredTomlBackend(config_dir, cache=True, environment='production')
+        assert backend.get('APP_PORT') == production_port
+        assert config.cache_path_for(config_dir / 'base.toml', 'layer').exists()
+        assert config.cache_path_for(config_dir / 'production.toml', 'layer').exists()
+
+        with patch('outcome.utils.config.toml.load') as mocked_load:
+            assert config.LayeredTomlBackend(config_dir, cache=True, environment='production').get('APP_PORT') == production_port
+            mocked_load.assert_not_called()
+
+    def test_cache_shared_with_toml_backend(self, config_dir):
+        base = config_dir / 'base.toml'
+        config.TomlBackend(base, cache=True).load_config()
+        config.LayeredTomlBackend([base], cache=True).load_config()
+
+        with patch('outcome.utils.config.toml.load') as mocked_load:
+            assert config.TomlBackend(base, cache=True).get('APP_PORT') == app_port
+            assert config.LayeredTomlBackend([base], cache=True).get('APP_PORT') == app_port
+            mocked_load.assert_not_called()
+
+    def test_parsed_concurrently(self, config_dir):
+        with patch('outcome.utils.config.ThreadPoolExecutor', wraps=config.ThreadPoolExecutor) as mocked_executor:
+            config.LayeredTomlBackend(config_dir, environment='production').load_config()
+            mocked_executor.assert_called_once_with(max_workers=2, thread_name_prefix='toml-layer')
+
+    def test_reload_new_layer(self, config_dir):
+        backend = config.LayeredTomlBackend(config_dir, environment='production')
+        signature = backend._file_signature()
+        assert backend.get('APP_NAME') == 'app'
+
+        (config_dir / 'local.toml').write_text('[app]\nname = "local"\n')
+        assert backend._file_signature() != signature
+        assert backend.reload() == {'APP_NAME'}
+
+    def test_signature_missing_file(self, config_dir):
+        backend = config.LayeredTomlBackend([config_dir / 'missing.toml'])
+        assert backend._file_signature() == (None,)
+
+    def test_config_directory(self, config_dir):
+        conf = config.Config(config_dir)
+        assert isinstance(conf.backends[1], config.LayeredTomlBackend)
+
+    def test_config_files(self, config_dir):
+        conf = config.Config([config_dir / 'base.toml', config_dir / 'production.toml'])
+        assert conf.get('APP_PORT') == production_port
+
+
 @skip_for_integration
 class TestConfigGet:
     @patch.dict('os.environ', {'env_key': 'env_value'}, clear=True)
@@ -196,6 +684,152 @@ class TestConfigGet:
         assert len(conf.backends) == 3
 
 
+@skip_for_integration
+class TestConfigResolvedIndex:
+    @patch.dict('os.environ', {}, clear=True)
+    @patch('outcome.utils.config.TomlBackend.get_config')
+    def test_warm_get_skips_backends(self, mocked_get_config, some_config):
+        mocked_get_config.return_value = some_config
+        conf = config.Config('some_file')
+        assert conf.get('config_key') == 'config_value'
+
+        with patch.object(conf.backends[1], 'get', autospec=True) as mocked_get:
+            assert conf.get('config_key') == 'config_value'
+            mocked_get.assert_not_called()
+
+        assert conf.resolved['config_key'].backend is conf.backends[1]
+
+    @patch.dict('os.environ', {'env_key': f'base64://{base64.b64encode(b"decoded_once").decode("utf-8")}'}, clear=True)
+    def test_decoded_once(self):
+        conf = config.Config()
+
+        with patch('outcome.utils.config_resolvers.base64.b64decode', wraps=base64.b64decode) as mocked_decode:
+            assert conf.get('env_key') == 'decoded_once'
+            assert conf.get('env_key') == 'decoded_once'
+            mocked_decode.assert_called_once()
+
+    @patch.dict('os.environ', {}, clear=True)
+    def test_env_change(self):
+        conf = config.Config(defaults={'key': 'default_value'})
+        assert conf.get('key') == 'default_value'
+
+        with patch.dict('os.environ', {'key': 'env_value'}):
+            assert conf.get('key') == 'env_value'
+            os.environ['key'] = 'new_value'
+            assert conf.get('key') == 'new_value'
+
+        assert conf.get('key') == 'default_value'
+
+    @patch.dict('os.environ', {}, clear=True)
+    def test_fallback_default_not_memoized(self):
+        conf = config.Config()
+        assert conf.get('key', 'fallback') == 'fallback'
+        assert 'key' not in conf.resolved
+
+    @patch.dict('os.environ', {}, clear=True)
+    def test_invalidate(self):
+        conf = config.Config(defaults={'key': 'default_value'})
+        assert conf.get('key') == 'default_value'
+
+        conf.default_backend.defaults['key'] = 'other_value'
+        assert conf.get('key') == 'default_value'
+        conf.invalidate()
+        assert conf.get('key') == 'other_value'
+
+    @patch.dict('os.environ', {}, clear=True)
+    def test_add_backend_invalidates(self):
+        conf = config.Config(defaults={'key': 'default_value'})
+        assert conf.get('key') == 'default_value'
+
+        conf.add_backend(config.DefaultBackend({'key': 'backend_value'}), 1)
+        assert conf.get('key') == 'backend_value'
+
+
+class FakeTimer:
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        self.time += 0.5
+        return self.time
+
+
+@skip_for_integration
+class TestConfigTracing:
+    @pytest.fixture
+    def conf(self, app_config):
+        with patch.dict('os.environ', {'env_key': 'env_value'}, clear=True):
+            with patch('outcome.utils.config.TomlBackend.get_config') as mocked_get_config:
+                mocked_get_config.return_value = config.TomlBackend.flatten_keys(app_config)
+                yield config.Config('some_file', defaults={'default_key': 'default_value'})
+
+    def test_disabled_by_default(self, conf):
+        assert conf.tracer is None
+        assert 'get' not in conf.__dict__
+        with pytest.raises(RuntimeError):
+            conf.trace_report()
+
+    def test_counts(self, conf):
+        conf.start_tracing(FakeTimer())
+        conf.get('APP_PORT')
+        conf.get('APP_PORT')
+        conf.get('APP_PORT')
+        conf.get('env_key')
+        conf.get('default_key')
+        conf.get('missing_key', None)
+        with pytest.raises(KeyError):
+            conf.get('missing_key')
+
+        report = conf.trace_report(top=2)
+        assert report['reads'] == 7
+        assert report['hot_keys'] == [('APP_PORT', 3), ('missing_key', 2)]
+        assert report['backends'] == {
+            'DefaultBackend': {'reads': 1, 'lookups': 1, 'lookup_time': 0.5},
+            'EnvBackend': {'reads': 1, 'lookups': 1, 'lookup_time': 0.5},
+            'TomlBackend': {'reads': 3, 'lookups': 1, 'lookup_time': 0.5},
+            'fallback': {'reads': 1, 'lookups': 1, 'lookup_time': 0.5},
+            'missing': {'reads': 1, 'lookups': 1, 'lookup_time': 0.5},
+        }
+        assert report['unused_keys'] == ['DB_DATABASE', 'DB_PORT']
+
+    def test_get_many_traced(self, conf):
+        tracer = conf.start_tracing()
+        conf.get_many(['APP_PORT', 'DB_PORT'])
+        assert tracer.reads == {'APP_PORT': 1, 'DB_PORT': 1}
+
+    def test_stop_tracing(self, conf):
+        tracer = conf.start_tracing()
+        conf.get('APP_PORT')
+        assert conf.stop_tracing() is tracer
+        assert conf.tracer is None
+        assert 'get' not in conf.__dict__
+
+        conf.get('APP_PORT')
+        assert tracer.reads['APP_PORT'] == 1
+        assert conf.stop_tracing() is None
+
+    def test_unlistable_backend(self, conf):
+        class MyBackend(config.ConfigBackend):
+            def get(self, key):
+                return 'my_value'
+
+            def __contains__(self, key):
+                return key == 'my_key'
+
+        conf.add_backend(MyBackend(), 0)
+        conf.start_tracing()
+        assert conf.get('my_key') == 'my_value'
+        assert conf.trace_report()['backends']['MyBackend']['reads'] == 1
+        assert 'my_key' not in conf.defined_keys()
+
+    @patch.dict('os.environ', {'APP_NAME': 'foo-api-app'}, clear=True)
+    def test_subclass(self):
+        conf = config.AppConfig()
+        tracer = conf.start_tracing()
+        assert conf.get('APP_NAME') == 'foo'
+        assert tracer.reads == {'APP_NAME': 1}
+
+
 @skip_for_integration
 class TestAppConfig:
     @patch('outcome.utils.config.Config.get', autospec=True)
@@ -210,3 +844,123 @@ class TestAppConfig:
         conf = config.AppConfig()
         assert conf.get('APP_NAME', None) is None
         assert conf.get('APP_NAME', 'other-name') == 'other-name'
+
+    @patch.dict('os.environ', {'APP_NAME': 'foo-api-app'}, clear=True)
+    def test_snapshot(self):
+        assert config.AppConfig().snapshot()['APP_NAME'] == 'foo'
+
+    @patch.dict('os.environ', {}, clear=True)
+    def test_snapshot_without_app_name(self):
+        assert 'APP_NAME' not in config.AppConfig().snapshot()
+
+
+@skip_for_integration
+class TestConfigGetMany:
+    @patch.dict('os.environ', {'env_key': 'env_value'}, clear=True)
+    def test_get_many(self):
+        conf = config.Config(defaults={'default_key': 'default_value'})
+        assert conf.get_many(['env_key', 'default_key']) == {'env_key': 'env_value', 'default_key': 'default_value'}
+
+    @patch.dict('os.environ', {'env_key': 'env_value'}, clear=True)
+    def test_get_many_missing(self):
+        conf = config.Config()
+        with pytest.raises(KeyError, match='missing_key, other_key'):
+            conf.get_many(['env_key', 'missing_key', 'other_key'])
+
+    @patch.dict('os.environ', {'env_key': 'env_value'}, clear=True)
+    def test_get_many_default(self):
+        conf = config.Config()
+        assert conf.get_many(['env_key', 'missing_key'], None) == {'env_key': 'env_value', 'missing_key': None}
+
+
+@skip_for_integration
+class TestConfigSnapshot:
+    @pytest.fixture
+    def conf(self, app_config):
+        with patch.dict('os.environ', {'APP_PORT': '80', 'env_key': 'env_value'}, clear=True):
+            with patch('outcome.utils.config.TomlBackend.get_config') as mocked_get_config:
+                mocked_get_config.return_value = config.TomlBackend.flatten_keys(app_config)
+                conf = config.Config('some_file', defaults={'DB_PORT': 1, 'default_key': 'default_value'})
+                yield conf
+
+    def test_priority(self, conf):
+        snapshot = conf.snapshot()
+        assert snapshot['APP_PORT'] == '80'
+        assert snapshot['DB_PORT'] == db_port
+        assert snapshot['DB_DATABASE'] == 'postgres'
+        assert snapshot['default_key'] == 'default_value'
+        assert set(snapshot) >= {'APP_PORT', 'DB_PORT', 'DB_DATABASE', 'default_key'}
+
+    def test_repr(self, conf):
+        snapshot = conf.snapshot()
+        assert repr(snapshot) == f'ConfigSnapshot({len(snapshot)} keys)'
+
+    def test_loaded_backend(self, conf):
+        assert conf.get('DB_PORT') == db_port
+        assert conf.snapshot()['DB_PORT'] == db_port
+
+    def test_immutable(self, conf):
+        snapshot = conf.snapshot()
+        with pytest.raises(TypeError):
+            snapshot['APP_PORT'] = '81'  # type: ignore
+
+        with patch.dict('os.environ', {'APP_PORT': '81'}):
+            assert snapshot['APP_PORT'] == '80'
+
+    def test_get(self, conf):
+        snapshot = conf.snapshot()
+        assert snapshot.get('APP_PORT') == '80'
+        assert snapshot.get('missing_key') is None
+        assert snapshot.get('missing_key', 'default') == 'default'
+        with pytest.raises(KeyError):
+            snapshot['missing_key']
+
+    def test_as_backend(self, conf):
+        other = config.Config()
+        other.add_backend(conf.snapshot(), 1)
+        assert other.get('DB_PORT') == db_port
+
+    def test_serialization(self, conf):
+        snapshot = conf.snapshot()
+        assert config.ConfigSnapshot.loads(snapshot.dumps()) == snapshot
+        assert pickle.loads(pickle.dumps(snapshot)) == snapshot  # noqa: S301
+
+    @pytest.mark.parametrize('data', [b'', b'invalid', marshal.dumps((0, {}))])
+    def test_invalid_serialization(self, data):
+        with pytest.raises(ValueError):
+            config.ConfigSnapshot.loads(data)
+
+    @patch.dict('os.environ', {'KEY': f'base64://{base64.b64encode(b"value").decode("utf-8")}'}, clear=True)
+    def test_resolves_env(self):
+        assert config.Config().snapshot(env_keys=['KEY'])['KEY'] == 'value'
+
+    def test_env_limited(self, conf):
+        with patch.dict('os.environ', {'SECRET': 'secret', 'PREFIX_KEY': 'prefixed'}):
+            assert 'SECRET' not in conf.snapshot()
+            assert 'env_key' not in conf.snapshot()
+
+            snapshot = conf.snapshot(env_keys=['env_key'], env_prefixes=['PREFIX_'])
+            assert snapshot['env_key'] == 'env_value'
+            assert snapshot['PREFIX_KEY'] == 'prefixed'
+            assert 'SECRET' not in snapshot
+
+    def test_unmarshallable(self):
+        snapshot = config.ConfigSnapshot({'KEY': 'value', 'DATE': datetime.date.min})
+        with pytest.raises(ValueError, match='DATE$'):
+            snapshot.dumps()
+        with pytest.raises(ValueError, match='DATE$'):
+            pickle.dumps(snapshot)
+
+    @patch.dict('os.environ', {}, clear=True)
+    def test_unlistable_backend(self):
+        class MyBackend(config.ConfigBackend):
+            def get(self, key):
+                return 'my_key'
+
+            def __contains__(self, key):
+                return True
+
+        conf = config.Config()
+        conf.add_backend(MyBackend(), 1)
+        with pytest.raises(NotImplementedError):
+            conf.snapshot()
@@ -0,0 +1,175 @@
+import asyncio
+import base64
+import os
+from unittest.mock import Mock, patch
+
+import pytest
+from outcome.devkit.test_helpers import skip_for_integration
+from outcome.utils import config
+from outcome.utils.config_resolvers import ValueResolvers, base64_resolver, file_resolver, resolvers
+
+port = 80
+sleep_time = 0.01
+
+
+class Clock:
+    def __init__(self):
+        self.time = 0
+
+    def __call__(self):
+        return self.time
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def registry(clock):
+    return ValueResolvers(timer=clock)
+
+
+async def async_upper(reference):
+    await asyncio.sleep(0)
+    return reference.upper()
+
+
+def sync_upper(reference):
+    return reference.upper()
+
+
+class TestValueResolvers:
+    def test_unregistered_values_unchanged(self, registry):
+        assert registry.resolve('plain') == 'plain'
+        assert registry.resolve('postgres://host/db') == 'postgres://host/db'
+        assert registry.resolve(port) == port
+        assert not registry.handles('postgres://host/db')
+
+    def test_sync_resolver(self, registry):
+        registry.register('upper', sync_upper)
+        assert registry.handles('upper://value')
+        assert registry.resolve('upper://value') == 'VALUE'
+
+    def test_async_resolver(self, registry):
+        registry.register('upper', async_upper)
+        assert registry.resolve('upper://value') == 'VALUE'
+
+    @pytest.mark.asyncio
+    async def test_async_resolver_from_running_loop(self, registry):
+        registry.register('upper', async_upper)
+        assert registry.resolve('upper://value') == 'VALUE'
+
+    def test_cached_forever(self, registry, clock):
+        resolver = Mock(return_value='resolved')
+        registry.register('mock', resolver)
+        registry.resolve('mock://value')
+        clock.time = 10 ** 6
+        registry.resolve('mock://value')
+        resolver.assert_called_once_with('value')
+        assert not registry.expires('mock://value')
+
+    def test_cached_with_ttl(self, registry, clock):
+        resolver = Mock(return_value='resolved')
+        registry.register('mock', resolver, ttl=10)
+        assert registry.expires('mock://value')
+        assert not registry.expires(None)
+
+        registry.resolve('mock://value')
+        clock.time = 9
+        registry.resolve('mock://value')
+        assert resolver.call_count == 1
+
+        clock.time = 10
+        registry.resolve('mock://value')
+        assert resolver.call_count == 2
+
+    def test_unregister(self, registry):
+        registry.register('upper', sync_upper)
+        registry.resolve('upper://value')
+        registry.unregister('upper')
+        assert registry.resolve('upper://value') == 'upper://value'
+
+    @pytest.mark.asyncio
+    async def test_resolve_many(self, registry):
+        registry.register('async', async_upper)
+        registry.register('sync', sync_upper)
+        registry.resolve('sync://cached')
+
+        results = await registry.resolve_many(['async://a', 'sync://b', 'sync://cached', 'plain'])
+        assert results == {'async://a': 'A', 'sync://b': 'B', 'sync://cached': 'CACHED', 'plain': 'plain'}
+
+    @pytest.mark.asyncio
+    async def test_resolve_many_concurrently(self, registry):
+        running = 0
+        max_running = 0
+
+        async def slow(reference):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(sleep_time)
+            running -= 1
+            return reference
+
+        registry.register('slow', slow)
+        await registry.resolve_many([f'slow://{i}' for i in range(5)])
+        assert max_running == 5
+
+    def test_base64_resolver(self):
+        assert base64_resolver(base64.b64encode(b'value').decode('utf-8')) == 'value'
+        assert resolvers.resolve(f'base64://{base64.b64encode(b"value").decode("utf-8")}') == 'value'
+
+    def test_file_resolver(self, fs):
+        fs.create_file('/run/secrets/password', contents='secret\n')
+        assert file_resolver('/run/secrets/password') == 'secret'
+
+
+@skip_for_integration
+class TestConfigResolvers:
+    @pytest.fixture
+    def file_registry(self, clock):
+        registry = ValueResolvers(timer=clock)
+        registry.register('file', file_resolver, ttl=60)
+        return registry
+
+    @pytest.fixture
+    def conf(self, file_registry):
+        conf = config.Config()
+        conf.env_backend.resolvers = file_registry
+        return conf
+
+    @patch.dict('os.environ', {'PASSWORD': 'file:///run/secrets/password'}, clear=True)
+    def test_get_uses_resolvers(self, conf, fs):
+        fs.create_file('/run/secrets/password', contents='secret')
+        assert conf.get('PASSWORD') == 'secret'
+
+    @patch.dict('os.environ', {'PASSWORD': 'file:///run/secrets/password'}, clear=True)
+    def test_expiring_values_not_memoized(self, conf, fs, clock):
+        secret = fs.create_file('/run/secrets/password', contents='secret')
+        assert conf.get('PASSWORD') == 'secret'
+        assert 'PASSWORD' not in conf.resolved
+
+        secret.set_contents('rotated')
+        assert conf.get('PASSWORD') == 'secret'
+        clock.time = 60
+        assert conf.get('PASSWORD') == 'rotated'
+
+    @patch.dict('os.environ', {'PASSWORD': 'file:///run/secrets/password', 'OTHER': 'plain'}, clear=True)
+    def test_prefetch(self, conf, fs):
+        fs.create_file('/run/secrets/password', contents='secret')
+        conf.prefetch()
+
+        os.remove('/run/secrets/password')
+        assert conf.get('PASSWORD') == 'secret'
+
+    @pytest.mark.asyncio
+    async def test_aprefetch(self, conf, fs):
+        fs.create_file('/run/secrets/password', contents='secret')
+        with patch.dict('os.environ', {'PASSWORD': 'file:///run/secrets/password'}, clear=True):
+            await conf.aprefetch()
+            os.remove('/run/secrets/password')
+            assert conf.get('PASSWORD') == 'secret'
+
+    def test_custom_resolvers(self, file_registry):
+        assert config.EnvBackend(file_registry).resolvers is file_registry
@@ -0,0 +1,134 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from outcome.devkit.test_helpers import skip_for_integration
+from outcome.utils.config import Config
+from outcome.utils.config_schema import ConfigSchemaException, Field, Schema, SchemaValues
+
+default_port = 8000
+env_port = 80
+timeout_seconds = 30
+quarter = 0.25
+fractional_seconds = 1.5
+
+schema = Schema(
+    'Settings',
+    [
+        Field('APP_PORT', int),
+        Field('APP_NAME'),
+        Field('APP_DEBUG', bool, default=False),
+        Field('APP_RATIO', float, default=0.5),
+        Field('APP_TIMEOUT', timedelta, default=timedelta(seconds=timeout_seconds), alias='timeout'),
+    ],
+)
+
+
+@pytest.fixture
+def config():
+    return Config(defaults={'APP_PORT': default_port, 'APP_NAME': 'app'})
+
+
+@skip_for_integration
+class TestSchema:
+    @patch.dict('os.environ', {}, clear=True)
+    def test_load_defaults(self, config):
+        settings = schema.load(config)
+        assert settings.app_port == default_port
+        assert settings.app_name == 'app'
+        assert settings.app_debug is False
+        assert settings.app_ratio == 0.5
+        assert settings.timeout == timedelta(seconds=timeout_seconds)
+
+    @patch.dict(
+        'os.environ', {'APP_PORT': '80', 'APP_DEBUG': 'yes', 'APP_RATIO': '0.25', 'APP_TIMEOUT': '1h30m'}, clear=True,
+    )
+    def test_load_coerces_env(self, config):
+        settings = schema.load(config)
+        assert settings.app_port == env_port
+        assert settings.app_debug is True
+        assert settings.app_ratio == quarter
+        assert settings.timeout == timedelta(hours=1, minutes=timeout_seconds)
+
+    @patch.dict('os.environ', {'APP_PORT': 'eighty', 'APP_DEBUG': 'maybe', 'APP_TIMEOUT': '5 minutes'}, clear=True)
+    def test_all_errors_reported(self):
+        with pytest.raises(ConfigSchemaException) as exc_info:
+            schema.load(Config())
+        errors = [
+            "APP_PORT: invalid int: 'eighty'",
+            'APP_NAME: missing',
+            "APP_DEBUG: invalid bool: 'maybe'",
+            "APP_TIMEOUT: invalid timedelta: '5 minutes'",
+        ]
+        assert exc_info.value.errors == errors  # noqa: WPS441
+
+    @patch.dict('os.environ', {}, clear=True)
+    def test_read_only(self, config):
+        settings = schema.load(config)
+        with pytest.raises(AttributeError):
+            settings.app_port = 1
+        with pytest.raises(AttributeError):
+            settings.other = 1
+
+    @patch.dict('os.environ', {}, clear=True)
+    def test_slots(self, config):
+        settings = schema.load(config)
+        assert isinstance(settings, SchemaValues)
+        assert type(settings).__name__ == 'Settings'
+        assert not hasattr(settings, '__dict__')  # noqa: WPS421
+        assert settings.as_dict()['app_port'] == default_port
+        assert repr(settings).startswith("Settings(app_port=8000, app_name='app'")
+
+    def test_duplicate_alias(self):
+        with pytest.raises(ConfigSchemaException):
+            Schema('Settings', [Field('A', alias='a'), Field('B', alias='a')])
+
+    def test_unsupported_type(self):
+        with pytest.raises(ConfigSchemaException):
+            Field('A', list)
+
+    def test_invalid_alias(self):
+        with pytest.raises(ConfigSchemaException):
+            Field('A-B')
+
+
+durations = [
+    (timeout_seconds, timedelta(seconds=timeout_seconds)),
+    (fractional_seconds, timedelta(seconds=fractional_seconds)),
+    ('30', timedelta(seconds=timeout_seconds)),
+    ('250ms', timedelta(seconds=quarter)),
+    ('2d', timedelta(days=2)),
+    ('1h30m30s', timedelta(hours=1, minutes=timeout_seconds, seconds=timeout_seconds)),
+    (timedelta(minutes=1), timedelta(minutes=1)),
+]
+
+
+@skip_for_integration
+@pytest.mark.parametrize('raw,expected', durations)
+def test_durations(raw, expected):
+    duration_schema = Schema('Durations', [Field('DURATION', timedelta)])
+    assert duration_schema.load(Config(defaults={'DURATION': raw})).duration == expected
+
+
+@skip_for_integration
+@pytest.mark.parametrize('raw', [True, 1.5, 'x'])
+def test_invalid_ints(raw):
+    int_schema = Schema('Ints', [Field('NUMBER', int)])
+    with pytest.raises(ConfigSchemaException):
+        int_schema.load(Config(defaults={'NUMBER': raw}))
+
+
+@skip_for_integration
+@pytest.mark.parametrize('raw', ['inf', float('inf'), 'nan', '1e20', '999999999999d'])
+def test_invalid_durations(raw):
+    duration_schema = Schema('Durations', [Field('DURATION', timedelta)])
+    with pytest.raises(ConfigSchemaException) as exc_info:
+        duration_schema.load(Config(defaults={'DURATION': raw}))
+    assert exc_info.value.errors == [f'DURATION: invalid timedelta: {raw!r}']  # noqa: WPS441
+
+
+@skip_for_integration
+@pytest.mark.parametrize('raw,expected', [(True, True), (False, False), ('N', False), (1, True)])
+def test_bools(raw, expected):
+    bool_schema = Schema('Bools', [Field('FLAG', bool)])
+    assert bool_schema.load(Config(defaults={'FLAG': raw})).flag is expected
@@ -0,0 +1,133 @@
+import json
+import os
+from http import HTTPStatus
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+from outcome.utils.feature_providers import FileFlagProvider, FlagPoller, FlagProvider, HttpFlagProvider
+
+poll_interval = 0.01
+
+
+@pytest.fixture
+def flags_file(tmp_path):
+    path = tmp_path / 'flags.json'
+    path.write_text(json.dumps({'feature': True}))
+    return path
+
+
+def response(status_code=200, body=None, etag=None):
+    mocked = Mock(status_code=status_code, headers={'ETag': etag} if etag else {})
+    mocked.json.return_value = body
+    if status_code >= HTTPStatus.BAD_REQUEST:
+        mocked.raise_for_status.side_effect = requests.HTTPError(f'{status_code}')
+    return mocked
+
+
+class TestFileFlagProvider:
+    def test_fetch(self, flags_file):
+        provider = FileFlagProvider(flags_file)
+        assert provider.fetch() == {'feature': True}
+        assert provider.fetch() is None
+
+    def test_changed(self, flags_file):
+        provider = FileFlagProvider(flags_file)
+        provider.fetch()
+        flags_file.write_text(json.dumps({'feature': False, 'other': 'value'}))
+        assert provider.fetch() == {'feature': False, 'other': 'value'}
+
+    def test_reset(self, flags_file):
+        provider = FileFlagProvider(flags_file)
+        provider.fetch()
+        provider.reset()
+        assert provider.fetch() == {'feature': True}
+
+    def test_missing(self, tmp_path):
+        with pytest.raises(OSError):
+            FileFlagProvider(tmp_path / 'missing.json').fetch()
+
+    def test_not_an_object(self, flags_file):
+        flags_file.write_text('[]')
+        with pytest.raises(ValueError):
+            FileFlagProvider(flags_file).fetch()
+
+
+class TestHttpFlagProvider:
+    @patch('outcome.utils.feature_providers.requests.get')
+    def test_etag(self, mocked_get):
+        provider = HttpFlagProvider('http://flags', headers={'Authorization': 'token'})
+
+        mocked_get.return_value = response(body={'feature': True}, etag='"v1"')
+        assert provider.fetch() == {'feature': True}
+        mocked_get.assert_called_with('http://flags', headers={'Authorization': 'token'}, timeout=5)
+
+        mocked_get.return_value = response(status_code=HTTPStatus.NOT_MODIFIED)
+        assert provider.fetch() is None
+        mocked_get.assert_called_with('http://flags', headers={'Authorization': 'token', 'If-None-Match': '"v1"'}, timeout=5)
+
+        provider.reset()
+        mocked_get.return_value = response(body={'feature': True})
+        assert provider.fetch() == {'feature': True}
+        mocked_get.assert_called_with('http://flags', headers={'Authorization': 'token'}, timeout=5)
+
+    @patch('outcome.utils.feature_providers.requests.get')
+    def test_error(self, mocked_get):
+        mocked_get.return_value = response(status_code=HTTPStatus.INTERNAL_SERVER_ERROR)
+        with pytest.raises(requests.HTTPError):
+            HttpFlagProvider('http://flags').fetch()
+
+
+class TestFlagPoller:
+    def test_custom_provider(self):
+        class BrokenProvider(FlagProvider):
+            def fetch(self):
+                raise ValueError('broken')
+
+        on_update = Mock()
+        poller = FlagPoller(BrokenProvider(), on_update, fallback_to_defaults=True)
+        with pytest.warns(RuntimeWarning):
+            poller.poll()
+        on_update.assert_called_once_with({})
+
+    def test_poll(self, flags_file):
+        on_update = Mock()
+        poller = FlagPoller(FileFlagProvider(flags_file), on_update)
+        poller.poll()
+        poller.poll()
+        on_update.assert_called_once_with({'feature': True})
+
+    def test_failure_keeps_states(self, flags_file):
+        on_update = Mock()
+        poller = FlagPoller(FileFlagProvider(flags_file), on_update)
+        poller.poll()
+        os.remove(flags_file)
+
+        with pytest.warns(RuntimeWarning):
+            poller.poll()
+        on_update.assert_called_once_with({'feature': True})
+
+    def test_fallback_to_defaults(self, flags_file):
+        on_update = Mock()
+        poller = FlagPoller(FileFlagProvider(flags_file), on_update, fallback_to_defaults=True)
+        poller.poll()
+        content = flags_file.read_text()
+        os.remove(flags_file)
+
+        with pytest.warns(RuntimeWarning):
+            poller.poll()
+            poller.poll()
+        assert on_update.call_args_list[1:] == [(({},),)]
+
+        # The states are restored once the provider is back, even if they're unchanged
+        flags_file.write_text(content)
+        poller.poll()
+        assert on_update.call_args_list[-1] == (({'feature': True},),)
+
+    def test_thread(self, flags_file):
+        on_update = Mock()
+        poller = FlagPoller(FileFlagProvider(flags_file), on_update, interval=poll_interval)
+        poller.start()
+        poller.stop()
+        poller.stop()
+        on_update.assert_called_once_with({'feature': True})
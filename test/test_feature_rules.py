@@ -0,0 +1,141 @@
+import pytest
+from outcome.utils.feature_rules import AllowList, AttributeMatch, Columns, DenyList, Rollout, Rule, bucket
+
+buckets = 10000
+salt = 12345
+users = 20000
+sample_size = 2000
+half = 50
+
+
+class TestBucket:
+    def test_stable(self):
+        assert bucket('user-1', 0) == bucket('user-1', 0)
+        assert bucket(1, 0) == bucket('1', 0)
+
+    def test_range(self):
+        assert all(0 <= bucket(i, salt) < buckets for i in range(1000))
+
+    def test_salt(self):
+        assert [bucket(i, 1) for i in range(100)] != [bucket(i, 2) for i in range(100)]
+
+
+class TestRollout:
+    @pytest.mark.parametrize('percentage', [-1, 100.5])
+    def test_invalid_percentage(self, percentage):
+        with pytest.raises(ValueError):
+            Rollout(percentage)
+
+    @pytest.mark.parametrize('percentage', [0, 10, 50, 100])
+    def test_distribution(self, percentage):
+        rollout = Rollout(percentage, salt='feature')
+        active = sum(rollout.evaluate({'id': f'user-{i}'}) is True for i in range(users))
+        assert active == pytest.approx(users * percentage / 100, abs=users / 100)
+
+    def test_not_in_rollout(self):
+        assert Rollout(0, salt='feature').evaluate({'id': 'user'}) is None
+
+    def test_monotonic(self):
+        # Increasing the percentage only adds IDs to the rollout
+        ids = [f'user-{i}' for i in range(1000)]
+        smaller = {i for i in ids if Rollout(10, salt='feature').evaluate({'id': i})}
+        larger = {i for i in ids if Rollout(half, salt='feature').evaluate({'id': i})}
+        assert smaller < larger
+
+    def test_bind(self):
+        rollout = Rollout(half)
+        bound = rollout.bind('feature')
+        assert bound.salt == 'feature'
+        assert rollout.salt is None
+        assert bound.bind('other') is bound
+
+    def test_attribute(self):
+        rollout = Rollout(100, attribute='org', salt='feature')
+        assert rollout.evaluate({'org': 'acme'})
+        assert rollout.evaluate({'id': 'user'}) is None
+
+
+class TestRule:
+    def test_abstract(self):
+        with pytest.raises(TypeError):
+            Rule('id')  # type: ignore
+
+    def test_slots(self):
+        assert not hasattr(AllowList({'a'}), '__dict__')  # noqa: WPS421
+
+
+class TestLists:
+    def test_allow_list(self):
+        rule = AllowList({'a', 'b'})
+        assert rule.evaluate({'id': 'a'}) is True
+        assert rule.evaluate({'id': 'c'}) is None
+        assert rule.evaluate({}) is None
+
+    def test_deny_list(self):
+        rule = DenyList(['a'], attribute='email')
+        assert rule.evaluate({'email': 'a'}) is False
+        assert rule.evaluate({'email': 'b'}) is None
+        assert rule.evaluate({'id': 'a'}) is None
+
+
+class TestAttributeMatch:
+    def test_values(self):
+        rule = AttributeMatch('country', ['FR', 'BE'])
+        assert rule.evaluate({'country': 'FR'}) is True
+        assert rule.evaluate({'country': 'US'}) is None
+
+    def test_single_value(self):
+        rule = AttributeMatch('plan', 'enterprise')
+        assert rule.evaluate({'plan': 'enterprise'}) is True
+        assert rule.evaluate({'plan': 'e'}) is None
+
+
+class TestColumns:
+    columns = {
+        'id': ['a', 'b', None, 'd', 'e', 'a'],
+        'country': ['FR', 'US', 'FR', None, 'BE', 'FR'],
+    }
+
+    rules = [DenyList({'a'}), AllowList({'b', 'e'}), AttributeMatch('country', ['FR', 'BE']), Rollout(half, salt='feature')]
+
+    def expected(self, rules, state):
+        contexts = [dict(zip(self.columns.keys(), row)) for row in zip(*self.columns.values())]
+        expected = []
+        for context in contexts:
+            decisions = [rule.evaluate(context) for rule in rules]
+            expected.append(next((decision for decision in decisions if decision is not None), state))
+        return expected
+
+    def test_invalid_lengths(self):
+        with pytest.raises(ValueError):
+            Columns({'id': [1, 2], 'country': ['FR']})
+
+    def test_empty(self, with_numpy):
+        assert not list(Columns({}).evaluate(self.rules, state=True))
+
+    @pytest.mark.parametrize('state', [True, False])
+    def test_evaluate(self, with_numpy, state):
+        result = Columns(self.columns).evaluate(self.rules, state)
+        assert self.expected(self.rules, state) == [bool(value) for value in result]
+        assert isinstance(result, bytearray) != with_numpy
+
+    @pytest.mark.parametrize('rule', rules)
+    @pytest.mark.parametrize('state', [True, False])
+    def test_single_rule(self, with_numpy, rule, state):
+        result = Columns(self.columns).evaluate([rule], state)
+        assert self.expected([rule], state) == [bool(value) for value in result]
+
+    def test_rollout_matches_evaluate(self, with_numpy):
+        ids = [f'user-{i}' for i in range(sample_size)]
+        rollout = Rollout(half, salt='feature')
+        result = Columns({'id': ids}).evaluate([rollout], state=False)
+        assert [bool(value) for value in result] == [bool(rollout.evaluate({'id': i})) for i in ids]
+
+    def test_missing_column(self, with_numpy):
+        result = Columns({'id': ['a', 'b']}).evaluate([AttributeMatch('country', 'FR')], state=True)
+        assert [bool(value) for value in result] == [True, True]
+
+    def test_shared_precomputation(self):
+        columns = Columns(self.columns)
+        assert columns.hashes('id') is columns.hashes('id')
+        assert columns.factorize('id') is columns.factorize('id')
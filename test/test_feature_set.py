@@ -1,11 +1,16 @@
+import asyncio
+import json
 import os
+import time
 import warnings
 from pathlib import Path
 from unittest.mock import patch
 
 import pytest
 from outcome.utils import feature_set
-from outcome.utils.config import Config
+from outcome.utils.config import Config, cache_path_for
+from outcome.utils.feature_providers import FileFlagProvider
+from outcome.utils.feature_rules import AllowList, AttributeMatch, DenyList, Rollout
 from outcome.utils.feature_set import FeatureType
 
 valid_feature_names_raw = [
@@ -21,6 +26,11 @@ invalid_feature_names_raw = [
     'feature_',
 ]
 
+half = 50
+contexts_count = 200
+timeout = 5
+poll_interval = 0.01
+
 expected_feature_keys = [
     ('feat', 'WITH_FEAT_FEAT'),
     ('my.feat', 'WITH_FEAT_MY_FEAT'),
@@ -228,3 +238,678 @@ def test_feature_source_default():
 @pytest.mark.usefixtures('register_feature')
 def test_feature_source_config():
     assert feature_set._feature_state_source(default_feature) == 'config'
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_snapshot_warm():
+    assert not feature_set.is_active(default_feature)
+    with patch.object(feature_set._default_set.config, 'get') as mocked_get:
+        assert not feature_set.is_active(default_feature)
+        assert feature_set.is_active(active_feature)
+        mocked_get.assert_not_called()
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_snapshot_refresh():
+    assert not feature_set.is_active(default_feature)
+
+    os.environ['WITH_FEAT_DEFAULT_FEATURE'] = '1'
+    assert not feature_set.is_active(default_feature)
+
+    feature_set.refresh()
+    assert feature_set.is_active(default_feature)
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_snapshot_register():
+    assert feature_set.features()
+    feature_set.register_feature('new_feature', default=True)
+    assert feature_set.is_active('new_feature')
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_snapshot_config_reload(tmp_path):
+    config_file = tmp_path / 'config.toml'
+    config_file.write_text('[with_feat]\ndefault_feature = false\n')
+    feature_set.set_config(Config(config_file))
+    assert not feature_set.is_active(default_feature)
+
+    config_file.write_text('[with_feat]\ndefault_feature = true\nother = 1\n')
+    feature_set._default_set.config.backends[1].reload()
+    assert feature_set.is_active(default_feature)
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_snapshot_unrelated_config_reload(tmp_path):
+    config_file = tmp_path / 'config.toml'
+    config_file.write_text('[app]\nport = 80\n')
+    feature_set.set_config(Config(config_file))
+    assert not feature_set.is_active(default_feature)
+
+    config_file.write_text('[app]\nport = 81\n')
+    with patch.object(feature_set.FeatureSet, '_evaluate', autospec=True) as mocked_evaluate:
+        feature_set._default_set.config.backends[1].reload()
+        feature_set.is_active(default_feature)
+        mocked_evaluate.assert_not_called()
+
+
+def test_set_config_subscribes_once():
+    shared_config = Config()
+    feature_sets = [feature_set.FeatureSet(shared_config) for _ in range(3)]
+    for each_set in feature_sets:
+        each_set.set_config(shared_config)
+    assert len(shared_config.listeners) == len(feature_sets)
+
+
+@patch.dict(os.environ, {}, clear=True)
+def test_set_config_unsubscribes_previous(tmp_path):
+    config_file = tmp_path / 'config.toml'
+    config_file.write_text('[with_feat]\ndefault_feature = false\n')
+    previous_config = Config(config_file)
+    features = feature_set.FeatureSet(previous_config)
+    features.set_config(Config())
+    assert not previous_config.listeners
+
+    config_file.write_text('[with_feat]\ndefault_feature = true\n')
+    with patch.object(feature_set.FeatureSet, 'refresh', autospec=True) as mocked_refresh:
+        previous_config.backends[1].reload()
+        mocked_refresh.assert_not_called()
+
+
+@patch.dict(os.environ, {}, clear=True)
+def test_rules():
+    feature_set.register_feature(
+        'targeted',
+        rules=[DenyList({'blocked'}), AllowList({'blocked', 'tester'}), AttributeMatch('country', 'FR')],
+    )
+    assert feature_set.is_active('targeted', {'id': 'tester'})
+    assert feature_set.is_active('targeted', {'id': 'user', 'country': 'FR'})
+    assert not feature_set.is_active('targeted', {'id': 'blocked', 'country': 'FR'})
+    assert not feature_set.is_active('targeted', {'id': 'user'})
+    assert not feature_set.is_active('targeted')
+
+
+@patch.dict(os.environ, {}, clear=True)
+def test_rules_fall_back_to_state():
+    feature_set.register_feature('targeted', default=True, rules=[DenyList({'blocked'})])
+    feature_set.register_feature('untargeted', default=True)
+    assert feature_set.is_active('targeted', {'id': 'user'})
+    assert not feature_set.is_active('targeted', {'id': 'blocked'})
+    assert feature_set.is_active('untargeted', {'id': 'blocked'})
+
+
+@patch.dict(os.environ, {'WITH_FEAT_TARGETED': 'false'}, clear=True)
+@pytest.mark.usefixtures('with_numpy')
+def test_rules_config_kill_switch():
+    feature_set.register_feature('targeted', rules=[AllowList({'tester'}), Rollout(100)])
+    assert not feature_set.is_active('targeted', {'id': 'tester'})
+    assert not any(feature_set.evaluate_many(['targeted'], {'id': ['tester', 'user']})['targeted'])
+
+    os.environ['WITH_FEAT_TARGETED'] = 'true'
+    feature_set.refresh()
+    assert feature_set.is_active('targeted', {'id': 'tester'})
+
+
+@patch.dict(os.environ, {}, clear=True)
+def test_rules_provider_kill_switch():
+    feature_set.register_feature('targeted', rules=[AllowList({'tester'})])
+    feature_set._default_set._provider_updated({'targeted': False})
+    assert not feature_set.is_active('targeted', {'id': 'tester'})
+
+    # A default of False isn't a kill switch
+    feature_set._default_set._provider_updated({})
+    assert feature_set.is_active('targeted', {'id': 'tester'})
+
+
+@patch.dict(os.environ, {}, clear=True)
+def test_rollout_salted_by_feature():
+    feature_set.register_feature('first', rules=[Rollout(half)])
+    feature_set.register_feature('second', rules=[Rollout(half)])
+    ids = [str(i) for i in range(100)]
+    first = [feature_set.is_active('first', {'id': i}) for i in ids]
+    second = [feature_set.is_active('second', {'id': i}) for i in ids]
+    assert first != second
+
+
+def test_rules_on_string_feature():
+    with pytest.raises(feature_set.FeatureException):
+        feature_set.register_feature('invalid_feature', feature_type=FeatureType.string, rules=[Rollout(half)])
+
+
+@patch.dict(os.environ, {'WITH_FEAT_INACTIVE_FEATURE': '1'}, clear=True)
+@pytest.mark.usefixtures('with_numpy', 'register_feature')
+def test_evaluate_many():
+    feature_set.register_feature('targeted', rules=[DenyList({'2'}), AttributeMatch('country', 'FR'), Rollout(half)])
+    ids = [str(i) for i in range(contexts_count)]
+    countries = [('FR', 'US', None, 'BE')[i % 4] for i in range(contexts_count)]
+    features = ['targeted', default_feature, active_feature, inactive_feature]
+
+    results = feature_set.evaluate_many(features, {'id': ids, 'country': countries})
+
+    assert list(results) == features
+    for feature in features:
+        expected = [feature_set.is_active(feature, {'id': i, 'country': c}) for i, c in zip(ids, countries)]
+        assert expected == [bool(value) for value in results[feature]]
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_evaluate_many_string_feature():
+    with pytest.raises(feature_set.FeatureException):
+        feature_set.evaluate_many([str_feature], {'id': ['1']})
+
+
+@patch.dict(os.environ, {'APP_ENV': 'dev'}, clear=True)
+def test_evaluate_many_unknown_feature():
+    with warnings.catch_warnings(record=True) as w:
+        assert not any(feature_set.evaluate_many([unknown_feature], {'id': ['1', '2']})[unknown_feature])
+        assert len(w) == 1
+
+
+@patch.dict(os.environ, {'APP_ENV': 'dev'}, clear=True)
+def test_evaluate_many_unregistered_default():
+    with warnings.catch_warnings(record=True):
+        feature_set.set_feature_default(unknown_feature, default_state=True)
+    assert all(feature_set.evaluate_many([unknown_feature], {'id': ['1', '2']})[unknown_feature])
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_scope_consistent():
+    with feature_set.feature_scope():
+        assert not feature_set.is_active(default_feature)
+        feature_set.set_feature_default(default_feature, default_state=True)
+        assert not feature_set.is_active(default_feature)
+        assert feature_set.is_active(inactive_feature) is False
+
+    assert feature_set.is_active(default_feature)
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_scope_lazy():
+    with feature_set.feature_scope():
+        assert feature_set.is_active(active_feature)
+        assert feature_set._scope.get()[feature_set._default_set].states == {active_feature: True}
+    assert feature_set._scope.get() is None
+
+
+@patch.dict(os.environ, {}, clear=True)
+def test_scope_context():
+    feature_set.register_feature('targeted', rules=[AllowList({'tester'})])
+    with feature_set.feature_scope({'id': 'tester'}):
+        assert feature_set.is_active('targeted')
+        assert not feature_set.is_active('targeted', {'id': 'other'})
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+@pytest.mark.asyncio
+async def test_scope_per_task():
+    async def check(state):
+        with feature_set.feature_scope():
+            feature_set.set_feature_default(default_feature, state)
+            assert feature_set.is_active(default_feature) is state
+            await asyncio.sleep(0)
+            return feature_set.is_active(default_feature)
+
+    assert await asyncio.gather(check(True), check(False)) == [True, False]
+
+
+def app_checking(feature):
+    calls = []
+
+    async def app(scope, receive, send):
+        calls.append(feature_set.is_active(feature))
+        feature_set.set_feature_default(feature, not calls[-1])
+        calls.append(feature_set.is_active(feature))
+
+    return app, calls
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+@pytest.mark.asyncio
+async def test_middleware():
+    app, calls = app_checking(default_feature)
+    await feature_set.FeatureScopeMiddleware(app)({'type': 'http'}, None, None)
+    assert calls == [False, False]
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.asyncio
+async def test_middleware_context():
+    feature_set.register_feature('targeted', rules=[AllowList({'tester'})])
+    app, calls = app_checking('targeted')
+    middleware = feature_set.FeatureScopeMiddleware(app, context=lambda scope: {'id': scope['user']})
+    await middleware({'type': 'websocket', 'user': 'tester'}, None, None)
+    assert calls == [True, True]
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+@pytest.mark.asyncio
+async def test_middleware_lifespan():
+    app, calls = app_checking(default_feature)
+    await feature_set.FeatureScopeMiddleware(app)({'type': 'lifespan'}, None, None)
+    assert calls == [False, True]
+
+
+@pytest.fixture
+def flags_file(tmp_path):
+    path = tmp_path / 'flags.json'
+    path.write_text(json.dumps({default_feature: 'yes', str_feature: 'provider_value', unknown_feature: True}))
+    return path
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(poll_interval)
+    return True
+
+
+@pytest.fixture
+def remove_provider():
+    yield
+    feature_set.set_provider(None)
+
+
+@patch.dict(os.environ, {'WITH_FEAT_DEFAULT_FEATURE': '0'}, clear=True)
+@pytest.mark.usefixtures('register_feature', 'remove_provider')
+def test_provider(flags_file):
+    feature_set.set_provider(FileFlagProvider(flags_file), interval=poll_interval)
+    assert wait_for(lambda: feature_set.is_active(default_feature))
+    assert feature_set.is_active(str_feature) == 'provider_value'
+    assert feature_set._feature_state_source(default_feature) == 'provider'
+    assert feature_set._feature_state_source(active_feature) == 'default'
+
+
+@patch.dict(os.environ, {'WITH_FEAT_DEFAULT_FEATURE': '0'}, clear=True)
+@pytest.mark.usefixtures('register_feature', 'remove_provider')
+def test_provider_updated(flags_file):
+    feature_set.set_provider(FileFlagProvider(flags_file), interval=poll_interval)
+    assert wait_for(lambda: feature_set.is_active(default_feature))
+
+    flags_file.write_text(json.dumps({default_feature: False}))
+    assert wait_for(lambda: feature_set.is_active(str_feature) == 'str_value')
+    assert not feature_set.is_active(default_feature)
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_provider_removed(flags_file):
+    feature_set.set_provider(FileFlagProvider(flags_file), interval=poll_interval)
+    feature_set.set_provider(None)
+    assert feature_set._default_set.poller is None
+    assert not feature_set._default_set.provider_states
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_provider_replaced(flags_file):
+    feature_set.set_provider(FileFlagProvider(flags_file))
+    first = feature_set._default_set.poller
+    feature_set.set_provider(FileFlagProvider(flags_file))
+    assert feature_set._default_set.poller is not first
+    assert first._thread is None
+    feature_set.reset()
+    assert feature_set._default_set.poller is None
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_evaluation_racing_refresh():
+    def register_during_evaluation(feature):
+        feature_set.refresh()
+
+    with patch.object(feature_set.FeatureSet, '_status_from_config', side_effect=register_during_evaluation):
+        feature_set._default_set._evaluate()
+    assert feature_set._default_set.states is None
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_feature_set_isolated(tmp_path):
+    config_file = tmp_path / 'config.toml'
+    config_file.write_text('[with_feat]\ndefault_feature = true\n')
+    tenant = feature_set.FeatureSet(Config(config_file))
+    tenant.register_feature(default_feature)
+
+    assert tenant.is_active(default_feature)
+    assert not feature_set.is_active(default_feature)
+    assert tenant.features() == {default_feature: True}
+    assert tenant.state_source(default_feature) == 'config'
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_feature_set_reset_isolated():
+    tenant = feature_set.FeatureSet()
+    tenant.register_feature(default_feature)
+    tenant.reset()
+    assert not tenant.features()
+    assert feature_set.is_active(active_feature)
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_feature_set_scope_isolated():
+    tenant = feature_set.FeatureSet()
+    tenant.register_feature(default_feature)
+
+    with tenant.feature_scope():
+        assert not tenant.is_active(default_feature)
+        tenant.set_feature_default(default_feature, default_state=True)
+        feature_set.set_feature_default(default_feature, default_state=True)
+        assert not tenant.is_active(default_feature)
+        assert feature_set.is_active(default_feature)
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_feature_set_scope_nested():
+    tenant = feature_set.FeatureSet()
+    tenant.register_feature(default_feature)
+
+    with feature_set.feature_scope():
+        assert not feature_set.is_active(default_feature)
+        with tenant.feature_scope():
+            feature_set.set_feature_default(default_feature, default_state=True)
+            tenant.set_feature_default(default_feature, default_state=True)
+            assert not feature_set.is_active(default_feature)
+            assert tenant.is_active(default_feature)
+        assert set(feature_set._scope.get()) == {feature_set._default_set}
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.asyncio
+async def test_middleware_feature_set():
+    tenant = feature_set.FeatureSet()
+    tenant.register_feature(default_feature)
+    calls = []
+
+    async def app(scope, receive, send):
+        calls.append(tenant.is_active(default_feature))
+        tenant.set_feature_default(default_feature, default_state=True)
+        calls.append(tenant.is_active(default_feature))
+
+    await feature_set.FeatureScopeMiddleware(app, feature_set=tenant)({'type': 'http'}, None, None)
+    assert calls == [False, False]
+
+
+@patch.dict(os.environ, {'WITH_FEAT_DEFAULT_FEATURE': '1'}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_telemetry():
+    feature_set.register_feature('targeted', rules=[AllowList({'tester'})])
+    feature_set.is_active(active_feature)  # Not counted
+    feature_set.start_telemetry()
+
+    # The outcomes of these checks are in the report
+    feature_set.is_active(default_feature)
+    feature_set.is_active(active_feature)
+    feature_set.is_active('targeted', {'id': 'tester'})
+    feature_set.is_active('targeted', {'id': 'other'})
+    with feature_set.feature_scope():
+        feature_set.is_active(active_feature)
+        feature_set.is_active(active_feature)
+
+    report = feature_set.telemetry_report()
+    assert report[default_feature] == {'evaluations': 1, 'outcomes': {True: 1}, 'sources': {'config': 1}}
+    assert report[active_feature] == {'evaluations': 3, 'outcomes': {True: 3}, 'sources': {'default': 2, 'scope': 1}}
+    assert report['targeted'] == {'evaluations': 2, 'outcomes': {True: 1, False: 1}, 'sources': {'rule': 1, 'default': 1}}
+    assert report[inactive_feature] == {'evaluations': 0, 'outcomes': {}, 'sources': {}}
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature', 'remove_provider')
+def test_telemetry_provider(flags_file):
+    telemetry = feature_set.start_telemetry()
+    feature_set.set_provider(FileFlagProvider(flags_file), interval=poll_interval)
+    assert wait_for(lambda: feature_set.is_active(str_feature) == 'provider_value')
+    assert telemetry.as_dict()[str_feature]['sources']['provider'] == 1
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_telemetry_stopped():
+    with pytest.raises(RuntimeError):
+        feature_set.telemetry_report()
+
+    telemetry = feature_set.start_telemetry()
+    assert feature_set.stop_telemetry() is telemetry
+    assert feature_set.stop_telemetry() is None
+    feature_set.is_active(default_feature)
+    assert not telemetry.as_dict()
+
+
+def test_feature_name_backtracking():
+    # The pattern used to backtrack exponentially on long invalid names
+    start = time.perf_counter()
+    assert not feature_set._is_valid_feature_name(f'{"a" * 100}_')
+    assert time.perf_counter() - start < 0.1
+
+
+features_table = {
+    'checkout': True,
+    'banner_text': 'Welcome',
+    'search': {
+        'fuzzy': {'default': True},
+        'engine': {'type': 'string'},
+        'legacy': {},
+    },
+    'empty': {'type': 'boolean'},
+}
+
+
+@patch.dict(os.environ, {'WITH_FEAT_SEARCH_ENGINE': 'elastic'}, clear=True)
+def test_register_features():
+    registered = feature_set.register_features(features_table)
+    assert registered == ['checkout', 'banner_text', 'search.fuzzy', 'search.engine', 'empty']
+    assert feature_set.features() == {
+        'checkout': True,
+        'banner_text': 'Welcome',
+        'search.fuzzy': True,
+        'search.engine': 'elastic',
+        'empty': False,
+    }
+    assert feature_set._default_set.types['banner_text'] == FeatureType.string
+
+
+@patch.dict(os.environ, {}, clear=True)
+def test_register_features_errors():
+    feature_set.register_feature('existing')
+    table = {
+        'existing': True,
+        'Invalid': True,
+        'number': 1,
+        'unknown_type': {'type': 'integer'},
+        'wrong_string': {'type': 'string', 'default': True},
+        'typo': {'default': True, 'dflt': False},
+        'valid': True,
+    }
+
+    with pytest.raises(feature_set.FeatureDefinitionException) as exc_info:
+        feature_set.register_features(table)
+
+    assert exc_info.value.errors == [  # noqa: WPS441
+        'Invalid: invalid feature name',
+        'number: invalid boolean default 1',
+        "unknown_type: invalid type 'integer'",
+        'wrong_string: invalid string default True',
+        'typo: unknown keys: dflt',
+        'existing: duplicate feature',
+    ]
+    assert list(feature_set.features()) == ['existing']
+
+
+@patch.dict(os.environ, {}, clear=True)
+def test_register_features_line_break():
+    # The names are checked together, separated by line breaks
+    with pytest.raises(feature_set.FeatureDefinitionException) as exc_info:
+        feature_set.register_features({'valid': True, 'line\nbreak': True})
+    assert exc_info.value.errors == ['line\nbreak: invalid feature name']  # noqa: WPS441
+
+
+@patch.dict(os.environ, {}, clear=True)
+def test_register_features_duplicate_in_table():
+    with pytest.raises(feature_set.FeatureException, match='a.b: duplicate feature'):
+        feature_set.register_features({'a': {'b': True}, 'a.b': False})
+
+
+@pytest.fixture
+def features_toml(tmp_path):
+    path = tmp_path / 'pyproject.toml'
+    path.write_text('[tool.features]\ncheckout = true\n\n[tool.features.search]\nfuzzy = { default = false }\n')
+    return path
+
+
+@patch.dict(os.environ, {}, clear=True)
+def test_load_features(features_toml):
+    assert feature_set.load_features(features_toml) == ['checkout', 'search.fuzzy']
+    assert feature_set.features() == {'checkout': True, 'search.fuzzy': False}
+    assert not cache_path_for(features_toml, 'features').exists()
+
+
+@patch.dict(os.environ, {}, clear=True)
+def test_load_features_cached(features_toml):
+    assert feature_set.load_features(features_toml, cache=True) == ['checkout', 'search.fuzzy']
+    assert cache_path_for(features_toml, 'features').exists()
+
+    feature_set.reset()
+    with patch.object(feature_set, 'toml', autospec=True) as mocked_toml:
+        assert feature_set.load_features(features_toml, cache=True) == ['checkout', 'search.fuzzy']
+        mocked_toml.load.assert_not_called()
+
+
+@patch.dict(os.environ, {}, clear=True)
+def test_load_features_table(features_toml):
+    assert feature_set.load_features(features_toml, table='tool.features.search') == ['fuzzy']
+
+
+@patch.dict(os.environ, {}, clear=True)
+def test_load_features_missing_table(features_toml):
+    assert not feature_set.load_features(features_toml, table='tool.missing')
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_subscribe():
+    changes = []
+    feature_set.subscribe(default_feature, lambda feature, state: changes.append((feature, state)))
+
+    feature_set.refresh()
+    feature_set.set_feature_default(active_feature, default_state=False)
+    assert not changes
+
+    feature_set.set_feature_default(default_feature, default_state=True)
+    assert changes == [(default_feature, True)]
+
+    os.environ['WITH_FEAT_DEFAULT_FEATURE'] = '0'
+    feature_set.refresh()
+    assert changes == [(default_feature, True), (default_feature, False)]
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_subscribe_config(tmp_path):
+    config_file = tmp_path / 'config.toml'
+    config_file.write_text('[with_feat]\nstr_feature = "first"\n')
+    feature_set.set_config(Config(config_file))
+
+    changes = []
+    feature_set.subscribe(str_feature, lambda feature, state: changes.append(state))
+
+    config_file.write_text('[with_feat]\nstr_feature = "second"\n')
+    feature_set._default_set.config.backends[1].reload()
+    feature_set.set_config(Config())
+    assert changes == ['second', 'str_value']
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_subscribe_provider(flags_file):
+    changes = []
+    feature_set.subscribe(default_feature, lambda feature, state: changes.append(state))
+    try:
+        feature_set.set_provider(FileFlagProvider(flags_file), interval=poll_interval)
+        assert wait_for(lambda: changes == [True])
+    finally:
+        feature_set.set_provider(None)
+    assert changes == [True, False]
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_subscribe_callback_error():
+    def failing(feature, state):
+        raise ValueError('failed')
+
+    changes = []
+    feature_set.subscribe(default_feature, failing)
+    feature_set.subscribe(default_feature, lambda feature, state: changes.append(state))
+
+    with pytest.warns(RuntimeWarning, match='Subscriber of default_feature failed'):
+        feature_set.set_feature_default(default_feature, default_state=True)
+    assert changes == [True]
+
+    with pytest.warns(RuntimeWarning):
+        feature_set.set_feature_default(default_feature, default_state=False)
+    assert changes == [True, False]
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_subscribe_callback_reentrant():
+    seen = []
+
+    def callback(feature, state):
+        seen.append(feature_set.is_active(feature))
+        feature_set.unsubscribe(feature, callback)
+
+    feature_set.subscribe(default_feature, callback)
+    other = []
+    feature_set.subscribe(default_feature, lambda feature, state: other.append(state))
+
+    feature_set.set_feature_default(default_feature, default_state=True)
+    feature_set.set_feature_default(default_feature, default_state=False)
+    assert seen == [True]
+    assert other == [True, False]
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_unsubscribe():
+    changes = []
+
+    def callback(feature, state):
+        changes.append(state)
+
+    feature_set.subscribe(default_feature, callback)
+    feature_set.set_feature_default(default_feature, default_state=True)
+    # Each subscription is removed separately, and removing a missing one does nothing
+    feature_set.subscribe(default_feature, callback)
+    feature_set.unsubscribe(default_feature, callback)
+    feature_set.unsubscribe(default_feature, callback)
+    feature_set.unsubscribe(default_feature, callback)
+    assert not feature_set._default_set.subscribers
+
+    feature_set.set_feature_default(default_feature, default_state=False)
+    assert changes == [True]
+
+
+@patch.dict(os.environ, {}, clear=True)
+@pytest.mark.usefixtures('register_feature')
+def test_subscribers_reset():
+    changes = []
+    feature_set.subscribe(default_feature, lambda feature, state: changes.append(state))
+    feature_set.reset()
+    feature_set.register_feature(default_feature, default=True)
+    assert not changes
@@ -0,0 +1,48 @@
+import threading
+from itertools import repeat
+
+from outcome.utils.feature_telemetry import FeatureTelemetry
+
+records_count = 1000
+threads_count = 4
+
+
+def test_record():
+    telemetry = FeatureTelemetry()
+    telemetry.record('feature', state=True, source='config')
+    telemetry.record('feature', state=True, source='config')
+    telemetry.record('feature', state=False, source='rule')
+    telemetry.record('other', 'value', 'default')
+
+    assert telemetry.as_dict() == {
+        'feature': {'evaluations': 3, 'outcomes': {True: 2, False: 1}, 'sources': {'config': 2, 'rule': 1}},
+        'other': {'evaluations': 1, 'outcomes': {'value': 1}, 'sources': {'default': 1}},
+    }
+
+
+def test_threads_merged():
+    telemetry = FeatureTelemetry()
+
+    def evaluate():
+        for feature in repeat('feature', records_count):
+            telemetry.record(feature, state=True, source='default')
+
+    threads = [threading.Thread(target=evaluate) for _ in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    evaluate()
+    for started in threads:
+        started.join()
+
+    assert len(telemetry._counters) == threads_count + 1
+    assert telemetry.as_dict()['feature']['evaluations'] == records_count * (threads_count + 1)
+
+
+def test_clear():
+    telemetry = FeatureTelemetry()
+    telemetry.record('feature', state=True, source='default')
+    telemetry.clear()
+    assert not telemetry.as_dict()
+
+    telemetry.record('feature', state=False, source='default')
+    assert telemetry.as_dict() == {'feature': {'evaluations': 1, 'outcomes': {False: 1}, 'sources': {'default': 1}}}